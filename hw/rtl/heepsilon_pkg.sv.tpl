@@ -7,10 +7,14 @@ package heepsilon_pkg;
   import addr_map_rule_pkg::*;
   import core_v_mini_mcu_pkg::*;
 
+  // Number of CGRA instances
+  localparam CGRA_N_INSTANCES = ${cgra_num_instances};
+
   // One master port per CGRA column
-  localparam CGRA_XBAR_NMASTER = ${cgra_num_columns};
-  // One slave port to the CGRA context memory
-  localparam EXT_XBAR_NSLAVE = 1;
+  localparam CGRA_N_COLUMNS = ${cgra_num_columns};
+  localparam CGRA_XBAR_NMASTER = CGRA_N_COLUMNS * CGRA_N_INSTANCES;
+  // One slave port to each CGRA context memory
+  localparam EXT_XBAR_NSLAVE = CGRA_N_INSTANCES;
 
   localparam int unsigned LOG_EXT_XBAR_NMASTER = CGRA_XBAR_NMASTER > 1 ? $clog2(
       CGRA_XBAR_NMASTER
@@ -19,18 +23,24 @@ package heepsilon_pkg;
       EXT_XBAR_NSLAVE
   ) : 32'd1;
 
-  //slave mmap and idx
+  //slave mmap and idx (instance i at CGRA_START_ADDRESS + i*CGRA_SIZE)
   localparam logic [31:0] CGRA_START_ADDRESS = core_v_mini_mcu_pkg::EXT_SLAVE_START_ADDRESS + 32'h000000;
   localparam logic [31:0] CGRA_SIZE = 32'h100000;
   localparam logic [31:0] CGRA_END_ADDRESS = CGRA_START_ADDRESS + CGRA_SIZE;
   localparam logic [31:0] CGRA_IDX = 32'd0;
 
   localparam addr_map_rule_t [EXT_XBAR_NSLAVE-1:0] EXT_XBAR_ADDR_RULES = '{
-      '{idx: CGRA_IDX, start_addr: CGRA_START_ADDRESS, end_addr: CGRA_END_ADDRESS}
+% for i in range(cgra_num_instances):
+      '{
+          idx: CGRA_IDX + 32'd${i},
+          start_addr: CGRA_START_ADDRESS + ${i}*CGRA_SIZE,
+          end_addr: CGRA_END_ADDRESS + ${i}*CGRA_SIZE
+      }${',' if i < cgra_num_instances-1 else ''}
+% endfor
   };
 
-  //slave encoder
-  localparam EXT_SYSTEM_NPERIPHERALS = 1;
+  //slave encoder (instance i at CGRA_PERIPH_START_ADDRESS + i*CGRA_PERIPH_SIZE)
+  localparam EXT_SYSTEM_NPERIPHERALS = CGRA_N_INSTANCES;
 
   localparam logic [31:0] CGRA_PERIPH_START_ADDRESS = core_v_mini_mcu_pkg::EXT_PERIPHERAL_START_ADDRESS + 32'h0000000;
   localparam logic [31:0] CGRA_PERIPH_SIZE = 32'h0001000;
@@ -38,11 +48,13 @@ package heepsilon_pkg;
   localparam logic [31:0] CGRA_PERIPH_IDX = 32'd0;
 
   localparam addr_map_rule_t [EXT_SYSTEM_NPERIPHERALS-1:0] EXT_PERIPHERALS_ADDR_RULES = '{
+% for i in range(cgra_num_instances):
       '{
-          idx: CGRA_PERIPH_IDX,
-          start_addr: CGRA_PERIPH_START_ADDRESS,
-          end_addr: CGRA_PERIPH_END_ADDRESS
-      }
+          idx: CGRA_PERIPH_IDX + 32'd${i},
+          start_addr: CGRA_PERIPH_START_ADDRESS + ${i}*CGRA_PERIPH_SIZE,
+          end_addr: CGRA_PERIPH_END_ADDRESS + ${i}*CGRA_PERIPH_SIZE
+      }${',' if i < cgra_num_instances-1 else ''}
+% endfor
   };
 
   localparam int unsigned EXT_PERIPHERALS_PORT_SEL_WIDTH = EXT_SYSTEM_NPERIPHERALS > 1 ? $clog2(
@@ -60,10 +60,14 @@ module heepsilon_top #(
   import heepsilon_pkg::*;
 
   // External xbar master/slave and peripheral ports
-  obi_req_t ext_xbar_slave_req;
-  obi_resp_t ext_xbar_slave_resp;
+  obi_req_t [EXT_XBAR_NSLAVE-1:0] ext_xbar_slave_req;
+  obi_resp_t [EXT_XBAR_NSLAVE-1:0] ext_xbar_slave_resp;
   reg_req_t ext_periph_slave_req;
   reg_rsp_t ext_periph_slave_resp;
+  // One peripheral port per CGRA instance
+  logic [EXT_PERIPHERALS_PORT_SEL_WIDTH-1:0] ext_periph_select;
+  reg_req_t [EXT_SYSTEM_NPERIPHERALS-1:0] cgra_periph_req;
+  reg_rsp_t [EXT_SYSTEM_NPERIPHERALS-1:0] cgra_periph_rsp;
   obi_req_t [heepsilon_pkg::CGRA_XBAR_NMASTER-1:0] ext_master_req;
   obi_req_t [heepsilon_pkg::CGRA_XBAR_NMASTER-1:0] heep_slave_req;
   obi_resp_t [heepsilon_pkg::CGRA_XBAR_NMASTER-1:0] ext_master_resp;
@@ -87,7 +91,7 @@ module heepsilon_top #(
   // External interrupts
   logic [core_v_mini_mcu_pkg::NEXT_INT-1:0] ext_intr_vector;
 
-  logic cgra_int;
+  logic [CGRA_N_INSTANCES-1:0] cgra_int;
   logic cgra_enable;
   logic cgra_logic_rst_n;
   logic cgra_ram_banks_set_retentive_n;
@@ -141,8 +145,10 @@ module heepsilon_top #(
     for (int i = 0; i < core_v_mini_mcu_pkg::NEXT_INT; i++) begin
       ext_intr_vector[i] = 1'b0;
     end
-    // Re-assign the interrupt lines used here
-    ext_intr_vector[0] = cgra_int;
+    // Re-assign the interrupt lines used here (one per CGRA instance)
+    for (int i = 0; i < CGRA_N_INSTANCES; i++) begin
+      ext_intr_vector[i] = cgra_int[i];
+    end
   end
 
 
@@ -152,7 +158,7 @@ module heepsilon_top #(
   // the corresponding X-HEEP slave port (to the internal system bus).
   ext_bus #(
       .EXT_XBAR_NMASTER(CGRA_XBAR_NMASTER),
-      .EXT_XBAR_NSLAVE (1)
+      .EXT_XBAR_NSLAVE (EXT_XBAR_NSLAVE)
   ) ext_bus_i (
       .clk_i        (clk_i),
       .rst_ni       (rst_ni),
@@ -180,21 +186,59 @@ module heepsilon_top #(
       .ext_slave_resp_i (ext_xbar_slave_resp)
   );
 
-  cgra_top_wrapper cgra_top_wrapper_i (
+  // Peripheral port demux
+  // ----------------------
+  // Instance i owns the registers at CGRA_PERIPH_START_ADDRESS + i*CGRA_PERIPH_SIZE.
+  addr_decode #(
+      .NoIndices(EXT_SYSTEM_NPERIPHERALS),
+      .NoRules(EXT_SYSTEM_NPERIPHERALS),
+      .addr_t(logic [31:0]),
+      .rule_t(addr_map_rule_pkg::addr_map_rule_t)
+  ) i_addr_decode_ext_periphs (
+      .addr_i(ext_periph_slave_req.addr),
+      .addr_map_i(EXT_PERIPHERALS_ADDR_RULES),
+      .idx_o(ext_periph_select),
+      .dec_valid_o(),
+      .dec_error_o(),
+      .en_default_idx_i(1'b0),
+      .default_idx_i('0)
+  );
+
+  reg_demux #(
+      .NoPorts(EXT_SYSTEM_NPERIPHERALS),
+      .req_t  (reg_pkg::reg_req_t),
+      .rsp_t  (reg_pkg::reg_rsp_t)
+  ) reg_demux_i (
       .clk_i,
       .rst_ni,
-      .cgra_enable_i(cgra_enable),
-      .rst_logic_ni(cgra_logic_rst_n),
-      .masters_req_o(ext_master_req),
-      .masters_resp_i(ext_master_resp),
-      .reg_req_i(ext_periph_slave_req),
-      .reg_rsp_o(ext_periph_slave_resp),
-      .slave_req_i(ext_xbar_slave_req),
-      .slave_resp_o(ext_xbar_slave_resp),
-      .cmem_set_retentive_ni(cgra_ram_banks_set_retentive_n),
-      .cgra_int_o(cgra_int)
+      .in_select_i(ext_periph_select),
+      .in_req_i(ext_periph_slave_req),
+      .in_rsp_o(ext_periph_slave_resp),
+      .out_req_o(cgra_periph_req),
+      .out_rsp_i(cgra_periph_rsp)
   );
 
+  // CGRA instances
+  // ----------------------
+  // Instance i drives the xbar master ports [i*CGRA_N_COLUMNS +: CGRA_N_COLUMNS],
+  // owns the xbar slave port i and raises external interrupt i.
+  for (genvar i = 0; i < CGRA_N_INSTANCES; i++) begin : gen_cgra
+    cgra_top_wrapper cgra_top_wrapper_i (
+        .clk_i,
+        .rst_ni,
+        .cgra_enable_i(cgra_enable),
+        .rst_logic_ni(cgra_logic_rst_n),
+        .masters_req_o(ext_master_req[i*CGRA_N_COLUMNS+:CGRA_N_COLUMNS]),
+        .masters_resp_i(ext_master_resp[i*CGRA_N_COLUMNS+:CGRA_N_COLUMNS]),
+        .reg_req_i(cgra_periph_req[i]),
+        .reg_rsp_o(cgra_periph_rsp[i]),
+        .slave_req_i(ext_xbar_slave_req[i]),
+        .slave_resp_o(ext_xbar_slave_resp[i]),
+        .cmem_set_retentive_ni(cgra_ram_banks_set_retentive_n),
+        .cgra_int_o(cgra_int[i])
+    );
+  end
+
   // eXtension Interface
   if_xif #() ext_if ();
 
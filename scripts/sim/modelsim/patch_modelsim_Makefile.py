@@ -81,13 +81,13 @@ with open("edalize_build_rtl.tcl","r") as f:
 # Fix the ocurrences of hw/hw/ inside the edalize_build_rtl.tcl file
 data = data.replace("/hw/hw/","/hw/")
 
-instance = "tb_top/testharness_i/heepsilon_top_i/cgra_top_wrapper_i"
+instance = "tb_top/testharness_i/heepsilon_top_i/gen_cgra[0]/cgra_top_wrapper_i"
 
 data = data + "\n\nvsim -vcddump -r tb_top\n" 
 data = data + "vsim -saifdump dump.saif tb_top\n"		
 
 data = data + "vcd file dump.vcd\n"
-data = data + "vcd add -inout "+instance+"\n"
+data = data + "vcd add -inout {"+instance+"}\n"
 data = data + "vcd off dump.vcd\n"
 data = data + "run 2 ns\n"
 data = data + "vcd on dump.vcd\n"
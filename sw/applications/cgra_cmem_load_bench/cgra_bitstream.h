@@ -0,0 +1,105 @@
+#ifndef _CGRA_BITSTREAM_H_
+#define _CGRA_BITSTREAM_H_
+
+#include <stdint.h>
+
+#include "cgra.h"
+
+// Kernel ID (0 is always NULL)
+#define REDUCE 1
+
+// Kernel configuration (kmem)
+uint32_t cgra_kmem_bitstream[CGRA_KMEM_DEPTH] = {
+  0x0, 0xf006, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0
+};
+
+// Instruction memory (cmem)
+uint32_t cgra_cmem_bitstream[CGRA_CMEM_TOT_DEPTH] = {
+  0xb0000, 0xa90004, 0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000,
+  0xa90004, 0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004,
+  0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004, 0x760b0000,
+  0x0, 0x750b0000, 0x70b00004, 0xc80000, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x0, 0x0, 0x0, 0xb0000,
+  0xa90004, 0x760b0000, 0x750b0000, 0x0, 0x0, 0x0, 0xb0000, 0xa90004,
+  0x760b0000, 0x750b0000, 0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000,
+  0x750b0000, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xb0000, 0xa90004, 0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000,
+  0xa90004, 0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000, 0xa90004,
+  0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xa0f0015, 0x9a170001, 0x90880001, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0
+};
+
+// Compressed instruction memory (cmem), loaded with cgra_cmem_init_compressed()
+// 88 bytes + 6 dictionary words instead of 512 words
+#if CGRA_N_ROWS != 4 || CGRA_CMEM_BK_DEPTH != 128
+  #error Compressed bitstream generated for another CGRA geometry
+#endif
+#define CGRA_CMEM_STREAM_SIZE 88
+#define CGRA_CMEM_DICT_SIZE   6
+
+const uint8_t cgra_cmem_stream[CGRA_CMEM_STREAM_SIZE] = {
+  0x00, 0x01, 0x02, 0x80, 0x03, 0x04, 0x05, 0x00, 0x01, 0x02, 0x80, 0x03, 0x04, 0x05, 0x00, 0x01,
+  0x02, 0x80, 0x03, 0x04, 0x05, 0x00, 0x01, 0x02, 0x80, 0x03, 0x04, 0x05, 0xfe, 0xe4, 0x00, 0x01,
+  0x02, 0x03, 0x82, 0x00, 0x01, 0x02, 0x03, 0x82, 0x00, 0x01, 0x02, 0x03, 0x82, 0x00, 0x01, 0x02,
+  0x03, 0x82, 0xfe, 0xe4, 0x00, 0x01, 0x02, 0x83, 0x00, 0x01, 0x02, 0x83, 0x00, 0x01, 0x02, 0x83,
+  0x00, 0x01, 0x02, 0x83, 0xfe, 0xe4, 0xff, 0x15, 0x00, 0x0f, 0x0a, 0xff, 0x01, 0x00, 0x17, 0x9a,
+  0xff, 0x01, 0x00, 0x88, 0x90, 0x98, 0xfe, 0xe4
+};
+
+const uint32_t cgra_cmem_dict[CGRA_CMEM_DICT_SIZE] = {
+  0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x70b00004, 0xc80000
+};
+
+#endif // _CGRA_BITSTREAM_H_
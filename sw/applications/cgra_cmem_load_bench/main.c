@@ -0,0 +1,161 @@
+/*
+ * CGRA Context Memory Load Benchmark - HEEPsilon
+ *
+ * Compares the cycles needed to write the CGRA configuration with the CPU
+ * (cgra_cmem_init) and with the X-HEEP DMA (cgra_cmem_init_dma).
+ *
+ * 1. Sweep: writes the first <rows> banks with <depth> words each, emulating
+ *    the context memory of smaller CGRA geometries (up to the generated one).
+ * 2. Full load: driver loaders, DMA with polling and with completion interrupt.
+ * 3. Overlap: the CPU computes the reference result while the DMA loads the
+ *    bitstream, then the kernel (sum reduction from cgra_kernel_gen.py) is run
+ *    to check that the DMA-loaded configuration is correct.
+ * 4. Compressed: size of the compressed bitstream and cycles of
+ *    cgra_cmem_init_compressed(), over a context memory filled with garbage,
+ *    then the kernel is run again.
+ *
+ * Regenerate the bitstream with:
+ *   python3 sw/utils/cgra_kernel_gen.py reduce --op sum --length 256 --cols 4 --unroll 3 \
+ *       -o sw/applications/cgra_cmem_load_bench
+ *   python3 sw/utils/generate_bitstream.py sw/applications/cgra_cmem_load_bench/instructions.csv \
+ *       -n REDUCE --format both -o sw/applications/cgra_cmem_load_bench/cgra_bitstream.h
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "csr.h"
+#include "hart.h"
+#include "core_v_mini_mcu.h"
+#include "heepsilon.h"
+#include "cgra.h"
+#include "dma_sdk.h"
+#include "timer_sdk.h"
+#include "cgra_bitstream.h"
+#include "reduce_host.h"
+#include "reduce_data.h"
+
+#define DMA_CHANNEL 0
+
+// Smallest bank depth of the sweep
+#define SWEEP_MIN_DEPTH 16
+
+static void cpu_load_banks(uint32_t rows, uint32_t depth) {
+  for (uint32_t i = 0; i < rows; i++) {
+    volatile uint32_t *dst = (uint32_t*) (CGRA_START_ADDRESS) + i*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+    for (uint32_t j = 0; j < depth; j++) {
+      dst[j] = cgra_cmem_bitstream[j + i*CGRA_CMEM_BK_DEPTH];
+    }
+  }
+}
+
+static void dma_load_banks(uint32_t rows, uint32_t depth) {
+  for (uint32_t i = 0; i < rows; i++) {
+    uint32_t *dst = (uint32_t*) (CGRA_START_ADDRESS) + i*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+    dma_copy((uint32_t) dst, (uint32_t) &cgra_cmem_bitstream[i*CGRA_CMEM_BK_DEPTH], depth,
+             DMA_CHANNEL, DMA_DATA_TYPE_WORD, DMA_DATA_TYPE_WORD, 0);
+  }
+}
+
+static void cpu_fill_banks(uint32_t value) {
+  for (uint32_t i = 0; i < CGRA_N_ROWS; i++) {
+    volatile uint32_t *dst = (uint32_t*) (CGRA_START_ADDRESS) + i*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+    for (uint32_t j = 0; j < CGRA_CMEM_BK_DEPTH; j++) {
+      dst[j] = value;
+    }
+  }
+}
+
+static int32_t run_reduce(int32_t expected) {
+  cgra_ptr_cfg_t ptrs;
+  ptrs.n_cols = REDUCE_N_COLS;
+  for (int c = 0; c < REDUCE_N_COLS; c++) {
+    ptrs.read_ptr[c]  = (uint32_t) &reduce_x[c * REDUCE_CHUNK];
+    ptrs.write_ptr[c] = (uint32_t) &reduce_partials[c];
+  }
+  cgra_job_t *job = cgra_submit(REDUCE, &ptrs, NULL, NULL);
+  cgra_job_wait(job);
+
+  int32_t result = reduce_finalize(reduce_x);
+  if (result != expected || result != reduce_expected[0]) {
+    printf("ERROR: CGRA %ld, CPU %ld, golden %ld\n", (long) result, (long) expected, (long) reduce_expected[0]);
+    return 1;
+  }
+  return 0;
+}
+
+int main(void) {
+  uint32_t cycles_cpu, cycles_dma, cycles_irq;
+  int32_t errors = 0;
+
+  printf("=== CGRA context memory load: CPU vs DMA ===\n");
+
+  timer_cycles_init();
+  dma_sdk_init();
+
+  cgra_t cgra;
+  cgra.base_addr = mmio_region_from_addr((uintptr_t)CGRA_PERIPH_START_ADDRESS);
+  cgra_queue_init(&cgra);
+
+  // 1. Sweep over emulated geometries
+  printf("rows depth words   cpu   dma\n");
+  for (uint32_t rows = 1; rows <= CGRA_N_ROWS; rows++) {
+    for (uint32_t depth = SWEEP_MIN_DEPTH; depth <= CGRA_CMEM_BK_DEPTH; depth *= 2) {
+      timer_start();
+      cpu_load_banks(rows, depth);
+      cycles_cpu = timer_stop();
+
+      timer_start();
+      dma_load_banks(rows, depth);
+      cycles_dma = timer_stop();
+
+      printf("%4lu %5lu %5lu %5lu %5lu\n", (unsigned long) rows, (unsigned long) depth,
+             (unsigned long) (rows*depth), (unsigned long) cycles_cpu, (unsigned long) cycles_dma);
+    }
+  }
+
+  // 2. Full bitstream with the driver loaders
+  timer_start();
+  cgra_cmem_init(cgra_cmem_bitstream, cgra_kmem_bitstream);
+  cycles_cpu = timer_stop();
+
+  timer_start();
+  cgra_cmem_init_dma(cgra_cmem_bitstream, cgra_kmem_bitstream, DMA_CHANNEL, false);
+  cycles_dma = timer_stop();
+
+  timer_start();
+  cgra_cmem_init_dma(cgra_cmem_bitstream, cgra_kmem_bitstream, DMA_CHANNEL, true);
+  cycles_irq = timer_stop();
+
+  printf("Full load (%d words): cpu %lu, dma poll %lu, dma irq %lu cycles\n",
+         CGRA_CMEM_TOT_DEPTH + CGRA_KMEM_DEPTH, (unsigned long) cycles_cpu,
+         (unsigned long) cycles_dma, (unsigned long) cycles_irq);
+
+  // 3. Overlap the load with CPU work, then check the loaded kernel
+  timer_start();
+  cgra_cmem_init_dma_start(cgra_cmem_bitstream, cgra_kmem_bitstream, DMA_CHANNEL, true);
+  int32_t expected = 0;
+  for (int i = 0; i < REDUCE_LEN; i++) {
+    expected += reduce_x[i];
+  }
+  cgra_cmem_init_dma_wait();
+  cycles_dma = timer_stop();
+  printf("Load overlapped with the CPU reference: %lu cycles\n", (unsigned long) cycles_dma);
+
+  errors += run_reduce(expected);
+
+  // 4. Compressed bitstream. The unused words keep the garbage, the kernel
+  // words must all be rewritten (the columns drop their cached configuration)
+  cpu_fill_banks(0xffffffff);
+  timer_start();
+  cgra_cmem_init_compressed(cgra_cmem_stream, cgra_cmem_dict, cgra_kmem_bitstream);
+  cycles_cpu = timer_stop();
+  printf("Compressed: %d bytes instead of %d, cpu %lu cycles\n",
+         CGRA_CMEM_STREAM_SIZE + 4*CGRA_CMEM_DICT_SIZE, 4*CGRA_CMEM_TOT_DEPTH,
+         (unsigned long) cycles_cpu);
+  errors += run_reduce(expected);
+
+  printf("CGRA load benchmark finished with %ld errors\n", (long) errors);
+
+  return errors ? EXIT_FAILURE : EXIT_SUCCESS;
+}
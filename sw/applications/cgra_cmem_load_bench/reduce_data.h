@@ -0,0 +1,31 @@
+#ifndef _REDUCE_DATA_H_
+#define _REDUCE_DATA_H_
+
+#include <stdint.h>
+
+// Stimuli and golden output for reduce sum len=256 unroll=3 (4 cols)
+
+int32_t reduce_x[256] = {
+  735312, 287229, 23354, -482793, -403011, -962649, -890786, -1013916, -681014, 656975, 313347, 865611, 7606, 223631, 987219, 481289,
+  277391, 91488, 125655, 912413, -466938, 662392, 358354, -1042833, -221986, 749531, 113906, -978142, 555514, 481622, 726820, -680200,
+  -861329, 761641, -1002225, 86950, -879966, -420035, -39718, -162137, -202924, -989186, -1037351, -787936, -1031203, 357825, 53724, 308678,
+  -508980, 241980, 553763, -243946, -81954, 1042724, 639608, 1008384, -252658, 389109, 943928, 315535, 713684, 395201, 427821, -232949,
+  786759, -765259, 165472, 464494, 724525, 53171, -261271, -397952, -161567, -29706, 458902, 816815, -895596, 910255, 65732, -298226,
+  362260, 150008, -514629, -373567, 460346, 197761, 9266, -339925, 546642, -227292, -360343, 818464, -495081, -572192, 449152, 258342,
+  -946767, -872384, -257659, 697605, -207939, 602088, -384899, -546582, 611715, 789544, -882273, -925750, 359165, -343688, 154452, -733418,
+  755060, -104146, 828361, 621437, 430634, -564885, 559959, -939480, 146998, -200170, 1041538, -632264, 936430, -858254, 258311, 168469,
+  836648, -422165, 843212, 360699, 818721, -630162, 541573, 927178, -946662, -282885, 286288, -827337, 21104, 270759, 553621, 895808,
+  -189112, -125039, -54084, 953345, -638052, -219, -944070, -156807, 933889, 252105, -315391, 1038292, 217594, 941503, -1014326, -83792,
+  702451, 540496, -194007, -5405, -167265, 61472, -565713, 599336, -885609, -178980, -457471, 491747, 522807, 442798, 890175, 906094,
+  -661339, -807545, -770997, 480279, 986339, 896372, 352827, 981312, 778596, -1017735, -798519, 762608, -875858, 1009139, 686554, 958839,
+  -292925, -736596, 35367, 991174, -278456, 817754, -243623, 676066, -567114, -41969, -363130, -561255, 823522, 633089, -755696, 888207,
+  987699, -490461, -154296, 81651, 329450, -120057, -736606, 903908, 402712, -963619, 659147, 486552, -664226, 239858, 3507, -989090,
+  896321, 459737, -397999, -1015039, -857153, 540962, -735388, 26756, 836144, 899896, -486690, -909991, -10751, 715794, 261418, -908717,
+  314931, -326506, -574170, -146175, 782849, 977403, -752763, 130509, 548403, -505698, -476771, -541746, -608974, 813943, -590094, -574894
+};
+
+int32_t reduce_expected[1] = {
+  11397542
+};
+
+#endif // _REDUCE_DATA_H_
@@ -0,0 +1,42 @@
+#ifndef _REDUCE_HOST_H_
+#define _REDUCE_HOST_H_
+
+#include <stdint.h>
+
+#include "cgra.h"
+
+// Host-side setup for reduce sum len=256 unroll=3 (4 cols)
+// Generated by cgra_kernel_gen.py
+
+#define REDUCE_LEN         256
+#define REDUCE_N_COLS      4
+#define REDUCE_CHUNK       63
+
+// One partial result per column
+static int32_t reduce_partials[REDUCE_N_COLS];
+
+/**
+ * Set the column pointers. Column c reduces x[c*CHUNK .. (c+1)*CHUNK-1].
+ */
+static inline void reduce_setup(const cgra_t *cgra, const int32_t *x)
+{
+  for (uint32_t col = 0; col < REDUCE_N_COLS; col++) {
+    cgra_set_read_ptr(cgra, (uint32_t) &x[col * REDUCE_CHUNK], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &reduce_partials[col], col);
+  }
+}
+
+/**
+ * Combine the column partials and the elements not covered by the columns.
+ */
+static inline int32_t reduce_finalize(const int32_t *x)
+{
+  int32_t acc = reduce_partials[0];
+  for (uint32_t i = 1; i < REDUCE_N_COLS + REDUCE_LEN - REDUCE_N_COLS * REDUCE_CHUNK; i++) {
+    int32_t v = i < REDUCE_N_COLS ? reduce_partials[i] : x[REDUCE_N_COLS * REDUCE_CHUNK + i - REDUCE_N_COLS];
+    acc += v;
+  }
+  return acc;
+}
+
+#endif // _REDUCE_HOST_H_
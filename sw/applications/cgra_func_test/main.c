@@ -203,32 +203,39 @@ int main(void) {
 
   // Performance counter display
   PRINTF("CGRA kernel executed: %d\n", cgra_perf_cnt_get_kernel(&cgra));
-  column_idx = 0;
-  PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
-  PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
-  column_idx = 1;
-  PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
-  PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
-  column_idx = 2;
-  PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
-  PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
-  column_idx = 3;
-  PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
-  PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
+#if CGRA_RC_PERF_CNT
+  // Column and per-RC counters, always printed: render them with sw/utils/cgra_rc_heatmap.py uart0.log
+  for (column_idx = 0; column_idx < CGRA_N_COLS; column_idx++) {
+    printf("CGRA column %d active cycles: %d\n", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
+    printf("CGRA column %d stall cycles : %d\n", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
+  }
+  for (int r = 0; r < CGRA_N_ROWS; r++) {
+    for (int c = 0; c < CGRA_N_COLS; c++) {
+      printf("CGRA RC %d %d: issue %lu mem %lu stall %lu branch %lu\n", r, c,
+             (unsigned long) cgra_perf_cnt_get_rc_issue(&cgra, r, c), (unsigned long) cgra_perf_cnt_get_rc_mem(&cgra, r, c),
+             (unsigned long) cgra_perf_cnt_get_rc_stall(&cgra, r, c), (unsigned long) cgra_perf_cnt_get_rc_branch(&cgra, r, c));
+    }
+  }
+#else
+  for (column_idx = 0; column_idx < CGRA_N_COLS; column_idx++) {
+    PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
+    PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
+  }
+#endif
   cgra_perf_cnt_reset(&cgra);
   PRINTF("CGRA kernel executed (after counter reset): %d\n", cgra_perf_cnt_get_kernel(&cgra));
   column_idx = 0;
-  PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
-  PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
+  PRINTF("CGRA column %d active cycles (after counter reset): %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
+  PRINTF("CGRA column %d stall cycles (after counter reset): %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
   column_idx = 1;
-  PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
-  PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
+  PRINTF("CGRA column %d active cycles (after counter reset): %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
+  PRINTF("CGRA column %d stall cycles (after counter reset): %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
   column_idx = 2;
-  PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
-  PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
+  PRINTF("CGRA column %d active cycles (after counter reset): %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
+  PRINTF("CGRA column %d stall cycles (after counter reset): %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
   column_idx = 3;
-  PRINTF("CGRA column %d active cycles: %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
-  PRINTF("CGRA column %d stall cycles : %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
+  PRINTF("CGRA column %d active cycles (after counter reset): %d\n\r", column_idx, cgra_perf_cnt_get_col_active(&cgra, column_idx));
+  PRINTF("CGRA column %d stall cycles (after counter reset): %d\n\r", column_idx, cgra_perf_cnt_get_col_stall(&cgra, column_idx));
 
   return errors ? EXIT_FAILURE : EXIT_SUCCESS;
 }
@@ -0,0 +1,60 @@
+#ifndef _CGRA_KERNEL_TABLE_H_
+#define _CGRA_KERNEL_TABLE_H_
+
+#include <stdint.h>
+
+#include "cgra_overlay.h"
+
+// Generated by cgra_kernel_table.py
+
+#define CGRA_KT_N_KERNELS 4
+#define CGRA_KT_N_WORDS   200
+
+#define CGRA_KT_EXIT 0 // kernels/exit/instructions.csv
+#define CGRA_KT_SUM1 1 // kernels/sum1/instructions.csv
+#define CGRA_KT_SUM2 2 // kernels/sum2/instructions.csv
+#define CGRA_KT_SUM4 3 // kernels/sum4/instructions.csv
+
+const cgra_overlay_kernel_t cgra_kernel_table[CGRA_KT_N_KERNELS] = {
+  { .n_cols = 1, .n_instr = 1, .offset = 0 }, // EXIT
+  { .n_cols = 1, .n_instr = 7, .offset = 4 }, // SUM1
+  { .n_cols = 2, .n_instr = 7, .offset = 32 }, // SUM2
+  { .n_cols = 4, .n_instr = 7, .offset = 88 }  // SUM4
+};
+
+// Context words of every kernel: row 0 to CGRA_N_ROWS-1, n_cols * n_instr words each
+#ifdef FLASH_LOAD
+#define CGRA_KT_WORDS_ATTR __attribute__((section(".xheep_data_flash_only"))) __attribute__ ((aligned (16)))
+#else
+#define CGRA_KT_WORDS_ATTR
+#endif
+
+uint32_t CGRA_KT_WORDS_ATTR cgra_kernel_table_words[CGRA_KT_N_WORDS] = {
+  0xc80000, 0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000, 0x0,
+  0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x0,
+  0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000, 0x0, 0x0, 0x0,
+  0x0, 0xaf0004, 0x9a170001, 0x90880001, 0x0, 0x0, 0x0, 0x0,
+  0xb0000, 0xa90004, 0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000,
+  0xa90004, 0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004,
+  0x760b0000, 0x750b0000, 0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000,
+  0x750b0000, 0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000, 0x0,
+  0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000, 0x0, 0x0,
+  0x0, 0x0, 0xaf0004, 0x9a170001, 0x90880001, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xb0000, 0xa90004, 0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000,
+  0xa90004, 0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004,
+  0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004, 0x760b0000,
+  0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000,
+  0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x0,
+  0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x0, 0x0,
+  0x0, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x0, 0x0, 0x0,
+  0xb0000, 0xa90004, 0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000,
+  0xa90004, 0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000, 0xa90004,
+  0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000,
+  0x0, 0x0, 0x0, 0x0, 0xaf0004, 0x9a170001, 0x90880001, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0
+};
+
+#endif // _CGRA_KERNEL_TABLE_H_
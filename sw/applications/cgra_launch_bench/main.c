@@ -0,0 +1,310 @@
+/*
+ * CGRA Kernel Launch Overhead Benchmark - HEEPsilon
+ *
+ * Measures the fixed cost of offloading a kernel to the CGRA, phase by phase,
+ * with mcycle and the CGRA performance counters:
+ *
+ *   wait   cgra_wait_ready()
+ *   ptrs   cgra_set_read_ptr()/cgra_set_write_ptr() of every column
+ *   kick   cgra_set_kernel()
+ *   done   cgra_set_kernel() to the end of the kernel seen by polling the
+ *          PLIC pending bit (poll) or to the entry of handler_irq_cgra() (irq)
+ *   ret    handler entry to the return of the wait_for_interrupt() loop
+ *   queue  cgra_submit() + cgra_job_wait() of the driver launch queue
+ *   act    active cycles of the CGRA columns (configuration + execution)
+ *   fin    host tail (partials and elements left to the CPU)
+ *
+ * for an empty kernel (EXIT only) and a vector sum on 1, 2 and 4 columns over
+ * a sweep of lengths, and compares every completion mode with the CPU. The
+ * sum kernels read their trip count from the first word of column 0, so one
+ * bitstream serves every length. The kernels are loaded with the overlay
+ * manager, and launched once before they are measured since the columns
+ * cache the configuration of the last kernel they ran.
+ *
+ * Regenerate the kernel table with (from this directory):
+ *   python3 ../../utils/cgra_kernel_table.py kernels/{exit,sum1,sum2,sum4}/instructions.csv
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "csr.h"
+#include "hart.h"
+#include "core_v_mini_mcu.h"
+#include "rv_plic.h"
+#include "heepsilon.h"
+#include "cgra.h"
+#include "cgra_overlay.h"
+#include "dma_sdk.h"
+#include "cgra_kernel_table.h"
+
+#if CGRA_N_COLS < 4 || CGRA_N_ROWS != 4
+  #error This benchmark requires 4 rows and at least 4 columns
+#endif
+
+#define DMA_CHANNEL 0
+
+// Rows loading in parallel in the sum kernels
+#define SUM_UNROLL 3
+
+#define N_LENGTHS 7
+static const uint32_t lengths[N_LENGTHS] = { 12, 24, 48, 96, 192, 384, 768 };
+#define MAX_LEN 768
+
+static const uint32_t sum_kernels[] = { CGRA_KT_SUM1, CGRA_KT_SUM2, CGRA_KT_SUM4 };
+static const uint8_t  sum_cols[]    = { 1, 2, 4 };
+#define N_SUM_KERNELS 3
+
+// xbuf[0] holds the trip count read by column 0, the vector follows
+static int32_t xbuf[1 + MAX_LEN];
+static int32_t *const x = &xbuf[1];
+static int32_t partials[CGRA_N_COLS];
+
+static cgra_t cgra;
+
+static volatile int8_t   cgra_intr_flag;
+static volatile uint32_t cgra_intr_cycle;
+
+typedef enum { MODE_POLL, MODE_IRQ, MODE_QUEUE, N_MODES } launch_mode_t;
+static const char *const mode_names[N_MODES] = { "poll", "irq", "queue" };
+
+typedef struct {
+  uint32_t wait, ptrs, kick, done, ret, queue, act, fin;
+} phases_t;
+
+static inline uint32_t cycles(void) {
+  uint32_t c;
+  CSR_READ(CSR_REG_MCYCLE, &c);
+  return c;
+}
+
+void handler_irq_cgra(uint32_t id) {
+  cgra_intr_cycle = cycles();
+  cgra_intr_flag = 1;
+}
+
+static uint32_t active_cycles(void) {
+  // The columns of a kernel run in lockstep, but the mapping may rotate
+  uint32_t act = 0;
+  for (int c = 0; c < CGRA_N_COLS; c++) {
+    uint32_t a = cgra_perf_cnt_get_col_active(&cgra, c);
+    act = a > act ? a : act;
+  }
+  return act;
+}
+
+static int32_t cpu_sum(uint32_t len) {
+  int32_t acc = 0;
+  for (uint32_t i = 0; i < len; i++) {
+    acc += x[i];
+  }
+  return acc;
+}
+
+static int32_t host_finalize(uint8_t n_cols, uint32_t chunk, uint32_t len) {
+  int32_t acc = 0;
+  for (uint32_t c = 0; c < n_cols; c++) {
+    acc += partials[c];
+  }
+  for (uint32_t i = n_cols * chunk; i < len; i++) {
+    acc += x[i];
+  }
+  return acc;
+}
+
+static void fill_ptrs(cgra_ptr_cfg_t *ptrs, uint8_t n_cols, uint32_t chunk) {
+  ptrs->n_cols = n_cols;
+  ptrs->read_ptr[0]  = (uint32_t) &xbuf[0];
+  ptrs->write_ptr[0] = (uint32_t) &partials[0];
+  for (int c = 1; c < n_cols; c++) {
+    ptrs->read_ptr[c]  = (uint32_t) &x[c * chunk];
+    ptrs->write_ptr[c] = (uint32_t) &partials[c];
+  }
+}
+
+/**
+ * Launch a kernel once in the given mode and return its result.
+ * len = 0 runs the empty kernel.
+ */
+static int32_t launch(launch_mode_t mode, uint32_t kernel_id, uint8_t n_cols, uint32_t len, phases_t *p) {
+  uint32_t chunk = len / n_cols / SUM_UNROLL * SUM_UNROLL;
+  cgra_ptr_cfg_t ptrs;
+  uint32_t t0, t1, t2, t3, t4;
+
+  xbuf[0] = chunk / SUM_UNROLL;
+  fill_ptrs(&ptrs, n_cols, chunk);
+  cgra_perf_cnt_reset(&cgra);
+  *p = (phases_t) { 0 };
+
+  if (mode == MODE_QUEUE) {
+    plic_assign_external_irq_handler(CGRA_INTR, (void *) &cgra_queue_irq_handler);
+    t0 = cycles();
+    cgra_job_t *job = cgra_submit(kernel_id, &ptrs, NULL, NULL);
+    cgra_job_wait(job);
+    t1 = cycles();
+    p->queue = t1 - t0;
+    p->act   = job->active_cycles[0];
+    for (int c = 1; c < CGRA_N_COLS; c++) {
+      p->act = job->active_cycles[c] > p->act ? job->active_cycles[c] : p->act;
+    }
+  } else {
+    plic_assign_external_irq_handler(CGRA_INTR, (void *) &handler_irq_cgra);
+    if (mode == MODE_POLL) {
+      CSR_CLEAR_BITS(CSR_REG_MSTATUS, 0x8);
+    }
+    cgra_intr_flag = 0;
+
+    t0 = cycles();
+    cgra_wait_ready(&cgra);
+    t1 = cycles();
+    for (int c = 0; c < n_cols; c++) {
+      cgra_set_read_ptr(&cgra, ptrs.read_ptr[c], c);
+      cgra_set_write_ptr(&cgra, ptrs.write_ptr[c], c);
+    }
+    t2 = cycles();
+    cgra_set_kernel(&cgra, kernel_id);
+    t3 = cycles();
+
+    if (mode == MODE_POLL) {
+      bool pending = false;
+      uint32_t claim;
+      while (!pending) {
+        plic_irq_is_pending(CGRA_INTR, &pending);
+      }
+      plic_irq_claim(&claim);
+      plic_irq_complete(&claim);
+      t4 = cycles();
+      p->done = t4 - t3;
+      CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+    } else {
+      while (cgra_intr_flag == 0) {
+        // Interrupts disabled between the check and wfi (wfi still wakes up on a pending one)
+        CSR_CLEAR_BITS(CSR_REG_MSTATUS, 0x8);
+        if (cgra_intr_flag == 0) {
+          wait_for_interrupt();
+        }
+        CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+      }
+      t4 = cycles();
+      p->done = cgra_intr_cycle - t3;
+      p->ret  = t4 - cgra_intr_cycle;
+    }
+    p->wait = t1 - t0;
+    p->ptrs = t2 - t1;
+    p->kick = t3 - t2;
+    p->act  = active_cycles();
+  }
+
+  if (len == 0) {
+    return 0;
+  }
+  t0 = cycles();
+  int32_t result = host_finalize(n_cols, chunk, len);
+  p->fin = cycles() - t0;
+  return result;
+}
+
+static uint32_t total(launch_mode_t mode, const phases_t *p) {
+  if (mode == MODE_QUEUE) {
+    return p->queue + p->fin;
+  }
+  return p->wait + p->ptrs + p->kick + p->done + p->ret + p->fin;
+}
+
+static void print_phases(const char *name, uint8_t n_cols, uint32_t len, launch_mode_t mode, const phases_t *p, uint32_t cpu) {
+  printf("%-5s %4u %4lu %-5s %4lu %4lu %4lu %6lu %4lu %6lu %6lu %4lu %6lu %6lu\n",
+         name, n_cols, (unsigned long) len, mode_names[mode],
+         (unsigned long) p->wait, (unsigned long) p->ptrs, (unsigned long) p->kick,
+         (unsigned long) p->done, (unsigned long) p->ret, (unsigned long) p->queue,
+         (unsigned long) p->act, (unsigned long) p->fin,
+         (unsigned long) total(mode, p), (unsigned long) cpu);
+}
+
+int main(void) {
+  phases_t p;
+  int32_t errors = 0;
+  // Smallest length of the sweep where the offload wins, per kernel and mode
+  uint32_t break_even[N_SUM_KERNELS][N_MODES];
+
+  printf("=== CGRA kernel launch overhead ===\n");
+
+  CSR_CLEAR_BITS(CSR_REG_MCOUNTINHIBIT, 0x1);
+  dma_sdk_init();
+
+  cgra.base_addr = mmio_region_from_addr((uintptr_t)CGRA_PERIPH_START_ADDRESS);
+  // PLIC, interrupts and performance counters; the direct modes swap the handler
+  cgra_queue_init(&cgra);
+
+  cgra_overlay_init(cgra_kernel_table, CGRA_KT_N_KERNELS, cgra_kernel_table_words, false, DMA_CHANNEL);
+  uint32_t exit_id = cgra_overlay_get(CGRA_KT_EXIT);
+  uint32_t sum_id[N_SUM_KERNELS];
+  for (int k = 0; k < N_SUM_KERNELS; k++) {
+    sum_id[k] = cgra_overlay_get(sum_kernels[k]);
+  }
+  if (exit_id == 0 || sum_id[0] == 0 || sum_id[1] == 0 || sum_id[2] == 0) {
+    printf("ERROR: kernels could not be loaded\n");
+    return EXIT_FAILURE;
+  }
+
+  uint32_t seed = 11;
+  for (int i = 0; i < MAX_LEN; i++) {
+    seed = seed * 1103515245 + 12345;
+    x[i] = (int32_t) ((seed >> 16) & 0xffff) - 32768;
+  }
+
+  printf("kern  cols  len mode  wait ptrs kick   done  ret  queue    act  fin  total    cpu\n");
+
+  // Fixed cost: empty kernel (the first launch also fills the configuration cache)
+  for (int m = 0; m < N_MODES; m++) {
+    launch((launch_mode_t) m, exit_id, 1, 0, &p);
+    launch((launch_mode_t) m, exit_id, 1, 0, &p);
+    print_phases("exit", 1, 0, (launch_mode_t) m, &p, 0);
+  }
+
+  for (int k = 0; k < N_SUM_KERNELS; k++) {
+    for (int m = 0; m < N_MODES; m++) {
+      break_even[k][m] = 0;
+    }
+    launch(MODE_POLL, sum_id[k], sum_cols[k], lengths[0] * sum_cols[k], &p);
+    for (int l = 0; l < N_LENGTHS; l++) {
+      uint32_t len = lengths[l];
+      if (len / sum_cols[k] / SUM_UNROLL == 0) {
+        continue;
+      }
+
+      uint32_t t0 = cycles();
+      int32_t expected = cpu_sum(len);
+      uint32_t cpu = cycles() - t0;
+
+      for (int m = 0; m < N_MODES; m++) {
+        int32_t result = launch((launch_mode_t) m, sum_id[k], sum_cols[k], len, &p);
+        if (result != expected) {
+          printf("ERROR: sum%u len %lu %s: CGRA %ld, CPU %ld\n", sum_cols[k], (unsigned long) len,
+                 mode_names[m], (long) result, (long) expected);
+          errors++;
+        }
+        print_phases("sum", sum_cols[k], len, (launch_mode_t) m, &p, cpu);
+        if (break_even[k][m] == 0 && total((launch_mode_t) m, &p) < cpu) {
+          break_even[k][m] = len;
+        }
+      }
+    }
+  }
+
+  printf("Break-even length (smallest of the sweep where the CGRA beats the CPU):\n");
+  for (int k = 0; k < N_SUM_KERNELS; k++) {
+    printf("  sum %u cols:", sum_cols[k]);
+    for (int m = 0; m < N_MODES; m++) {
+      if (break_even[k][m]) {
+        printf(" %s %lu", mode_names[m], (unsigned long) break_even[k][m]);
+      } else {
+        printf(" %s >%d", mode_names[m], MAX_LEN);
+      }
+    }
+    printf("\n");
+  }
+
+  printf("CGRA launch benchmark finished with %ld errors\n", (long) errors);
+
+  return errors ? EXIT_FAILURE : EXIT_SUCCESS;
+}
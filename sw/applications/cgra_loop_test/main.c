@@ -0,0 +1,134 @@
+/*
+ * CGRA Loop Test - HEEPsilon CGRA Example
+ *
+ * Checks the zero-overhead hardware loop (LOOP) of the column program
+ * counter, including a branch taken on the last instruction of the body.
+ *
+ * Kernel (column 0):
+ * - LOOP repeats instructions 2-4 LOOP_COUNT times
+ * - RC1 counts the executed passes of the body
+ * - RC2 branches back to the body start at the end of the first pass,
+ *   in the same cycle the loop wraps. The branch has priority and must
+ *   not consume an iteration, so the body runs LOOP_COUNT + 1 times.
+ * - RC1 stores the pass count through the column 0 write pointer
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "csr.h"
+#include "hart.h"
+#include "handler.h"
+#include "core_v_mini_mcu.h"
+#include "rv_plic.h"
+#include "rv_plic_regs.h"
+#include "heepsilon.h"
+#include "cgra.h"
+#include "cgra_bitstream.h"
+
+// Verify CGRA size
+#if CGRA_N_COLS != 4 || CGRA_N_ROWS != 4
+  #error This example requires a 4x4 CGRA
+#endif
+
+// Debug printing
+// #define DEBUG
+#ifdef DEBUG
+  #define PRINTF(fmt, ...) printf(fmt, ## __VA_ARGS__)
+#else
+  #define PRINTF(...)
+#endif
+
+// Iterations set by the LOOP instruction (instructions.csv, cycle 0)
+#define LOOP_COUNT    3
+// Passes that end with the branch back to the body start
+#define BRANCH_PASSES 1
+
+// Interrupt flag
+volatile int8_t cgra_intr_flag;
+
+// Written by the kernel
+int32_t cgra_result __attribute__((aligned(4)));
+
+// Interrupt handler for CGRA completion
+void handler_irq_cgra(uint32_t id) {
+    cgra_intr_flag = 1;
+}
+
+// Software reference implementation
+int32_t cpu_compute(void) {
+    int32_t passes = 0;
+    int32_t remaining = LOOP_COUNT;
+    int32_t branches = BRANCH_PASSES;
+    while (remaining > 0) {
+        passes++;
+        if (branches > 0) {
+            branches--;  // branch back: the iteration is not consumed
+        } else {
+            remaining--;
+        }
+    }
+    return passes;
+}
+
+int main(void) {
+    int32_t errors = 0;
+
+    printf("=== CGRA Loop Test ===\n");
+
+    // Initialize CGRA context memory
+    PRINTF("Initializing CGRA configuration memory...\n");
+    cgra_cmem_init(cgra_cmem_bitstream, cgra_kmem_bitstream);
+    PRINTF("Done.\n");
+
+    // Initialize PLIC for CGRA interrupts
+    plic_Init();
+    plic_irq_set_priority(CGRA_INTR, 1);
+    plic_irq_set_enabled(CGRA_INTR, kPlicToggleEnabled);
+    plic_assign_external_irq_handler(CGRA_INTR, (void*)&handler_irq_cgra);
+
+    // Enable machine-level interrupts
+    CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+    const uint32_t mask = 1 << 11;
+    CSR_SET_BITS(CSR_REG_MIE, mask);
+    cgra_intr_flag = 0;
+
+    // Get CGRA handle
+    cgra_t cgra;
+    cgra.base_addr = mmio_region_from_addr((uintptr_t)CGRA_PERIPH_START_ADDRESS);
+
+    // Run CPU reference
+    int32_t cpu_result = cpu_compute();
+    printf("CPU result: %ld\n", (long)cpu_result);
+
+    // Configure CGRA
+    PRINTF("Configuring CGRA...\n");
+    cgra_wait_ready(&cgra);
+    cgra_result = 0;
+    cgra_set_write_ptr(&cgra, (uint32_t)&cgra_result, 0);
+
+    // Launch kernel
+    PRINTF("Launching CGRA kernel...\n");
+    cgra_set_kernel(&cgra, CGRA_KERNEL);
+
+    // Wait for completion
+    while (cgra_intr_flag == 0) {
+        wait_for_interrupt();
+    }
+    PRINTF("CGRA kernel completed.\n");
+
+    printf("CGRA result: %ld\n", (long)cgra_result);
+
+    // Compare results
+    if (cgra_result != cpu_result) {
+        printf("ERROR: Mismatch! CPU=%ld, CGRA=%ld\n",
+               (long)cpu_result, (long)cgra_result);
+        errors++;
+    } else {
+        printf("SUCCESS: Results match!\n");
+    }
+
+    printf("CGRA test finished with %ld errors\n", (long)errors);
+
+    return errors ? EXIT_FAILURE : EXIT_SUCCESS;
+}
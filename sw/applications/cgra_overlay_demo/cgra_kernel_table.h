@@ -0,0 +1,111 @@
+#ifndef _CGRA_KERNEL_TABLE_H_
+#define _CGRA_KERNEL_TABLE_H_
+
+#include <stdint.h>
+
+#include "cgra_overlay.h"
+
+// Generated by cgra_kernel_table.py
+
+#define CGRA_KT_N_KERNELS 4
+#define CGRA_KT_N_WORDS   608
+
+#define CGRA_KT_FIR 0 // kernels/fir/instructions.csv
+#define CGRA_KT_RSUM 1 // kernels/rsum/instructions.csv
+#define CGRA_KT_RMAX 2 // kernels/rmax/instructions.csv
+#define CGRA_KT_RMIN 3 // kernels/rmin/instructions.csv
+
+const cgra_overlay_kernel_t cgra_kernel_table[CGRA_KT_N_KERNELS] = {
+  { .n_cols = 4, .n_instr = 11, .offset = 0 }, // FIR
+  { .n_cols = 4, .n_instr = 7, .offset = 176 }, // RSUM
+  { .n_cols = 4, .n_instr = 10, .offset = 288 }, // RMAX
+  { .n_cols = 4, .n_instr = 10, .offset = 448 }  // RMIN
+};
+
+// Context words of every kernel: row 0 to CGRA_N_ROWS-1, n_cols * n_instr words each
+#ifdef FLASH_LOAD
+#define CGRA_KT_WORDS_ATTR __attribute__((section(".xheep_data_flash_only"))) __attribute__ ((aligned (16)))
+#else
+#define CGRA_KT_WORDS_ATTR
+#endif
+
+uint32_t CGRA_KT_WORDS_ATTR cgra_kernel_table_words[CGRA_KT_N_WORDS] = {
+  0x0, 0xa90004, 0x0, 0x600b0000, 0xa91ff4, 0x760b0000, 0x0, 0x0,
+  0x750b0000, 0x70b00004, 0xc80000, 0x0, 0xa90004, 0x0, 0x600b0000, 0xa91ff4,
+  0x760b0000, 0x0, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0x0, 0xa90004,
+  0x0, 0x600b0000, 0xa91ff4, 0x760b0000, 0x0, 0x0, 0x750b0000, 0x70b00004,
+  0xc80000, 0x0, 0xa90004, 0x0, 0x600b0000, 0xa91ff4, 0x760b0000, 0x0,
+  0x0, 0x750b0000, 0x70b00004, 0xc80000, 0x0, 0xa90004, 0x6a1d1ffe, 0x800b0000,
+  0x0, 0x0, 0x0, 0x750b0000, 0x0, 0x0, 0x0, 0x0,
+  0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0, 0x0, 0x0, 0x750b0000, 0x0,
+  0x0, 0x0, 0x0, 0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0, 0x0,
+  0x0, 0x750b0000, 0x0, 0x0, 0x0, 0x0, 0xa90004, 0x6a1d1ffe,
+  0x800b0000, 0x0, 0x0, 0x0, 0x750b0000, 0x0, 0x0, 0x0,
+  0x0, 0xa90004, 0x6a1d0003, 0x800b0000, 0x0, 0x0, 0x750b0000, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0xa90004, 0x6a1d0003, 0x800b0000, 0x0,
+  0x0, 0x750b0000, 0x0, 0x0, 0x0, 0x0, 0x0, 0xa90004,
+  0x6a1d0003, 0x800b0000, 0x0, 0x0, 0x750b0000, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0xa90004, 0x6a1d0003, 0x800b0000, 0x0, 0x0, 0x750b0000,
+  0x0, 0x0, 0x0, 0x0, 0xa0f0010, 0xa90004, 0x6a1d1ffe, 0x800b0000,
+  0x0, 0x0, 0x9a170001, 0x0, 0x0, 0x90880001, 0x0, 0x0,
+  0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xa90004, 0x6a1d1ffe,
+  0x800b0000, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xb0000, 0xa90004, 0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000,
+  0xa90004, 0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004,
+  0x760b0000, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004, 0x760b0000,
+  0x0, 0x750b0000, 0x70b00004, 0xc80000, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000,
+  0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x0,
+  0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x0, 0x0,
+  0x0, 0xb0000, 0xa90004, 0x760b0000, 0x750b0000, 0x0, 0x0, 0x0,
+  0xb0000, 0xa90004, 0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000,
+  0xa90004, 0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000, 0xa90004,
+  0x760b0000, 0x0, 0x0, 0x0, 0x0, 0xb0000, 0xa90004, 0x760b0000,
+  0x0, 0x0, 0x0, 0x0, 0xa0f0015, 0x9a170001, 0x90880001, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xab0004, 0xa90004, 0x67150000, 0x76730000, 0x0, 0x0, 0x75150000, 0x57730000,
+  0x70b00004, 0xc80000, 0xab0004, 0xa90004, 0x67150000, 0x76730000, 0x0, 0x0,
+  0x75150000, 0x57730000, 0x70b00004, 0xc80000, 0xab0004, 0xa90004, 0x67150000, 0x76730000,
+  0x0, 0x0, 0x75150000, 0x57730000, 0x70b00004, 0xc80000, 0xab0004, 0xa90004,
+  0x67150000, 0x76730000, 0x0, 0x0, 0x75150000, 0x57730000, 0x70b00004, 0xc80000,
+  0xab0004, 0xa90004, 0x67150000, 0x76730000, 0x75150000, 0x57730000, 0x0, 0x0,
+  0x0, 0x0, 0xab0004, 0xa90004, 0x67150000, 0x76730000, 0x75150000, 0x57730000,
+  0x0, 0x0, 0x0, 0x0, 0xab0004, 0xa90004, 0x67150000, 0x76730000,
+  0x75150000, 0x57730000, 0x0, 0x0, 0x0, 0x0, 0xab0004, 0xa90004,
+  0x67150000, 0x76730000, 0x75150000, 0x57730000, 0x0, 0x0, 0x0, 0x0,
+  0xab0004, 0xa90004, 0x67150000, 0x76730000, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0xab0004, 0xa90004, 0x67150000, 0x76730000, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0xab0004, 0xa90004, 0x67150000, 0x76730000,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xab0004, 0xa90004,
+  0x67150000, 0x76730000, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xa0f0014, 0x9a170001, 0x0, 0x90880001, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xab0004, 0xa90004, 0x67150000, 0x67730000, 0x0, 0x0, 0x75150000, 0x75730000,
+  0x70b00004, 0xc80000, 0xab0004, 0xa90004, 0x67150000, 0x67730000, 0x0, 0x0,
+  0x75150000, 0x75730000, 0x70b00004, 0xc80000, 0xab0004, 0xa90004, 0x67150000, 0x67730000,
+  0x0, 0x0, 0x75150000, 0x75730000, 0x70b00004, 0xc80000, 0xab0004, 0xa90004,
+  0x67150000, 0x67730000, 0x0, 0x0, 0x75150000, 0x75730000, 0x70b00004, 0xc80000,
+  0xab0004, 0xa90004, 0x67150000, 0x67730000, 0x75150000, 0x75730000, 0x0, 0x0,
+  0x0, 0x0, 0xab0004, 0xa90004, 0x67150000, 0x67730000, 0x75150000, 0x75730000,
+  0x0, 0x0, 0x0, 0x0, 0xab0004, 0xa90004, 0x67150000, 0x67730000,
+  0x75150000, 0x75730000, 0x0, 0x0, 0x0, 0x0, 0xab0004, 0xa90004,
+  0x67150000, 0x67730000, 0x75150000, 0x75730000, 0x0, 0x0, 0x0, 0x0,
+  0xab0004, 0xa90004, 0x67150000, 0x67730000, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0xab0004, 0xa90004, 0x67150000, 0x67730000, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0xab0004, 0xa90004, 0x67150000, 0x67730000,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xab0004, 0xa90004,
+  0x67150000, 0x67730000, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xa0f0014, 0x9a170001, 0x0, 0x90880001, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0
+};
+
+#endif // _CGRA_KERNEL_TABLE_H_
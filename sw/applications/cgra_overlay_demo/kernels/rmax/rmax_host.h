@@ -0,0 +1,42 @@
+#ifndef _RMAX_HOST_H_
+#define _RMAX_HOST_H_
+
+#include <stdint.h>
+
+#include "cgra.h"
+
+// Host-side setup for reduce max len=256 unroll=3 (4 cols)
+// Generated by cgra_kernel_gen.py
+
+#define RMAX_LEN         256
+#define RMAX_N_COLS      4
+#define RMAX_CHUNK       63
+
+// One partial result per column
+static int32_t rmax_partials[RMAX_N_COLS];
+
+/**
+ * Set the column pointers. Column c reduces x[c*CHUNK .. (c+1)*CHUNK-1].
+ */
+static inline void rmax_setup(const cgra_t *cgra, const int32_t *x)
+{
+  for (uint32_t col = 0; col < RMAX_N_COLS; col++) {
+    cgra_set_read_ptr(cgra, (uint32_t) &x[col * RMAX_CHUNK], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &rmax_partials[col], col);
+  }
+}
+
+/**
+ * Combine the column partials and the elements not covered by the columns.
+ */
+static inline int32_t rmax_finalize(const int32_t *x)
+{
+  int32_t acc = rmax_partials[0];
+  for (uint32_t i = 1; i < RMAX_N_COLS + RMAX_LEN - RMAX_N_COLS * RMAX_CHUNK; i++) {
+    int32_t v = i < RMAX_N_COLS ? rmax_partials[i] : x[RMAX_N_COLS * RMAX_CHUNK + i - RMAX_N_COLS];
+    if (v > acc) acc = v;
+  }
+  return acc;
+}
+
+#endif // _RMAX_HOST_H_
@@ -0,0 +1,42 @@
+#ifndef _RMIN_HOST_H_
+#define _RMIN_HOST_H_
+
+#include <stdint.h>
+
+#include "cgra.h"
+
+// Host-side setup for reduce min len=256 unroll=3 (4 cols)
+// Generated by cgra_kernel_gen.py
+
+#define RMIN_LEN         256
+#define RMIN_N_COLS      4
+#define RMIN_CHUNK       63
+
+// One partial result per column
+static int32_t rmin_partials[RMIN_N_COLS];
+
+/**
+ * Set the column pointers. Column c reduces x[c*CHUNK .. (c+1)*CHUNK-1].
+ */
+static inline void rmin_setup(const cgra_t *cgra, const int32_t *x)
+{
+  for (uint32_t col = 0; col < RMIN_N_COLS; col++) {
+    cgra_set_read_ptr(cgra, (uint32_t) &x[col * RMIN_CHUNK], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &rmin_partials[col], col);
+  }
+}
+
+/**
+ * Combine the column partials and the elements not covered by the columns.
+ */
+static inline int32_t rmin_finalize(const int32_t *x)
+{
+  int32_t acc = rmin_partials[0];
+  for (uint32_t i = 1; i < RMIN_N_COLS + RMIN_LEN - RMIN_N_COLS * RMIN_CHUNK; i++) {
+    int32_t v = i < RMIN_N_COLS ? rmin_partials[i] : x[RMIN_N_COLS * RMIN_CHUNK + i - RMIN_N_COLS];
+    if (v < acc) acc = v;
+  }
+  return acc;
+}
+
+#endif // _RMIN_HOST_H_
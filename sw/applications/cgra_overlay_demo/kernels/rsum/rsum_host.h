@@ -0,0 +1,42 @@
+#ifndef _RSUM_HOST_H_
+#define _RSUM_HOST_H_
+
+#include <stdint.h>
+
+#include "cgra.h"
+
+// Host-side setup for reduce sum len=256 unroll=3 (4 cols)
+// Generated by cgra_kernel_gen.py
+
+#define RSUM_LEN         256
+#define RSUM_N_COLS      4
+#define RSUM_CHUNK       63
+
+// One partial result per column
+static int32_t rsum_partials[RSUM_N_COLS];
+
+/**
+ * Set the column pointers. Column c reduces x[c*CHUNK .. (c+1)*CHUNK-1].
+ */
+static inline void rsum_setup(const cgra_t *cgra, const int32_t *x)
+{
+  for (uint32_t col = 0; col < RSUM_N_COLS; col++) {
+    cgra_set_read_ptr(cgra, (uint32_t) &x[col * RSUM_CHUNK], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &rsum_partials[col], col);
+  }
+}
+
+/**
+ * Combine the column partials and the elements not covered by the columns.
+ */
+static inline int32_t rsum_finalize(const int32_t *x)
+{
+  int32_t acc = rsum_partials[0];
+  for (uint32_t i = 1; i < RSUM_N_COLS + RSUM_LEN - RSUM_N_COLS * RSUM_CHUNK; i++) {
+    int32_t v = i < RSUM_N_COLS ? rsum_partials[i] : x[RSUM_N_COLS * RSUM_CHUNK + i - RSUM_N_COLS];
+    acc += v;
+  }
+  return acc;
+}
+
+#endif // _RSUM_HOST_H_
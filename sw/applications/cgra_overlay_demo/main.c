@@ -0,0 +1,154 @@
+/*
+ * CGRA Kernel Overlay Demo - HEEPsilon
+ *
+ * Runs a schedule of four kernels whose context words (152 per bank) do not
+ * fit together in the 128-word CMEM banks. The kernels are packed in a kernel
+ * table (cgra_kernel_table.h) and loaded on demand by the overlay manager of
+ * the CGRA driver, which keeps the most recently used ones resident.
+ *
+ * With the FLASH_LOAD linker script the table stays in the SPI flash and only
+ * the requested kernels are read, otherwise it is copied from memory with the DMA.
+ *
+ * Regenerate the table with (from this directory):
+ *   python3 ../../utils/cgra_kernel_table.py kernels/{fir,rsum,rmax,rmin}/instructions.csv
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "csr.h"
+#include "hart.h"
+#include "core_v_mini_mcu.h"
+#include "heepsilon.h"
+#include "cgra.h"
+#include "cgra_overlay.h"
+#include "dma_sdk.h"
+#ifdef FLASH_LOAD
+#include "x-heep.h"
+#include "w25q128jw.h"
+#endif
+#include "cgra_kernel_table.h"
+#include "fir_host.h"
+#include "rsum_host.h"
+#include "rmax_host.h"
+#include "rmin_host.h"
+
+#define DMA_CHANNEL 0
+
+// Order in which the kernels are requested
+static const uint32_t schedule[] = {
+  CGRA_KT_FIR, CGRA_KT_RSUM, CGRA_KT_RMAX, CGRA_KT_RSUM, CGRA_KT_RMIN,
+  CGRA_KT_FIR, CGRA_KT_RMAX, CGRA_KT_RMIN, CGRA_KT_RSUM, CGRA_KT_FIR,
+};
+#define SCHEDULE_LEN (sizeof(schedule) / sizeof(schedule[0]))
+
+static int32_t x[RSUM_LEN];
+static int32_t fir_x[FIR_LEN];
+static int32_t fir_y[FIR_N_OUT];
+
+static int32_t run_kernel(uint32_t index) {
+  cgra_ptr_cfg_t ptrs;
+  int32_t errors = 0;
+
+  uint32_t kernel_id = cgra_overlay_get(index);
+  if (kernel_id == 0) {
+    printf("ERROR: kernel %lu could not be loaded\n", (unsigned long) index);
+    return 1;
+  }
+
+  ptrs.n_cols = CGRA_N_COLS;
+  for (int c = 0; c < CGRA_N_COLS; c++) {
+    switch (index) {
+      case CGRA_KT_FIR:
+        ptrs.read_ptr[c]  = (uint32_t) &fir_x[c * FIR_CHUNK];
+        ptrs.write_ptr[c] = (uint32_t) &fir_y[c * FIR_CHUNK];
+        break;
+      case CGRA_KT_RSUM:
+        ptrs.read_ptr[c]  = (uint32_t) &x[c * RSUM_CHUNK];
+        ptrs.write_ptr[c] = (uint32_t) &rsum_partials[c];
+        break;
+      case CGRA_KT_RMAX:
+        ptrs.read_ptr[c]  = (uint32_t) &x[c * RMAX_CHUNK];
+        ptrs.write_ptr[c] = (uint32_t) &rmax_partials[c];
+        break;
+      default:
+        ptrs.read_ptr[c]  = (uint32_t) &x[c * RMIN_CHUNK];
+        ptrs.write_ptr[c] = (uint32_t) &rmin_partials[c];
+        break;
+    }
+  }
+  cgra_job_wait(cgra_submit(kernel_id, &ptrs, NULL, NULL));
+
+  // Check against the CPU
+  if (index == CGRA_KT_FIR) {
+    fir_finalize(fir_x, fir_y);
+    for (int i = 0; i < FIR_N_OUT; i++) {
+      int32_t acc = 0;
+      for (int k = 0; k < FIR_TAPS; k++) {
+        acc += fir_taps[k] * fir_x[i + FIR_TAPS - 1 - k];
+      }
+      errors += fir_y[i] != acc;
+      fir_y[i] = 0;
+    }
+  } else {
+    int32_t sum = 0, max = x[0], min = x[0];
+    for (int i = 0; i < RSUM_LEN; i++) {
+      sum += x[i];
+      max = x[i] > max ? x[i] : max;
+      min = x[i] < min ? x[i] : min;
+    }
+    if (index == CGRA_KT_RSUM) {
+      errors += rsum_finalize(x) != sum;
+    } else if (index == CGRA_KT_RMAX) {
+      errors += rmax_finalize(x) != max;
+    } else {
+      errors += rmin_finalize(x) != min;
+    }
+  }
+
+  printf("kernel %lu -> ID %lu: %s\n", (unsigned long) index, (unsigned long) kernel_id, errors ? "FAIL" : "OK");
+  return errors;
+}
+
+int main(void) {
+  int32_t errors = 0;
+
+  printf("=== CGRA kernel overlay ===\n");
+
+  uint32_t seed = 7;
+  for (int i = 0; i < RSUM_LEN; i++) {
+    seed = seed * 1103515245 + 12345;
+    x[i] = (int32_t) ((seed >> 16) & 0xffff) - 32768;
+  }
+  for (int i = 0; i < FIR_LEN; i++) {
+    fir_x[i] = x[i] >> 4;
+  }
+
+  dma_sdk_init();
+
+  cgra_t cgra;
+  cgra.base_addr = mmio_region_from_addr((uintptr_t)CGRA_PERIPH_START_ADDRESS);
+  cgra_queue_init(&cgra);
+
+#ifdef FLASH_LOAD
+  if (w25q128jw_init(spi_flash) != FLASH_OK) {
+    printf("Error initializing SPI flash\n");
+    return EXIT_FAILURE;
+  }
+  cgra_overlay_init(cgra_kernel_table, CGRA_KT_N_KERNELS, cgra_kernel_table_words, true, DMA_CHANNEL);
+#else
+  cgra_overlay_init(cgra_kernel_table, CGRA_KT_N_KERNELS, cgra_kernel_table_words, false, DMA_CHANNEL);
+#endif
+
+  for (uint32_t i = 0; i < SCHEDULE_LEN; i++) {
+    errors += run_kernel(schedule[i]);
+  }
+
+  const cgra_overlay_stats_t *stats = cgra_overlay_get_stats();
+  printf("Overlay: %lu hits, %lu misses, %lu evictions, %lu words loaded\n",
+         (unsigned long) stats->hits, (unsigned long) stats->misses,
+         (unsigned long) stats->evictions, (unsigned long) stats->words_loaded);
+  printf("CGRA overlay test finished with %ld errors\n", (long) errors);
+
+  return errors ? EXIT_FAILURE : EXIT_SUCCESS;
+}
@@ -0,0 +1,84 @@
+#ifndef _CGRA_BITSTREAM_H_
+#define _CGRA_BITSTREAM_H_
+
+#include <stdint.h>
+
+#include "cgra.h"
+
+// Kernel ID (0 is always NULL)
+#define FIR 1
+
+// Kernel configuration (kmem)
+uint32_t cgra_kmem_bitstream[CGRA_KMEM_DEPTH] = {
+  0x0, 0xf00a, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0
+};
+
+// Instruction memory (cmem)
+uint32_t cgra_cmem_bitstream[CGRA_CMEM_TOT_DEPTH] = {
+  0x0, 0xa90004, 0x0, 0x600b0000, 0xa91ff4, 0x760b0000, 0x0, 0x0,
+  0x750b0000, 0x70b00004, 0xc80000, 0x0, 0xa90004, 0x0, 0x600b0000, 0xa91ff4,
+  0x760b0000, 0x0, 0x0, 0x750b0000, 0x70b00004, 0xc80000, 0x0, 0xa90004,
+  0x0, 0x600b0000, 0xa91ff4, 0x760b0000, 0x0, 0x0, 0x750b0000, 0x70b00004,
+  0xc80000, 0x0, 0xa90004, 0x0, 0x600b0000, 0xa91ff4, 0x760b0000, 0x0,
+  0x0, 0x750b0000, 0x70b00004, 0xc80000, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0, 0x0, 0x0, 0x750b0000,
+  0x0, 0x0, 0x0, 0x0, 0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0,
+  0x0, 0x0, 0x750b0000, 0x0, 0x0, 0x0, 0x0, 0xa90004,
+  0x6a1d1ffe, 0x800b0000, 0x0, 0x0, 0x0, 0x750b0000, 0x0, 0x0,
+  0x0, 0x0, 0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0, 0x0, 0x0,
+  0x750b0000, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0xa90004, 0x6a1d0003, 0x800b0000, 0x0, 0x0, 0x750b0000, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0xa90004, 0x6a1d0003, 0x800b0000, 0x0,
+  0x0, 0x750b0000, 0x0, 0x0, 0x0, 0x0, 0x0, 0xa90004,
+  0x6a1d0003, 0x800b0000, 0x0, 0x0, 0x750b0000, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0xa90004, 0x6a1d0003, 0x800b0000, 0x0, 0x0, 0x750b0000,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0xa0f0010, 0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0, 0x0, 0x9a170001, 0x0,
+  0x0, 0x90880001, 0x0, 0x0, 0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0xa90004,
+  0x6a1d1ffe, 0x800b0000, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0xa90004, 0x6a1d1ffe, 0x800b0000, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0,
+  0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0
+};
+
+#endif // _CGRA_BITSTREAM_H_
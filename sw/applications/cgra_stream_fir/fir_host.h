@@ -0,0 +1,44 @@
+#ifndef _FIR_HOST_H_
+#define _FIR_HOST_H_
+
+#include <stdint.h>
+
+#include "cgra.h"
+
+// Host-side setup for fir T=5 len=68 (4 cols)
+// Generated by cgra_kernel_gen.py
+
+#define FIR_LEN         68
+#define FIR_TAPS        5
+#define FIR_N_OUT       64
+#define FIR_N_COLS      4
+#define FIR_CHUNK       16
+
+static const int32_t fir_taps[FIR_TAPS] = { 1, -2, 3, -2, 1 };
+
+/**
+ * Set the column pointers. Column c produces y[c*CHUNK .. (c+1)*CHUNK-1].
+ */
+static inline void fir_setup(const cgra_t *cgra, const int32_t *x, int32_t *y)
+{
+  for (uint32_t col = 0; col < FIR_N_COLS; col++) {
+    cgra_set_read_ptr(cgra, (uint32_t) &x[col * FIR_CHUNK + 0], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &y[col * FIR_CHUNK], col);
+  }
+}
+
+/**
+ * Compute on the CPU the outputs not covered by the columns.
+ */
+static inline void fir_finalize(const int32_t *x, int32_t *y)
+{
+  for (uint32_t i = FIR_N_COLS * FIR_CHUNK; i < FIR_N_OUT; i++) {
+    int32_t acc = 0;
+    for (uint32_t k = 0; k < FIR_TAPS; k++) {
+      acc += fir_taps[k] * x[i + FIR_TAPS - 1 - k];
+    }
+    y[i] = acc;
+  }
+}
+
+#endif // _FIR_HOST_H_
@@ -0,0 +1,134 @@
+/*
+ * CGRA Streaming FIR - HEEPsilon
+ *
+ * Filters a signal larger than the CGRA tile with the double-buffered
+ * streaming layer (cgra_stream.h): the DMA brings the next tile in and sends
+ * the previous one out while the CGRA filters the current one. The same loop
+ * is then run without overlap (copy in, run, copy out) for comparison, and
+ * both outputs are checked against the CPU.
+ *
+ * Regenerate the kernel with:
+ *   python3 sw/utils/cgra_kernel_gen.py fir --taps 1,-2,3,-2,1 --length 68 --cols 4 \
+ *       -o sw/applications/cgra_stream_fir
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "csr.h"
+#include "hart.h"
+#include "core_v_mini_mcu.h"
+#include "heepsilon.h"
+#include "cgra.h"
+#include "cgra_stream.h"
+#include "dma_sdk.h"
+#include "timer_sdk.h"
+#include "cgra_bitstream.h"
+#include "fir_host.h"
+
+#if FIR_N_OUT != FIR_N_COLS * FIR_CHUNK
+  #error The kernel must produce the whole tile (choose LEN so that N_OUT is a multiple of the columns)
+#endif
+
+#define N_TILES     16
+#define SIGNAL_LEN  (N_TILES * FIR_N_OUT + FIR_TAPS - 1)
+#define OUTPUT_LEN  (N_TILES * FIR_N_OUT)
+
+#define DMA_CH_IN   0
+#define DMA_CH_OUT  1
+
+static int32_t signal[SIGNAL_LEN];
+static int32_t output[OUTPUT_LEN];
+static int32_t expected[OUTPUT_LEN];
+
+// Ping-pong buffers
+static int32_t tile_in[2][FIR_LEN];
+static int32_t tile_out[2][FIR_N_OUT];
+
+static int32_t check_output(void) {
+  int32_t errors = 0;
+  for (int i = 0; i < OUTPUT_LEN; i++) {
+    if (output[i] != expected[i]) {
+      if (errors < 8) {
+        printf("ERROR y[%d]: %ld != %ld\n", i, (long) output[i], (long) expected[i]);
+      }
+      errors++;
+    }
+    output[i] = 0;
+  }
+  return errors;
+}
+
+int main(void) {
+  uint32_t cycles_stream, cycles_seq, dma_bound;
+  int32_t errors = 0;
+
+  printf("=== CGRA streaming FIR: %d tiles of %d outputs ===\n", N_TILES, FIR_N_OUT);
+
+  // Input signal and CPU reference
+  uint32_t seed = 1;
+  for (int i = 0; i < SIGNAL_LEN; i++) {
+    seed = seed * 1103515245 + 12345;
+    signal[i] = (int32_t) ((seed >> 16) & 0x7ff) - 1024;
+  }
+  for (int i = 0; i < OUTPUT_LEN; i++) {
+    int32_t acc = 0;
+    for (int k = 0; k < FIR_TAPS; k++) {
+      acc += fir_taps[k] * signal[i + FIR_TAPS - 1 - k];
+    }
+    expected[i] = acc;
+  }
+
+  timer_cycles_init();
+  dma_sdk_init();
+
+  cgra_t cgra;
+  cgra.base_addr = mmio_region_from_addr((uintptr_t)CGRA_PERIPH_START_ADDRESS);
+  cgra_queue_init(&cgra);
+  cgra_cmem_init(cgra_cmem_bitstream, cgra_kmem_bitstream);
+
+  // Describe the tiled loop once: consecutive input tiles overlap by TAPS-1 samples
+  cgra_stream_t s = {
+    .kernel_id = FIR,
+    .n_tiles   = N_TILES,
+    .in_words  = FIR_LEN,
+    .out_words = FIR_N_OUT,
+    .in_buf    = { (uint32_t*) tile_in[0], (uint32_t*) tile_in[1] },
+    .out_buf   = { (uint32_t*) tile_out[0], (uint32_t*) tile_out[1] },
+    .n_cols    = FIR_N_COLS,
+    .in  = { .kind = CGRA_STREAM_MEM, .addr = (uint32_t) signal, .stride = FIR_N_OUT * sizeof(int32_t), .channel = DMA_CH_IN },
+    .out = { .kind = CGRA_STREAM_MEM, .addr = (uint32_t) output, .stride = FIR_N_OUT * sizeof(int32_t), .channel = DMA_CH_OUT },
+  };
+  for (int c = 0; c < FIR_N_COLS; c++) {
+    s.in_offset[c]  = c * FIR_CHUNK * sizeof(int32_t);
+    s.out_offset[c] = c * FIR_CHUNK * sizeof(int32_t);
+  }
+
+  timer_start();
+  dma_bound = cgra_stream_run(&s);
+  cycles_stream = timer_stop();
+  errors += check_output();
+
+  // Same loop without overlap
+  timer_start();
+  for (int t = 0; t < N_TILES; t++) {
+    dma_copy((uint32_t) tile_in[0], (uint32_t) &signal[t * FIR_N_OUT], FIR_LEN,
+             DMA_CH_IN, DMA_DATA_TYPE_WORD, DMA_DATA_TYPE_WORD, 0);
+    cgra_ptr_cfg_t ptrs = { .n_cols = FIR_N_COLS };
+    for (int c = 0; c < FIR_N_COLS; c++) {
+      ptrs.read_ptr[c]  = (uint32_t) &tile_in[0][c * FIR_CHUNK];
+      ptrs.write_ptr[c] = (uint32_t) &tile_out[0][c * FIR_CHUNK];
+    }
+    cgra_job_wait(cgra_submit(FIR, &ptrs, NULL, NULL));
+    dma_copy((uint32_t) &output[t * FIR_N_OUT], (uint32_t) tile_out[0], FIR_N_OUT,
+             DMA_CH_OUT, DMA_DATA_TYPE_WORD, DMA_DATA_TYPE_WORD, 0);
+  }
+  cycles_seq = timer_stop();
+  errors += check_output();
+
+  printf("Streamed: %lu cycles (%lu DMA-bound tiles)\n", (unsigned long) cycles_stream, (unsigned long) dma_bound);
+  printf("Sequential: %lu cycles\n", (unsigned long) cycles_seq);
+  printf("CGRA streaming test finished with %ld errors\n", (long) errors);
+
+  return errors ? EXIT_FAILURE : EXIT_SUCCESS;
+}
@@ -16,11 +16,17 @@ int main(void) {
   printf("SOC_CTRL frequency: %u Hz\n", (unsigned int)freq_hz);
   printf("REFERENCE_CLOCK_Hz: %u Hz\n", (unsigned int)REFERENCE_CLOCK_Hz);
 
-  if (freq_hz != (uint32_t)REFERENCE_CLOCK_Hz) {
-    printf("FREQ_MISMATCH\n");
+  // The register keeps its reset value when neither the testbench nor crt0 set it
+  if (freq_hz <= 1) {
+    printf("FREQ_UNSET\n");
     return EXIT_FAILURE;
   }
 
+  // A different value comes from the testbench (+cpu_clk_period_ps, make ... FREQ=<Hz>)
+  if (freq_hz != (uint32_t)REFERENCE_CLOCK_Hz) {
+    printf("Frequency set at run time\n");
+  }
+
   printf("FREQ_OK\n");
   return EXIT_SUCCESS;
 }
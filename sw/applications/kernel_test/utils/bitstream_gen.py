@@ -6,10 +6,14 @@
     Description: Encode instructions for the CGRA from usi pseudo asm
 '''
 
-# import sys
+import sys
 import copy
+import numpy as np
 # from pickle import ADDITEMS
 
+from inst_encoder import muxA_list, muxB_list, rcs_nop_instr, get_bin, \
+                         CGRA_IMEM_NL_LOG2, RCS_NUM_CREG_LOG2
+
 # WALL = True        #Set to 'True' to get all warnings at run time
 
 # # Change to the file name you want to compile
@@ -19,7 +23,8 @@ SIZE_DEC_INSTR  = 5
 SIZE_EPFL_ASM   = 6
 
 type_1_instr        = ['SADD','SSUB','SMUL','FXPMUL','SLT','SRT','SRA',
-                        'LAND','LOR','LXOR','LNAND','LNOR','LXNOR']
+                        'LAND','LOR','LXOR','LNAND','LNOR','LXNOR',
+                        'MAC','SADD2','SADD4','SMUL2','SMUL4']
 type_2_instr        = ['BSFA', 'BZFA']
 type_3_instr        = ['BEQ','BNE','BLT','BGE']
 type_5_instr        = ['LWD','SWD']
@@ -28,6 +33,8 @@ type_6_instr        = ['LWI','SWI']
 muxA_list_ext = np.concatenate((muxA_list , ["ROUT"]),axis=0)
 muxB_list_ext = np.concatenate((muxB_list , ["ROUT"]),axis=0)
 
+intr_log = False    # Set to 'True' to print each translated instruction
+
 def print_w(string) :
     '''
         Print only if WALL == True
@@ -59,31 +66,6 @@ def string_instr(instr) :
     string = '['+instr[0]+' '+instr[1]+' '+instr[2]+' '+instr[3]+']'
     return string
 
-def time_lines (lines) :
-    '''
-        Reorganize the instructions in a timed order for each PE
-
-        Parameter
-        -----------------------------
-        list of the lines(string) of bit_count_pseudo_assembly
-
-        Return
-        -----------------------------
-        list of list of string
-    '''
-    cnt = 0
-    timed_lines = [[] for _ in range (PE_NBR)]
-    for line in lines :
-        if line == "\n" :
-            cnt = 0
-        else :
-            if (line[-1] == '\n') :
-                timed_lines[cnt].append(line[:-1])
-            else :
-                timed_lines[cnt].append(line[:])
-            cnt += 1
-    return timed_lines
-
 def decode_instruction(instruction) :
     '''
         Separate operation and operators of instruction
@@ -96,51 +78,12 @@ def decode_instruction(instruction) :
         -----------------------------
         separated instruction (list of strings)
     '''
-    instr = ['' for _ in range(SIZE_DEC_INSTR)]
-    case_list = ['Operation','OP1','OP2','OP3','OP4','END']
-    case = case_list[0]
-    once = False
-    for char in instruction :
-        if case == 'Operation' :
-            if char != ' ' :
-                instr[0] += char
-            else :
-                case = case_list[1]
-        elif case == 'OP1' :
-            if (char == ' ') or (char == ',') :
-                    case = case_list[2]
-                    once = True
-            else :
-                instr[1] += char
-        elif case == 'OP2' :
-            if (char == ' ') or (char == ',') :
-                if not once :
-                    case = case_list[3]
-                    once = True
-                else :
-                    once = False
-            else :
-                instr[2] += char
-        elif case == 'OP3' :
-            if (char == ' ') or (char == ',') :
-                if not once :
-                    case = case_list[4]
-                    once = True
-                else :
-                    once = False
-            else :
-                instr[3] += char
-        elif case == 'OP4' :
-            if (char == ' ') or (char == ',') :
-                if not once :
-                    case = case_list[5]
-                    once = True
-                else :
-                    once = False
-            else :
-                instr[4] += char
-        elif case == 'END' :
-            return instr
+    # Operation, then the operands separated by commas and/or spaces
+    op, _, operands = instruction.partition(' ')
+    instr = [op] + operands.replace(',', ' ').split()
+    if len(instr) > SIZE_DEC_INSTR :
+        sys.exit("Too many operands : " + instruction)
+    instr += ['' for _ in range(SIZE_DEC_INSTR - len(instr))]
     if (instr[0] == 'MV') :
         instr[0] = 'SADD'
         instr[1],instr[2] = instr[2],instr[1]
@@ -267,6 +210,10 @@ def translate_instructions(instr_usi) :
             instr_epfl[1] = 'IMM'
     elif op == 'EXIT' :
         instr_epfl = ['-','-','EXIT','-','-','-']
+    elif op == 'LOOP' :
+        if instr_usi[1] not in muxA_list_ext :
+            sys.exit("The loop count must come from a register or a neighbour : " + string_instr(instr_usi))
+        instr_epfl = [instr_usi[1],'-','LOOP','-','-',instr_usi[2]]
     else :
         sys.exit("Line doesn't correspond to any known instruction : " + string_instr(instr_usi))
 
@@ -288,19 +235,20 @@ def translate_instructions(instr_usi) :
 
     return instr_epfl
 
-def translate_usi_asm(sched) :
+def translate_usi_asm(sched, pe_nbr) :
     '''
         Translate usi pseudo-assembly to epfl cgra assembly
 
         Parameter
         -----------------------------
         schedule of the execution (list of list of string) in usi pseudo-assembly
+        number of PEs of the CGRA
 
         Return
         -----------------------------
         schedule of the execution (list of list of string) in epfl cgra assembly
     '''
-    new_sched = [[['' for _ in range(SIZE_EPFL_ASM)] for _ in range(len(sched[0]))] for _ in range(PE_NBR)]
+    new_sched = [[['' for _ in range(SIZE_EPFL_ASM)] for _ in range(len(sched[0]))] for _ in range(pe_nbr)]
     i = 0
     j = 0
     for pe in sched :
@@ -316,13 +264,14 @@ def translate_usi_asm(sched) :
 
     return new_sched
 
-def transpose_grid(usi_trans, n_col) :
+def transpose_grid(usi_trans, n_col, n_row) :
     '''
         Transpose the PE grid because epfl doesn't use the same convention as usi
 
         Parameter
         -----------------------------
         Translated usi pseudo-assembly in epfl format (list of list of string)
+        number of columns and rows of the CGRA
 
         Return
         -----------------------------
@@ -330,19 +279,20 @@ def transpose_grid(usi_trans, n_col) :
     '''
     epfl_asm = copy.copy(usi_trans)
 
-    for i in range(CGRA_N_ROW):
+    for i in range(n_row):
         for j in range(n_col):
-            epfl_asm[j*CGRA_N_COL+i] = usi_trans[i*n_col+j]
+            epfl_asm[j*n_col+i] = usi_trans[i*n_col+j]
 
     return epfl_asm
 
-def set_ker_conf_word(code,n_col) :
+def set_ker_conf_word(code,n_col,kernel_start,cgra_n_col) :
     '''
         Set the kernel configuration word
 
         Parameter
         -----------------------------
         the translated and reformated cgra asm instruction (list of list of string)
+        columns used, kernel start address, number of columns of the CGRA
 
         Return
         -----------------------------
@@ -350,14 +300,14 @@ def set_ker_conf_word(code,n_col) :
     '''
     nbr_col = n_col # Columns used
     ker_num_instr = len(code[0]) # Number of instruction in the kernel
-    ker_conf_w = get_bin(int(pow(2,nbr_col))-1,CGRA_N_COL) +\
+    ker_conf_w = get_bin(int(pow(2,nbr_col))-1,cgra_n_col) +\
                                 get_bin(kernel_start, CGRA_IMEM_NL_LOG2) +\
                                 get_bin(ker_num_instr-1, RCS_NUM_CREG_LOG2)
     # Used for multi-column kernels
 #    k = ker_num_instr
     return ker_conf_w,nbr_col
 
-def create_rcs_instructions(start_add,rcs_instructions,epfl_ASM,nbr_instr,col_nbr) :
+def create_rcs_instructions(start_add,rcs_instructions,epfl_ASM,nbr_instr,col_nbr,n_col,n_row) :
     '''
         Convert epfl_asm to rcs_instruction format
 
@@ -370,23 +320,24 @@ def create_rcs_instructions(start_add,rcs_instructions,epfl_ASM,nbr_instr,col_nb
         rcs_instructions (list of list of list of string)
     '''   #zegmanek
     for l in range(col_nbr) :
-        for j in range (CGRA_N_ROW) :
+        for j in range (n_row) :
             for i in range(nbr_instr) :
-                rcs_instructions[j][start_add+nbr_instr*l+i] = epfl_ASM[j+CGRA_N_ROW*l][i]
+                rcs_instructions[j][start_add+nbr_instr*l+i] = epfl_ASM[j+n_row*l][i]
                 # print(rcs_instructions[j][start_add+nbr_instr*l+i])
-    for l in range(col_nbr,CGRA_N_COL) :
-        for j in range (CGRA_N_ROW) :
+    for l in range(col_nbr,n_col) :
+        for j in range (n_row) :
             for i in range(nbr_instr) :
                 rcs_instructions[j][start_add+nbr_instr*l+i] = rcs_nop_instr
     return rcs_instructions
 
-def used_col(usi_ASM) :
+def used_col(usi_ASM, n_col, n_row) :
     '''
         Check if the format is all the PEs at a time (fomat_line) or only the collumns used (format_col)
 
         Parameter
         -----------------------------
         usi_ASM (list of string)
+        number of columns and rows of the CGRA
 
         Return
         -----------------------------
@@ -400,37 +351,35 @@ def used_col(usi_ASM) :
             break
     if cnt == 0 :
         sys.exit("ERROR : No instruction")
-    for i in range(1,CGRA_N_COL+1) :
-        if cnt == i*CGRA_N_ROW :
+    for i in range(1,n_col+1) :
+        if cnt == i*n_row :
             return i
     sys.exit("ERROR : Column half-defined")
 
-'''--------------------------------
-CODE
---------------------------------'''
-# USI will tell us the number of coulmns used
-with open(OUT_SAT_PATH,"r") as f:                                                          # Open the pseudo-assembly file
-    usi_ASM = f.readlines()                                                          # Store each line
-# cgra_n_col = used_col(usi_ASM)                                                              # Return the number of column
-
-# Start from the USI ompiler output and extract only the pseudo-assembly (between "T = 0\n"s)
-usi_ASM = usi_ASM[ usi_ASM.index("T = 0\n")+1 : ]
-usi_ASM = usi_ASM[ : usi_ASM.index("T = 0\n") ]
-# Replace all time stamps for empty lines
-usi_ASM = [ "\n" if "T = " in s else s for s in usi_ASM ]
-# Add the exit instruction at the end
-usi_ASM.append("\n")
-usi_ASM.append("EXIT\n")
-# Fill the rest of the instruction with NOPs
-[ usi_ASM.append("NOP\n") for _ in range(usi_ASM.index("\n")-1)]
-
-cgra_n_col = CGRA_N_COL
-usi_ASM_timed = time_lines(usi_ASM)                                                         # Convert theformat for it being time wise for each PE(RC)
-usi_translated = translate_usi_asm(usi_ASM_timed)                                           # Convert to epfl_asm format
-epfl_ASM = transpose_grid(usi_translated, cgra_n_col) # if cgra_n_col == 4 else usi_translated            # Transpose the confiuration of the PEs if format_line else under 16 PEs we have a format_col
-start_add = kernel_start                                                                   # Save current start address
-k = len(epfl_ASM[0])                                                                        # Used for multi-column kernels
-ker_conf_words[KERNEL_ID],nbr_col = set_ker_conf_word(epfl_ASM,cgra_n_col)                # Set the configuartion word of the kernel
-kernel_start = kernel_start + k*nbr_col                                                   # Update start address for next kernel
-KERNEL_ID += 1                                                                            # Update ID for next kernel
-rcs_instructions = create_rcs_instructions(start_add,rcs_instructions,epfl_ASM,k,nbr_col)   # Convert it to rcs_instruction to be read by inst_encoder.py
+def compile_kernel(sat, n_col, n_row, ker_conf_words, rcs_instructions, kernel_id, kernel_start) :
+    '''
+        Place a kernel in the configuration words and instruction memories
+
+        Parameter
+        -----------------------------
+        parsed out.sat (out_sat.OutSat)
+        number of columns and rows of the CGRA
+        ker_conf_words (list of string), updated at kernel_id
+        rcs_instructions (list of list of list of string), updated from kernel_start
+
+        Return
+        -----------------------------
+        kernel start address for the next kernel
+    '''
+    cgra_n_col = n_col
+    # Instructions of each PE in time order, followed by the EXIT line
+    usi_ASM_timed = [[block[pe] for block in sat.asm] for pe in range(n_col*n_row)]
+    for pe in range(n_col*n_row) :
+        usi_ASM_timed[pe].append("EXIT" if pe == 0 else "NOP")
+    usi_translated = translate_usi_asm(usi_ASM_timed, n_col*n_row)                              # Convert to epfl_asm format
+    epfl_ASM = transpose_grid(usi_translated, cgra_n_col, n_row) # if cgra_n_col == 4 else usi_translated            # Transpose the confiuration of the PEs if format_line else under 16 PEs we have a format_col
+    start_add = kernel_start                                                                   # Save current start address
+    k = len(epfl_ASM[0])                                                                        # Used for multi-column kernels
+    ker_conf_words[kernel_id],nbr_col = set_ker_conf_word(epfl_ASM,cgra_n_col,kernel_start,n_col)  # Set the configuartion word of the kernel
+    create_rcs_instructions(start_add,rcs_instructions,epfl_ASM,k,nbr_col,n_col,n_row)          # Convert it to rcs_instruction to be read by inst_encoder.py
+    return kernel_start + k*nbr_col                                                            # Start address for next kernel
@@ -13,6 +13,7 @@ import numpy as np
 import log2file as logfunc
 from math import *
 import json
+import out_sat
 
 ######################################################################
 
@@ -143,7 +144,10 @@ ALU_op_list   = ['NOP',
                  'BSFA', 'BZFA',
                  'BEQ', 'BNE', 'BLT', 'BGE', 'JUMP',
                  'LWD', 'SWD', 'LWI', 'SWI',
-                 'EXIT']
+                 'EXIT',
+                 'MAC',
+                 'SADD2', 'SADD4', 'SMUL2', 'SMUL4',
+                 'LOOP']
 
 # BSFA --> operand a if sign flag, else operand b
 
@@ -167,121 +171,164 @@ rcs_nop_instr = ['ZERO', 'ZERO', 'NOP', '-', 'SELF', '0']
 
 #####################################################################################
 
-if len(sys.argv) != 3 :
-    sys.exit("[ERROR] Incomplete data. Please provide a kernel path (<<..../kernel_name>>) and CGRA dimension (<<CxR>>).")
-
-# Get the path to the kernel from the input of the command
-KER_PATH = sys.argv[1] # e.g. "../kernels/this_kernel/" 
-if KER_PATH[-1] == "/":
-    # Extract the kernel name
-    KER_NAME = KER_PATH[ KER_PATH.rfind("/") +1 :-1 ] # e.g. "this_kernel"
-else:
-    KER_NAME = KER_PATH[ KER_PATH.rfind("/") +1 :] # e.g. "this_kernel"
-    KER_PATH = KER_PATH + "/"    
-
-# Get the desired dimension
-DIMENSION = sys.argv[2] # e.g. "3x3"
-
-# Get the dimension-dependant data folder
-DATA_DIR = KER_PATH + "/" + DIMENSION + "/"
-
-# Obtain the number of columns and row independently
-CGRA_N_COL, CGRA_N_ROW = [int(s) for s in DIMENSION if s.isdigit() ]
-
-# The file where the bitstreams will be stored 
-BITSTREAMS_PATH = DATA_DIR + 'bitstreams'
-OUT_SAT_PATH    = DATA_DIR + 'out.sat'
-
-# Obtain the numnber of Processing Elements
-PE_NBR = CGRA_N_ROW*CGRA_N_COL
-
-# Kernel configuration word width
-CGRA_KMEM_WIDTH = CGRA_N_COL + CGRA_IMEM_NL_LOG2 + RCS_NUM_CREG_LOG2
-
+def parse_kernel_path(ker_path, dimension):
+    """
+    Get the kernel name and its dimension-dependant data folder.
 
-KERNEL_ID       = 1
-kernel_start    = 0
+    Parameters
+    ----------
+    ker_path  : str; path to the kernel, e.g. "../kernels/this_kernel/"
+    dimension : str; CGRA dimension, e.g. "3x3"
 
-ker_null_conf       = get_bin(0, CGRA_KMEM_WIDTH)
-ker_conf_words      = [ker_null_conf for _ in range(CGRA_KMEM_N_KER)]
-rcs_instructions    = [[rcs_nop_instr for _ in range(CGRA_IMEM_N_LINE)] for _ in range (CGRA_N_ROW)]
+    Returns
+    -------
+    (str, str, int, int); kernel name, data folder, number of columns and rows
+    """
+    ker_path = ker_path.rstrip("/") + "/"
+    ker_name = os.path.basename(ker_path[:-1]) # e.g. "this_kernel"
+    n_col, n_row = [int(s) for s in dimension.split("x")]
+    return ker_name, ker_path + dimension + "/", n_col, n_row
 
-# First entry is always null
-ker_conf_words[0] = ker_null_conf
+def encode_out_sat(sat, n_col, n_row):
+    """
+    Compile a SAT-MapIt output into the kernel configuration words and the
+    instructions of each row.
 
-intr_log = False
-set_path = False
+    Parameters
+    ----------
+    sat   : out_sat.OutSat; parsed out.sat
+    n_col : int
+    n_row : int
 
+    Returns
+    -------
+    (list of str, list of list of list of str, int); configuration words,
+    instructions and number of used instruction lines
+    """
+    # bitstream_gen uses the encoding tables of this module
+    import bitstream_gen
 
-exec(open("bitstream_gen.py").read())
+    # Kernel configuration word width
+    kmem_width = n_col + CGRA_IMEM_NL_LOG2 + RCS_NUM_CREG_LOG2
 
+    ker_null_conf       = get_bin(0, kmem_width)
+    ker_conf_words      = [ker_null_conf for _ in range(CGRA_KMEM_N_KER)]
+    rcs_instructions    = [[rcs_nop_instr for _ in range(CGRA_IMEM_N_LINE)] for _ in range (n_row)]
 
-# PRINT STATS
-print("\n\n-------------------------------------")
-print("CGRA conf. word width  :", CGRA_KMEM_WIDTH)
-print("CGRA instruction width :", CGRA_IMEM_WIDTH)
-# Check instruction memory is large enough
-print("INFO: {}/{} CGRA INSTRUCTIONS".format(kernel_start, CGRA_IMEM_N_LINE));
-print("-------------------------------------")
+    # First entry is always null, the kernel gets ID 1
+    kernel_start = bitstream_gen.compile_kernel(sat, n_col, n_row, ker_conf_words, rcs_instructions, 1, 0)
+    return ker_conf_words, rcs_instructions, kernel_start
 
-bitstreams_str = "kmem: "
-for i in range(0,CGRA_KMEM_N_KER):
-    bitstreams_str += hex(int(ker_conf_words[i],2)) + ", "
-bitstreams_str += "\nimem: "
+def encode_instruction(instruction):
+    """
+    Encode one instruction.
 
+    Parameters
+    ----------
+    instruction : list of str; [muxA, muxB, op, reg dest, muxF, imm]
 
-instr_count = 0
-for i in range(0,CGRA_N_ROW):
-    for instruction in rcs_instructions[i]:
+    Returns
+    -------
+    str; binary representation of the instruction
+    """
+    instr_bits = ""
+
+    for idx in range(len(instruction)):
+        cmd = instruction[idx]
+
+        # Don't care is replaced by default value
+        if cmd == '-':
+            cmd = rcs_nop_instr[idx]
+
+        # Don't care for register destination also need a 0 bit to disable write to register
+        if idx == 3:
+            # Default command
+            cmd_tmp = ['R0', '0']
+            # If we write to a register put a 1 for write enable
+            if cmd != '-':
+                cmd_tmp[0] = cmd
+                cmd_tmp[1] = '1'
+            cmd = cmd_tmp
+
+        if idx == 0:
+            instr_bits = instr_bits + get_bin(return_indices_of_a(muxA_list, cmd, 'muxA_list'), RCS_MUXA_BITS)
+        elif idx == 1:
+            instr_bits = instr_bits + get_bin(return_indices_of_a(muxB_list, cmd, 'muxB_list'), RCS_MUXB_BITS)
+        elif idx == 2:
+            instr_bits = instr_bits + get_bin(return_indices_of_a(ALU_op_list, cmd, 'ALU_op_list'), RCS_ALU_OP_BITS)
+        elif idx == 3:
+            instr_bits = instr_bits + get_bin(return_indices_of_a(reg_dest_list, cmd[0], 'reg_dest_list'), RCS_RF_WADD_BITS)
+            instr_bits = instr_bits + get_bin(return_indices_of_a(reg_we_list, cmd[1], 'reg_we_list'), RCS_RF_WE_BITS)
+        elif idx == 4:
+            instr_bits = instr_bits + get_bin(return_indices_of_a(muxF_list, cmd, 'muxF_list'), RCS_MUXFLAG_BITS)
+        elif idx == 5:
+            instr_bits = instr_bits + int2bin(int(cmd), RCS_IMM_BITS)
+        else:
+            print("ERROR: index overflow in instruction word")
+
+    return instr_bits
+
+def bitstreams_string(ker_conf_words, rcs_instructions):
+    """
+    Get the content of the bitstreams file: one "kmem:" and one "imem:" line.
+    """
+    bitstreams_str = "kmem: "
+    for i in range(0,CGRA_KMEM_N_KER):
+        bitstreams_str += hex(int(ker_conf_words[i],2)) + ", "
+    bitstreams_str += "\nimem: "
 
-        instr_bits = ""
+    for row in rcs_instructions:
+        for instruction in row:
+            bitstreams_str += (hex(int(encode_instruction(instruction),2))) + ", "
 
-        for idx in range(len(instruction)):
-            cmd = instruction[idx]
+    return bitstreams_str
 
-            # Don't care is replaced by default value
-            if cmd == '-':
-                cmd = rcs_nop_instr[idx]
+def encode_kernel(ker_path, dimension, verbose=False, sat=None):
+    """
+    Write the bitstreams file of a kernel from its out.sat.
 
-            # Don't care for register destination also need a 0 bit to disable write to register
-            if idx == 3:
-                # Default command
-                cmd_tmp = ['R0', '0']
-                # If we write to a register put a 1 for write enable
-                if cmd != '-':
-                    cmd_tmp[0] = cmd
-                    cmd_tmp[1] = '1'
-                cmd = cmd_tmp
+    Parameters
+    ----------
+    ker_path  : str; path to the kernel
+    dimension : str; CGRA dimension (CxR)
+    verbose   : bool; print the widths and the instruction count
+    sat       : out_sat.OutSat; parsed out.sat (default: read from the
+                dimension-dependant folder)
 
-            if idx == 0:
-                instr_bits = instr_bits + get_bin(return_indices_of_a(muxA_list, cmd, 'muxA_list'), RCS_MUXA_BITS)
-            elif idx == 1:
-                instr_bits = instr_bits + get_bin(return_indices_of_a(muxB_list, cmd, 'muxB_list'), RCS_MUXB_BITS)
-            elif idx == 2:
-                instr_bits = instr_bits + get_bin(return_indices_of_a(ALU_op_list, cmd, 'ALU_op_list'), RCS_ALU_OP_BITS)
-            elif idx == 3:
-                instr_bits = instr_bits + get_bin(return_indices_of_a(reg_dest_list, cmd[0], 'reg_dest_list'), RCS_RF_WADD_BITS)
-                instr_bits = instr_bits + get_bin(return_indices_of_a(reg_we_list, cmd[1], 'reg_we_list'), RCS_RF_WE_BITS)
-            elif idx == 4:
-                instr_bits = instr_bits + get_bin(return_indices_of_a(muxF_list, cmd, 'muxF_list'), RCS_MUXFLAG_BITS)
-            elif idx == 5:
-                instr_bits = instr_bits + int2bin(int(cmd), RCS_IMM_BITS)
-            else:
-                print("ERROR: index overflow in instruction word")
+    Returns
+    -------
+    str; path of the bitstreams file
+    """
+    _, data_dir, n_col, n_row = parse_kernel_path(ker_path, dimension)
 
-        bitstreams_str += (hex(int(instr_bits,2))) + ", "
+    if sat is None:
+        sat = out_sat.read(data_dir + 'out.sat')
 
+    ker_conf_words, rcs_instructions, kernel_start = encode_out_sat(sat, n_col, n_row)
 
-        instr_count += 1
+    if verbose:
+        # PRINT STATS
+        print("\n\n-------------------------------------")
+        print("CGRA conf. word width  :", n_col + CGRA_IMEM_NL_LOG2 + RCS_NUM_CREG_LOG2)
+        print("CGRA instruction width :", CGRA_IMEM_WIDTH)
+        # Check instruction memory is large enough
+        print("INFO: {}/{} CGRA INSTRUCTIONS".format(kernel_start, CGRA_IMEM_N_LINE));
+        print("-------------------------------------")
 
-with open(BITSTREAMS_PATH, 'w') as f:
-    f.write(bitstreams_str)
+    bitstreams_path = data_dir + 'bitstreams'
+    with open(bitstreams_path, 'w') as f:
+        f.write(bitstreams_string(ker_conf_words, rcs_instructions))
+    return bitstreams_path
 
 
+if __name__ == '__main__':
+    if len(sys.argv) != 3 :
+        sys.exit("[ERROR] Incomplete data. Please provide a kernel path (<<..../kernel_name>>) and CGRA dimension (<<CxR>>).")
 
-# exec(open("io_gen.py").read())
+    # e.g. inst_encoder.py ../kernels/this_kernel/ 3x3
+    encode_kernel(sys.argv[1], sys.argv[2], verbose=True)
 
-# exec(open("heeptest_gen.py").read())
+    # Use kernel_gen_all.py to also generate io.json and the kernel sources
 
 
 #####################################################################################
@@ -6,75 +6,90 @@
     Description: generates a io.json file from the inouts description and a SAT-MapIt output file.
 '''
 
+import sys
+import json
+
+import out_sat
+from inst_encoder import parse_kernel_path
+
 POSITION_NODE   = 0
 POSITION_DIR    = 1
 POSITION_NAME   = 2
 POSITION_DEPTH  = 3
 POSITION_TYPE   = 4
 
-with open( KER_PATH + "inouts", 'r') as f:
-    inouts = f.readlines()
-inouts = [l.replace('\n','').split() for l in inouts]
-
-# USI will tell us the number of coulmns used
-with open(OUT_SAT_PATH,"r") as f:                                                         
-    usi_ASM = f.readlines()                                                          
-
-# Start from the USI compiler output and extract only the pseudo-assembly 
-usi_ASM = usi_ASM[ usi_ASM.index("Output of the mapping with node id\n")+1 : ]
-#usi_ASM = usi_ASM[ : usi_ASM.index("\nId:") ]
-
-timestamps = []
-beg = 0
-end = 0
-
-startline   = usi_ASM[ 1 ]
-endline     = usi_ASM[ 1 + 2*CGRA_N_ROW] 
- 
-while 1: 
-    try: 
-        beg = end + usi_ASM[end:].index(startline)
-        end = beg + 1 + usi_ASM[beg+1:].index(endline)
-        timestamps.append(usi_ASM[beg+1:end])
-    except:
-        break
-
-tss = []
-for time in timestamps:
-    ts = []
-    for line in time:
-        t = [int(s) for s in line.split() if s.lstrip("-").isdigit() ]
-        if t:
-            ts.append(t)
-    tss.append(ts)
-
-iodict = {}
-iodict["function_name"] = KER_NAME
-
-values= [ int(v[0]) for v in inouts ]
-
-iodict["inputs"]    = []
-iodict["outputs"]   = []
-
-for line in inouts:
-    dst = "inputs" if "in" in line else "outputs"
-    type = line[POSITION_TYPE]
-    type = "uint32_t" if type == "var" else type
-    iodict[dst].append( {"name": line[POSITION_NAME], "depth": int(line[POSITION_DEPTH]), "type":type} )
-
-for col in range(len(tss[0])):
-    iodict["read_col" + str(col) ]   = []  
-    iodict["write_col" + str(col) ]  = []
-
-for ts in tss:
-    for row in ts: 
-        for col in range(len(row)):
-            if row[col] in values:
-                dst = "read_col" if inouts[ values.index(row[col]) ][1] == "in" else "write_col"
-                iodict[dst + str(col) ].append( {"name" : inouts[values.index(row[col])][2] } )
-
-
-iojson = json.dumps(iodict, indent=4)
-with open( DATA_DIR + "io.json", 'w' ) as f:
-    f.write(iojson)
-
+def read_inouts(ker_path):
+    """
+    Read the inouts description of a kernel: one line per variable with its
+    node, direction (in/out), name, depth and type.
+    """
+    with open( ker_path.rstrip("/") + "/inouts", 'r') as f:
+        inouts = f.readlines()
+    return [l.replace('\n','').split() for l in inouts]
+
+def gen_io(ker_path, dimension, sat=None):
+    """
+    Build the io.json description of a kernel for a CGRA dimension (CxR).
+
+    Parameters
+    ----------
+    ker_path  : str
+    dimension : str
+    sat       : out_sat.OutSat; parsed out.sat (default: read from the
+                dimension-dependant folder)
+
+    Returns
+    -------
+    dict
+    """
+    ker_name, data_dir, n_col, _ = parse_kernel_path(ker_path, dimension)
+    inouts = read_inouts(ker_path)
+    if sat is None:
+        sat = out_sat.read(data_dir + "out.sat")
+
+    iodict = {}
+    iodict["function_name"] = ker_name
+
+    # Node id -> inouts line (the first one if a node is listed twice)
+    io_nodes = {}
+    for v in inouts:
+        io_nodes.setdefault(int(v[POSITION_NODE]), v)
+
+    iodict["inputs"]    = []
+    iodict["outputs"]   = []
+
+    for line in inouts:
+        dst = "inputs" if "in" in line else "outputs"
+        type = line[POSITION_TYPE]
+        type = "uint32_t" if type == "var" else type
+        iodict[dst].append( {"name": line[POSITION_NAME], "depth": int(line[POSITION_DEPTH]), "type":type} )
+
+    io_cols = sat.io_cols(io_nodes)
+    for col in range(n_col):
+        iodict["read_col" + str(col) ]   = []  
+        iodict["write_col" + str(col) ]  = []
+        for node in io_cols.get(col, []):
+            dst = "read_col" if io_nodes[node][POSITION_DIR] == "in" else "write_col"
+            iodict[dst + str(col) ].append( {"name" : io_nodes[node][POSITION_NAME] } )
+    return iodict
+
+def write_io(ker_path, dimension, sat=None):
+    """
+    Write the io.json file of a kernel in its dimension-dependant folder.
+
+    Returns
+    -------
+    str; path of the io.json file
+    """
+    _, data_dir, _, _ = parse_kernel_path(ker_path, dimension)
+    iojson = json.dumps(gen_io(ker_path, dimension, sat), indent=4)
+    with open( data_dir + "io.json", 'w' ) as f:
+        f.write(iojson)
+    return data_dir + "io.json"
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 :
+        sys.exit("[ERROR] Incomplete data. Please provide a kernel path (<<..../kernel_name>>) and CGRA dimension (<<CxR>>).")
+
+    write_io(sys.argv[1], sys.argv[2])
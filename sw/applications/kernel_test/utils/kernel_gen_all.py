@@ -0,0 +1,273 @@
+'''
+    File name: kernel_gen_all.py
+    Python Version: Python 3.8
+    Description: generate the bitstreams, io.json and source files of every
+                 kernel and CGRA dimension of the kernels directory.
+'''
+
+'''``````````````````````````````````````````````````````````````````````````
+Every <kernels>/<kernel_name>/<CxR>/ folder is processed in a pool of
+processes. For each of them, the steps of inst_encoder.py, io_gen.py and
+heeptest_gen.py are run in order:
+
+    bitstreams  - from out.sat
+    io          - io.json, from out.sat and the inouts of the kernel
+    sources     - kernel.c/h, from bitstreams and io.json
+
+The io step only runs when requested with --steps io: the committed io.json
+files are curated by hand, and an existing one is only overwritten with
+--force.
+
+A step is skipped when one of its inputs is missing (e.g. a folder without
+out.sat keeps its bitstreams and io.json) or when its outputs are up to date.
+The generator scripts and templates are inputs of every step, so changing the
+encoder regenerates the whole matrix. Up to date means:
+
+    mtime   - the outputs are newer than the inputs (default)
+    hash    - the inputs have the same SHA-256 as for the last generation,
+              stored in <CxR>/.gen_hash
+
+When run from the directory containing this script:
+    python kernel_gen_all.py                        # bitstreams and sources
+    python kernel_gen_all.py -s io -k new_kernel    # io.json of a new kernel
+    python kernel_gen_all.py -k sha sqrt -d 3x3     # some kernels/dimensions
+    python kernel_gen_all.py --check hash -j 4
+    python kernel_gen_all.py --force                # ignore up-to-date outputs
+``````````````````````````````````````````````````````````````````````````'''
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import out_sat
+import inst_encoder
+import io_gen
+import heeptest_gen
+
+UTILS_DIR   = os.path.dirname(os.path.abspath(__file__))
+KERNELS_DIR = os.path.normpath(os.path.join(UTILS_DIR, "..", "kernels"))
+
+DIM_RE      = re.compile(r"^[0-9]+x[0-9]+$")
+HASH_FILE   = ".gen_hash"
+
+# Scripts and templates each step depends on
+STEP_TOOLS  = {
+    "bitstreams"    : ["inst_encoder.py", "bitstream_gen.py"],
+    "io"            : ["io_gen.py", "inst_encoder.py"],
+    "sources"       : ["heeptest_gen.py", "source.c.tpl", "header.h.tpl"],
+}
+
+STEPS = list(STEP_TOOLS)
+# io.json files are curated by hand, the io step only runs when requested
+DEFAULT_STEPS = ["bitstreams", "sources"]
+
+def discover(kernels_dir=KERNELS_DIR, kernels=None, dimensions=None):
+    """
+    Find the dimension-dependant folders of the kernels.
+
+    Parameters
+    ----------
+    kernels_dir : str
+    kernels     : list of str; only these kernels (default: all)
+    dimensions  : list of str; only these dimensions, e.g. ["3x3"] (default: all)
+
+    Returns
+    -------
+    list of (str, str); kernel path and dimension, sorted
+    """
+    found = []
+    for ker_name in sorted(os.listdir(kernels_dir)):
+        ker_path = os.path.join(kernels_dir, ker_name)
+        if not os.path.isdir(ker_path) or (kernels and ker_name not in kernels):
+            continue
+        for dimension in sorted(os.listdir(ker_path)):
+            if not DIM_RE.match(dimension) or not os.path.isdir(os.path.join(ker_path, dimension)):
+                continue
+            if dimensions and dimension not in dimensions:
+                continue
+            found.append((ker_path, dimension))
+    return found
+
+def step_files(step, ker_path, dimension):
+    """
+    Get the data inputs and the outputs of a generation step.
+
+    Returns
+    -------
+    (list of str, list of str)
+    """
+    ker_name, data_dir, _, _ = inst_encoder.parse_kernel_path(ker_path, dimension)
+    if step == "bitstreams":
+        return [data_dir + "out.sat"], [data_dir + "bitstreams"]
+    if step == "io":
+        return [data_dir + "out.sat", ker_path.rstrip("/") + "/inouts"], [data_dir + "io.json"]
+    filename = ker_name.lower()
+    return [data_dir + "bitstreams", data_dir + "io.json"], [data_dir + filename + ".c", data_dir + filename + ".h"]
+
+def inputs_hash(paths):
+    """
+    SHA-256 of the content of some files, in the given order.
+    """
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def up_to_date(inputs, outputs, check, stamp=None):
+    """
+    Check if the outputs of a step are up to date.
+
+    Parameters
+    ----------
+    inputs  : list of str; data inputs and tools of the step
+    outputs : list of str
+    check   : str; "mtime" or "hash"
+    stamp   : str; hash of the last generation (check == "hash")
+
+    Returns
+    -------
+    bool
+    """
+    if not all(os.path.exists(p) for p in outputs):
+        return False
+    if check == "hash":
+        return stamp == inputs_hash(inputs)
+    return min(os.path.getmtime(p) for p in outputs) >= max(os.path.getmtime(p) for p in inputs)
+
+def gen_kernel(ker_path, dimension, check="mtime", force=False, steps=DEFAULT_STEPS):
+    """
+    Run the generation steps of a kernel for a CGRA dimension.
+
+    Parameters
+    ----------
+    ker_path  : str
+    dimension : str; CGRA dimension (CxR)
+    check     : str; "mtime" or "hash", how up-to-date outputs are detected
+    force     : bool; regenerate up-to-date outputs and overwrite io.json
+    steps     : list of str; steps to run, among STEPS
+
+    Returns
+    -------
+    list of (str, str); status of each step: "generated", "up to date",
+    "kept io.json" or "missing <file>"
+    """
+    _, data_dir, _, _ = inst_encoder.parse_kernel_path(ker_path, dimension)
+    hash_path = data_dir + HASH_FILE
+    stamps = {}
+    if check == "hash" and os.path.exists(hash_path):
+        with open(hash_path) as f:
+            stamps = json.load(f)
+
+    # out.sat is parsed once for the bitstreams and io.json
+    sat = None
+
+    status = []
+    for step in STEPS:
+        if step not in steps:
+            continue
+        data, outputs = step_files(step, ker_path, dimension)
+        missing = [p for p in data if not os.path.exists(p)]
+        if missing:
+            status.append((step, "missing " + os.path.basename(missing[0])))
+            continue
+        if step == "io" and not force and os.path.exists(outputs[0]):
+            status.append((step, "kept io.json"))
+            continue
+        inputs = data + [os.path.join(UTILS_DIR, t) for t in STEP_TOOLS[step]]
+        if not force and up_to_date(inputs, outputs, check, stamps.get(step)):
+            status.append((step, "up to date"))
+            continue
+
+        if step in ("bitstreams", "io") and sat is None:
+            sat = out_sat.read(data_dir + "out.sat")
+        if step == "bitstreams":
+            inst_encoder.encode_kernel(ker_path, dimension, sat=sat)
+        elif step == "io":
+            io_gen.write_io(ker_path, dimension, sat)
+        else:
+            heeptest_gen.gen_sources(ker_path, dimension)
+        status.append((step, "generated"))
+
+        if check == "hash":
+            stamps[step] = inputs_hash(inputs)
+            with open(hash_path, "w") as f:
+                json.dump(stamps, f, indent=4)
+    return status
+
+def _gen_kernel_job(ker_path, dimension, check, force, steps):
+    # The generators report errors with sys.exit(), keep them per kernel
+    try:
+        return gen_kernel(ker_path, dimension, check, force, steps)
+    except SystemExit as e:
+        raise RuntimeError(str(e.code)) from None
+
+def gen_all(targets, check="mtime", force=False, steps=DEFAULT_STEPS, jobs=None, verbose=True):
+    """
+    Run gen_kernel() on several kernels and dimensions in a process pool.
+
+    Parameters
+    ----------
+    targets : list of (str, str); kernel paths and dimensions, see discover()
+    jobs    : int; number of processes (default: number of CPUs), 1 runs
+              everything in this process
+
+    Returns
+    -------
+    dict; (kernel path, dimension) -> list of step status, or the exception
+    raised by the generation
+    """
+    results = {}
+
+    def report(target, res):
+        results[target] = res
+        if not verbose:
+            return
+        name = os.path.basename(target[0].rstrip("/")) + "/" + target[1]
+        if isinstance(res, Exception):
+            print(f"{name:20s} ERROR: {type(res).__name__}: {res}")
+        else:
+            print(f"{name:20s} " + ", ".join(f"{s}: {st}" for s, st in res))
+
+    if jobs == 1:
+        for target in targets:
+            try:
+                report(target, _gen_kernel_job(*target, check, force, steps))
+            except Exception as e:
+                report(target, e)
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(_gen_kernel_job, *target, check, force, steps): target for target in targets}
+        for future in as_completed(futures):
+            try:
+                report(futures[future], future.result())
+            except Exception as e:
+                report(futures[future], e)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate the bitstreams, io.json and sources of every kernel and CGRA dimension")
+    parser.add_argument("--kernels-dir", default=KERNELS_DIR, help="Folder of the kernels (default: %(default)s)")
+    parser.add_argument("-k", "--kernels", nargs="+", metavar="NAME", help="Only these kernels")
+    parser.add_argument("-d", "--dimensions", nargs="+", metavar="CxR", help="Only these CGRA dimensions")
+    parser.add_argument("-s", "--steps", nargs="+", choices=STEPS, default=DEFAULT_STEPS, help="Steps to run (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of processes (default: number of CPUs)")
+    parser.add_argument("--check", choices=["mtime", "hash"], default="mtime", help="How up-to-date outputs are detected")
+    parser.add_argument("-f", "--force", action="store_true", help="Regenerate up-to-date outputs and overwrite existing io.json files")
+    args = parser.parse_args()
+
+    targets = discover(args.kernels_dir, args.kernels, args.dimensions)
+    if not targets:
+        sys.exit("[ERROR] No <kernel>/<CxR> folder found in " + args.kernels_dir)
+
+    results = gen_all(targets, args.check, args.force, args.steps, args.jobs)
+    failed = [t for t, res in results.items() if isinstance(res, Exception)]
+    if failed:
+        sys.exit(f"[ERROR] {len(failed)}/{len(targets)} kernel(s) failed")
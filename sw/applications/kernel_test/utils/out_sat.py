@@ -0,0 +1,127 @@
+'''
+    File name: out_sat.py
+    Python Version: Python 3.8
+    Description: single-pass parser of the SAT-MapIt output files (out.sat)
+'''
+
+'''``````````````````````````````````````````````````````````````````````````
+An out.sat file is read once, line by line, into an OutSat object shared by
+inst_encoder.py / bitstream_gen.py (pseudo-assembly) and io_gen.py (node ids).
+The parts used are:
+
+    T = 0               First pseudo-assembly section: one line per PE
+    <instruction>       (row-major) for each time stamp.
+    T = 1
+    ...
+    T = 0               Same schedule drawn as grids of opcodes, ignored.
+    ...
+    Output of the mapping with node id
+    T = 0               Grids with the node id of each PE (-1: no node).
+     _ _ _ _ _
+    |  | 21 |  ||  | -1 |  |
+    ...
+    Id: ...             Description of each node, ignored.
+``````````````````````````````````````````````````````````````````````````'''
+
+import sys
+
+IDS_HEADER  = "Output of the mapping with node id"
+
+class OutSat(object):
+    """
+    Content of an out.sat file.
+
+    Attributes
+    ----------
+    asm       : list (time stamps) of list of str; instruction of each PE,
+                row-major
+    node_ids  : list (time stamps) of list (rows) of list of int; node id of
+                each column, -1 if the PE has no node
+    nodes     : dict; node id -> list of (row, col, cycle) where it is placed
+    col_nodes : dict; column -> list of the node ids placed in that column, in
+                the order of the time stamps and rows
+    """
+
+    def __init__(self):
+        self.asm        = []
+        self.node_ids   = []
+        self.nodes      = {}
+        self.col_nodes  = {}
+
+    def io_cols(self, io_nodes):
+        """
+        Get the nodes of each column that are inputs or outputs.
+
+        Parameters
+        ----------
+        io_nodes : dict or set of int; node ids of the inputs and outputs
+
+        Returns
+        -------
+        dict; column -> list of node ids, in the order they are placed
+        """
+        return { col : [n for n in nodes if n in io_nodes] for col, nodes in self.col_nodes.items() }
+
+def parse(lines):
+    """
+    Parse the lines of an out.sat file in a single pass.
+
+    Parameters
+    ----------
+    lines : iterable of str
+
+    Returns
+    -------
+    OutSat
+    """
+    sat = OutSat()
+    # head -> asm -> grid -> ids
+    state = "head"
+    block = None
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+
+        if line.startswith("T = "):
+            if state == "head":
+                state = "asm"
+            elif state == "asm" and line == "T = 0":
+                state = "grid"
+            if state == "asm":
+                block = []
+                sat.asm.append(block)
+            elif state == "ids":
+                block = []
+                sat.node_ids.append(block)
+            continue
+
+        if state == "asm":
+            block.append(line)
+        elif line == IDS_HEADER:
+            state = "ids"
+        elif state == "ids" and line.startswith("|") and block is not None:
+            row = [int(s) for s in line.split() if s.lstrip("-").isdigit()]
+            if not row:
+                continue
+            r, cycle = len(block), len(sat.node_ids) - 1
+            block.append(row)
+            for c, node in enumerate(row):
+                if node < 0:
+                    continue
+                sat.nodes.setdefault(node, []).append((r, c, cycle))
+                sat.col_nodes.setdefault(c, []).append(node)
+
+    if not sat.asm:
+        sys.exit("[ERROR] No pseudo-assembly (T = 0) found in the out.sat file")
+    return sat
+
+def read(out_sat_path):
+    """
+    Parse an out.sat file.
+
+    Returns
+    -------
+    OutSat
+    """
+    with open(out_sat_path, "r") as f:
+        return parse(f)
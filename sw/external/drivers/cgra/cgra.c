@@ -9,25 +9,163 @@
 #include "core_v_mini_mcu.h"
 #include "cgra.h"
 #include "cgra_regs.h" // generated
+#include "csr.h"
+#include "hart.h"
+#include "rv_plic.h"
+#include "dma_sdk.h"
+
+// CMEM banks are back to back in the address map when their depth is a power of two
+#define CGRA_CMEM_CONTIGUOUS (CGRA_CMEM_BK_DEPTH == (1 << CGRA_CMEM_BK_DEPTH_LOG2))
+#define CGRA_CMEM_DMA_SEGMENTS (CGRA_CMEM_CONTIGUOUS ? 2 : CGRA_N_ROWS + 1)
+// The bitstream is sent to each instance in turn
+#define CGRA_DMA_SEGMENTS (CGRA_CMEM_DMA_SEGMENTS*CGRA_N_INSTANCES)
+
+// DMA loader state (one segment per DMA transaction, KMEM last)
+static const uint32_t      *cgra_dma_cmem;
+static const uint32_t      *cgra_dma_kmem;
+static uint8_t              cgra_dma_channel;
+static bool                 cgra_dma_irq;
+static volatile uint32_t    cgra_dma_segment;
+
+// Launch queue state (ring of jobs, launched in submission order on the idle instances)
+static cgra_job_t           cgra_q_jobs[CGRA_QUEUE_DEPTH];
+static const cgra_t        *cgra_q_dev;
+static uint8_t              cgra_q_n_dev;
+static volatile uint32_t    cgra_q_head;    // next job to launch
+static volatile uint32_t    cgra_q_tail;    // next free slot
+static volatile uint32_t    cgra_q_count;   // jobs queued or running
+static cgra_job_t * volatile cgra_q_running[CGRA_N_INSTANCES];
 
 void cgra_cmem_init(uint32_t cgra_cmem_bitstream[], uint32_t cgra_kmem_bitstream[])
 {
   int32_t *cgra_cmem_ptr;// = (int32_t*) (CGRA_START_ADDRESS);
 
-  for (int i=0; i<CGRA_N_ROWS; i++) {
-    // Update the pointer to the nexkt memory bank
-    cgra_cmem_ptr = (int32_t*) (CGRA_START_ADDRESS) + i*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
-    for (int j=0; j<CGRA_CMEM_BK_DEPTH; j++) {
-      *cgra_cmem_ptr++ = cgra_cmem_bitstream[j+i*CGRA_CMEM_BK_DEPTH];
+  for (int n=0; n<CGRA_N_INSTANCES; n++) {
+    for (int i=0; i<CGRA_N_ROWS; i++) {
+      // Update the pointer to the nexkt memory bank
+      cgra_cmem_ptr = (int32_t*) (CGRA_INSTANCE_START_ADDRESS(n)) + i*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+      for (int j=0; j<CGRA_CMEM_BK_DEPTH; j++) {
+        *cgra_cmem_ptr++ = cgra_cmem_bitstream[j+i*CGRA_CMEM_BK_DEPTH];
+      }
+    }
+
+    cgra_cmem_ptr = (int32_t*) (CGRA_INSTANCE_START_ADDRESS(n)) + CGRA_N_ROWS*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+    for (int i=0; i<CGRA_KMEM_DEPTH; i++) {
+      *cgra_cmem_ptr++ = cgra_kmem_bitstream[i];
     }
   }
+}
+
+// Compressed CMEM tokens (see generate_bitstream.py), they never cross a bank
+#define CGRA_CMEM_TOK_ZERO 0x80 // run of (t & 0x3f) + 1 NOP words
+#define CGRA_CMEM_TOK_SKIP 0xc0 // (t & 0x3f) + 1 unused words
+#define CGRA_CMEM_TOK_LIT  0xff // literal word, 4 bytes little endian follow
 
-  cgra_cmem_ptr = (int32_t*) (CGRA_START_ADDRESS) + CGRA_N_ROWS*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
-  for (int i=0; i<CGRA_KMEM_DEPTH; i++) {
-    *cgra_cmem_ptr++ = cgra_kmem_bitstream[i];
+void cgra_cmem_init_compressed(const uint8_t cgra_cmem_stream[], const uint32_t cgra_cmem_dict[], uint32_t cgra_kmem_bitstream[])
+{
+  for (int n=0; n<CGRA_N_INSTANCES; n++) {
+    const uint8_t *s = cgra_cmem_stream;
+
+    for (int i=0; i<CGRA_N_ROWS; i++) {
+      uint32_t *dst = (uint32_t*) (CGRA_INSTANCE_START_ADDRESS(n)) + i*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+      uint32_t *end = dst + CGRA_CMEM_BK_DEPTH;
+      while (dst < end) {
+        uint32_t t = *s++;
+        if (t < CGRA_CMEM_TOK_ZERO) {
+          *dst++ = cgra_cmem_dict[t];
+        } else if (t == CGRA_CMEM_TOK_LIT) {
+          *dst++ = (uint32_t)s[0] | ((uint32_t)s[1] << 8) | ((uint32_t)s[2] << 16) | ((uint32_t)s[3] << 24);
+          s += 4;
+        } else if (t < CGRA_CMEM_TOK_SKIP) {
+          for (uint32_t k=(t & 0x3f)+1; k>0; k--) {
+            *dst++ = 0;
+          }
+        } else {
+          dst += (t & 0x3f) + 1;
+        }
+      }
+    }
+
+    uint32_t *kmem = (uint32_t*) (CGRA_INSTANCE_START_ADDRESS(n)) + CGRA_N_ROWS*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+    for (int i=0; i<CGRA_KMEM_DEPTH; i++) {
+      kmem[i] = cgra_kmem_bitstream[i];
+    }
   }
 }
 
+static void cgra_cmem_dma_segment(uint32_t seg) {
+  const uint32_t *src;
+  uint32_t *dst;
+  uint32_t size;
+  volatile dma *the_dma = dma_peri(cgra_dma_channel);
+  uint32_t *base = (uint32_t*) (CGRA_INSTANCE_START_ADDRESS(seg / CGRA_CMEM_DMA_SEGMENTS));
+
+  seg %= CGRA_CMEM_DMA_SEGMENTS;
+  if (seg == CGRA_CMEM_DMA_SEGMENTS - 1) {
+    src  = cgra_dma_kmem;
+    dst  = base + CGRA_N_ROWS*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+    size = CGRA_KMEM_DEPTH;
+  } else if (CGRA_CMEM_CONTIGUOUS) {
+    src  = cgra_dma_cmem;
+    dst  = base;
+    size = CGRA_CMEM_TOT_DEPTH;
+  } else {
+    src  = &cgra_dma_cmem[seg*CGRA_CMEM_BK_DEPTH];
+    dst  = base + seg*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2);
+    size = CGRA_CMEM_BK_DEPTH;
+  }
+
+  DMA_COPY(dst, src, size, DMA_DATA_TYPE_WORD, DMA_DATA_TYPE_WORD, 0, the_dma);
+  the_dma->INTERRUPT_EN = (uint32_t) cgra_dma_irq;
+  // Writing the size starts the transaction
+  the_dma->SIZE_D1 = (uint32_t)(size & DMA_SIZE_D1_SIZE_MASK);
+}
+
+void cgra_cmem_init_dma_start(uint32_t cgra_cmem_bitstream[], uint32_t cgra_kmem_bitstream[], uint8_t channel, bool use_irq) {
+  cgra_dma_cmem    = cgra_cmem_bitstream;
+  cgra_dma_kmem    = cgra_kmem_bitstream;
+  cgra_dma_channel = channel;
+  cgra_dma_irq     = use_irq;
+  cgra_dma_segment = 0;
+  cgra_cmem_dma_segment(0);
+}
+
+bool cgra_cmem_init_dma_done(void) {
+  if (cgra_dma_segment == CGRA_DMA_SEGMENTS) {
+    return true;
+  }
+  if (!dma_is_ready(cgra_dma_channel)) {
+    return false;
+  }
+  // Current segment finished: start the next one, if any
+  if (++cgra_dma_segment < CGRA_DMA_SEGMENTS) {
+    cgra_cmem_dma_segment(cgra_dma_segment);
+    return false;
+  }
+  return true;
+}
+
+void cgra_cmem_init_dma_wait(void) {
+  while (!cgra_cmem_init_dma_done()) {
+    if (cgra_dma_irq) {
+      CSR_CLEAR_BITS(CSR_REG_MSTATUS, 0x8);
+      if (dma_is_ready(cgra_dma_channel) == 0) {
+        wait_for_interrupt();
+      }
+      CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+    }
+  }
+}
+
+void cgra_cmem_init_dma(uint32_t cgra_cmem_bitstream[], uint32_t cgra_kmem_bitstream[], uint8_t channel, bool use_irq) {
+  cgra_cmem_init_dma_start(cgra_cmem_bitstream, cgra_kmem_bitstream, channel, use_irq);
+  cgra_cmem_init_dma_wait();
+}
+
+void cgra_init_instance(cgra_t *cgra, uint8_t instance) {
+  cgra->base_addr = mmio_region_from_addr((uintptr_t)CGRA_INSTANCE_PERIPH_START_ADDRESS(instance));
+}
+
 void cgra_set_read_ptr(const cgra_t *cgra, uint32_t read_ptr, uint8_t column_idx) {
   // Each column has 2 pointers so increment the address by 0x8 (i.e., 2 x 32 bit addresses) multiply by the column index
   mmio_region_write32(cgra->base_addr, (ptrdiff_t)(CGRA_PTR_IN_COL_0_REG_OFFSET+0x8*column_idx), read_ptr);
@@ -38,6 +176,17 @@ void cgra_set_write_ptr(const cgra_t *cgra, uint32_t write_ptr, uint8_t column_i
   mmio_region_write32(cgra->base_addr, (ptrdiff_t)(CGRA_PTR_OUT_COL_0_REG_OFFSET+0x8*column_idx), write_ptr);
 }
 
+void cgra_set_read_agen(const cgra_t *cgra, uint16_t inner_cnt, int16_t outer_stride, uint8_t column_idx) {
+  uint32_t agen = ((uint32_t)(uint16_t) outer_stride << CGRA_AGEN_IN_COL_0_OUTER_STRIDE_OFFSET) | inner_cnt;
+  // Same layout as the pointers: the input and output registers of a column are consecutive
+  mmio_region_write32(cgra->base_addr, (ptrdiff_t)(CGRA_AGEN_IN_COL_0_REG_OFFSET+0x8*column_idx), agen);
+}
+
+void cgra_set_write_agen(const cgra_t *cgra, uint16_t inner_cnt, int16_t outer_stride, uint8_t column_idx) {
+  uint32_t agen = ((uint32_t)(uint16_t) outer_stride << CGRA_AGEN_OUT_COL_0_OUTER_STRIDE_OFFSET) | inner_cnt;
+  mmio_region_write32(cgra->base_addr, (ptrdiff_t)(CGRA_AGEN_OUT_COL_0_REG_OFFSET+0x8*column_idx), agen);
+}
+
 void cgra_wait_ready(const cgra_t *cgra) {
   uint32_t cgra_req_free;
   // Wait until the CGRA can accept a new request
@@ -70,6 +219,193 @@ uint32_t cgra_perf_cnt_get_col_stall(const cgra_t *cgra, uint8_t column_idx) {
   return mmio_region_read32(cgra->base_addr, (ptrdiff_t)(CGRA_PERF_CNT_COL_0_STALL_CYCLES_REG_OFFSET+column_idx*0x8));
 }
 
+#if CGRA_RC_PERF_CNT
+// The 4 counters of an RC are consecutive, the RCs are stored row by row
+#define CGRA_PERF_CNT_RC_OFFSET(row_idx, column_idx) \
+  (CGRA_PERF_CNT_RC_0_0_ISSUE_REG_OFFSET+((row_idx)*CGRA_N_COLS+(column_idx))*0x10)
+
+uint32_t cgra_perf_cnt_get_rc_issue(const cgra_t *cgra, uint8_t row_idx, uint8_t column_idx) {
+  return mmio_region_read32(cgra->base_addr, (ptrdiff_t)(CGRA_PERF_CNT_RC_OFFSET(row_idx, column_idx)));
+}
+
+uint32_t cgra_perf_cnt_get_rc_mem(const cgra_t *cgra, uint8_t row_idx, uint8_t column_idx) {
+  return mmio_region_read32(cgra->base_addr, (ptrdiff_t)(CGRA_PERF_CNT_RC_OFFSET(row_idx, column_idx)+0x4));
+}
+
+uint32_t cgra_perf_cnt_get_rc_stall(const cgra_t *cgra, uint8_t row_idx, uint8_t column_idx) {
+  return mmio_region_read32(cgra->base_addr, (ptrdiff_t)(CGRA_PERF_CNT_RC_OFFSET(row_idx, column_idx)+0x8));
+}
+
+uint32_t cgra_perf_cnt_get_rc_branch(const cgra_t *cgra, uint8_t row_idx, uint8_t column_idx) {
+  return mmio_region_read32(cgra->base_addr, (ptrdiff_t)(CGRA_PERF_CNT_RC_OFFSET(row_idx, column_idx)+0xc));
+}
+#endif
+
 uint32_t cgra_get_status(const cgra_t *cgra) {
   return mmio_region_read32(cgra->base_addr, (ptrdiff_t)(CGRA_COL_STATUS_REG_OFFSET));
 }
+
+bool cgra_cmem_conf_busy(const cgra_t *cgra) {
+  return mmio_region_get_bit32(cgra->base_addr, (ptrdiff_t)(CGRA_CMEM_STATUS_REG_OFFSET), CGRA_CMEM_STATUS_CONF_BUSY_BIT);
+}
+
+bool cgra_cmem_wr_stalled(const cgra_t *cgra) {
+  bool stalled = mmio_region_get_bit32(cgra->base_addr, (ptrdiff_t)(CGRA_CMEM_STATUS_REG_OFFSET), CGRA_CMEM_STATUS_WR_STALL_BIT);
+  if (stalled) {
+    mmio_region_write32(cgra->base_addr, (ptrdiff_t)(CGRA_CMEM_STATUS_REG_OFFSET), (uint32_t)1 << CGRA_CMEM_STATUS_WR_STALL_BIT);
+  }
+  return stalled;
+}
+
+static void cgra_queue_launch(uint8_t inst, cgra_job_t *job) {
+  const cgra_t *cgra = &cgra_q_dev[inst];
+
+  for (int i=0; i<job->ptrs.n_cols; i++) {
+    cgra_set_read_ptr(cgra, job->ptrs.read_ptr[i], i);
+    cgra_set_write_ptr(cgra, job->ptrs.write_ptr[i], i);
+    if (job->has_agen) {
+      cgra_set_read_agen(cgra, job->agen.read_cnt[i], job->agen.read_stride[i], i);
+      cgra_set_write_agen(cgra, job->agen.write_cnt[i], job->agen.write_stride[i], i);
+    }
+  }
+  cgra_perf_cnt_reset(cgra);
+  job->instance = inst;
+  job->status = CGRA_JOB_RUNNING;
+  cgra_q_running[inst] = job;
+  cgra_set_kernel(cgra, job->kernel_id);
+}
+
+// Launch the jobs at the head of the queue on the idle instances
+static void cgra_queue_kick(void) {
+  for (uint8_t inst=0; inst<cgra_q_n_dev && cgra_q_jobs[cgra_q_head].status == CGRA_JOB_QUEUED; inst++) {
+    if (cgra_q_running[inst] == NULL) {
+      cgra_job_t *job = &cgra_q_jobs[cgra_q_head];
+      cgra_q_head = (cgra_q_head + 1) % CGRA_QUEUE_DEPTH;
+      cgra_queue_launch(inst, job);
+    }
+  }
+}
+
+void cgra_queue_init(const cgra_t *cgra) {
+  cgra_queue_init_multi(cgra, 1);
+}
+
+void cgra_queue_init_multi(const cgra_t *cgras, uint8_t n_instances) {
+  cgra_q_dev = cgras;
+  cgra_q_n_dev = n_instances;
+  cgra_q_head = 0;
+  cgra_q_tail = 0;
+  cgra_q_count = 0;
+  for (int i=0; i<CGRA_N_INSTANCES; i++) {
+    cgra_q_running[i] = NULL;
+  }
+  for (int i=0; i<CGRA_QUEUE_DEPTH; i++) {
+    cgra_q_jobs[i].status = CGRA_JOB_FREE;
+  }
+
+  plic_Init();
+  for (uint8_t i=0; i<n_instances; i++) {
+    plic_irq_set_priority(CGRA_INSTANCE_INTR(i), 1);
+    plic_irq_set_enabled(CGRA_INSTANCE_INTR(i), kPlicToggleEnabled);
+    plic_assign_external_irq_handler(CGRA_INSTANCE_INTR(i), (void *) &cgra_queue_irq_handler);
+    cgra_perf_cnt_enable(&cgras[i], 1);
+  }
+
+  // Enable global interrupt for machine-level interrupts
+  CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+  // Set mie.MEIE bit to one to enable machine-level external interrupts
+  const uint32_t mask = 1 << 11;
+  CSR_SET_BITS(CSR_REG_MIE, mask);
+}
+
+cgra_job_t *cgra_submit(uint32_t kernel_id, const cgra_ptr_cfg_t *ptrs, cgra_job_cb_t callback, void *arg) {
+  return cgra_submit_agen(kernel_id, ptrs, NULL, callback, arg);
+}
+
+cgra_job_t *cgra_submit_agen(uint32_t kernel_id, const cgra_ptr_cfg_t *ptrs, const cgra_agen_cfg_t *agen, cgra_job_cb_t callback, void *arg) {
+  cgra_job_t *job = NULL;
+  uint32_t mstatus;
+
+  // The interrupt handler also walks the queue. Restore the previous state
+  // afterwards so submitting from a completion callback is safe.
+  CSR_READ(CSR_REG_MSTATUS, &mstatus);
+  CSR_CLEAR_BITS(CSR_REG_MSTATUS, 0x8);
+  // Jobs complete out of order on several instances: the next slot may still be in use
+  if (cgra_q_count < CGRA_QUEUE_DEPTH &&
+      cgra_q_jobs[cgra_q_tail].status != CGRA_JOB_QUEUED &&
+      cgra_q_jobs[cgra_q_tail].status != CGRA_JOB_RUNNING) {
+    job = &cgra_q_jobs[cgra_q_tail];
+    cgra_q_tail = (cgra_q_tail + 1) % CGRA_QUEUE_DEPTH;
+    cgra_q_count++;
+
+    job->kernel_id = kernel_id;
+    job->ptrs      = *ptrs;
+    job->has_agen  = agen != NULL;
+    if (agen != NULL) {
+      job->agen = *agen;
+    }
+    job->callback  = callback;
+    job->arg       = arg;
+    for (int i=0; i<CGRA_N_COLS; i++) {
+      job->active_cycles[i] = 0;
+      job->stall_cycles[i]  = 0;
+    }
+    job->status = CGRA_JOB_QUEUED;
+    cgra_queue_kick();
+  }
+  if (mstatus & 0x8) {
+    CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+  }
+
+  return job;
+}
+
+void cgra_job_wait(const cgra_job_t *job) {
+  while (job->status != CGRA_JOB_DONE) {
+    // Interrupts disabled between the check and wfi (wfi still wakes up on a pending one)
+    CSR_CLEAR_BITS(CSR_REG_MSTATUS, 0x8);
+    if (job->status != CGRA_JOB_DONE) {
+      wait_for_interrupt();
+    }
+    CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+  }
+}
+
+void cgra_queue_wait_idle(void) {
+  while (cgra_q_count != 0) {
+    CSR_CLEAR_BITS(CSR_REG_MSTATUS, 0x8);
+    if (cgra_q_count != 0) {
+      wait_for_interrupt();
+    }
+    CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+  }
+}
+
+uint32_t cgra_queue_pending(void) {
+  return cgra_q_count;
+}
+
+void cgra_queue_irq_handler(uint32_t id) {
+  uint32_t inst = id - CGRA_INTR;
+
+  if (inst >= cgra_q_n_dev || cgra_q_running[inst] == NULL) {
+    return;
+  }
+  cgra_job_t *job = cgra_q_running[inst];
+
+  // Counters are reset by the next launch, so read them first
+  for (int i=0; i<CGRA_N_COLS; i++) {
+    job->active_cycles[i] = cgra_perf_cnt_get_col_active(&cgra_q_dev[inst], i);
+    job->stall_cycles[i]  = cgra_perf_cnt_get_col_stall(&cgra_q_dev[inst], i);
+  }
+  job->status = CGRA_JOB_DONE;
+  cgra_q_running[inst] = NULL;
+  cgra_q_count--;
+
+  // Keep the CGRAs busy before running the callback
+  cgra_queue_kick();
+
+  if (job->callback != NULL) {
+    job->callback(job);
+  }
+}
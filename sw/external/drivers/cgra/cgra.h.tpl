@@ -12,6 +12,15 @@
 
 #define CGRA_INTR EXT_INTR_0
 
+// Number of CGRA instances (num_instances in heepsilon_cfg.hjson). Instance i
+// sits at the addresses of instance 0 plus i*CGRA_SIZE (memories) and
+// i*CGRA_PERIPH_SIZE (registers), and raises the external interrupt CGRA_INTR+i.
+#define CGRA_N_INSTANCES ${cgra_num_instances}
+
+#define CGRA_INSTANCE_START_ADDRESS(i)        (CGRA_START_ADDRESS + (i)*CGRA_SIZE)
+#define CGRA_INSTANCE_PERIPH_START_ADDRESS(i) (CGRA_PERIPH_START_ADDRESS + (i)*CGRA_PERIPH_SIZE)
+#define CGRA_INSTANCE_INTR(i)                 (CGRA_INTR + (i))
+
 #define CGRA_N_COLS   ${cgra_num_columns}
 #define CGRA_N_ROWS   ${cgra_num_rows}
 #define CGRA_MAX_COLS ${cgra_max_columns}
@@ -26,6 +35,14 @@
 #define CGRA_RCS_NUM_CREG      ${cgra_rcs_num_instr}
 #define CGRA_RCS_NUM_CREG_LOG2 ${cgra_rcs_num_instr_log2}
 
+// Per-RC performance counters (rc_perf_cnt in heepsilon_cfg.hjson)
+#define CGRA_RC_PERF_CNT ${1 if cgra_rc_perf_cnt else 0}
+
+// Number of launches that can be waiting in the cgra_submit() queue
+#ifndef CGRA_QUEUE_DEPTH
+  #define CGRA_QUEUE_DEPTH 8
+#endif
+
 // Some of these checks are already done during the bitstream generation but better double check them
 #if CGRA_CMEM_TOT_DEPTH < ${cgra_num_rows*cgra_max_columns*cgra_rcs_num_instr}
   #warning Context memory cannot hold the maximum kernel size
@@ -39,10 +56,54 @@ extern "C" {
 #endif
 
 /**
- * Write the CGRA bistream to its memory
+ * Write the CGRA bistream to its memory (to the memory of every instance)
  */
 void cgra_cmem_init(uint32_t cgra_cmem_bitstream[], uint32_t cgra_kmem_bitstream[]);
 
+/**
+ * Write a compressed CGRA bitstream (generate_bitstream.py --format compressed)
+ * to its memory (to the memory of every instance). NOP runs are expanded by the
+ * CPU and the words not used by any kernel of the bitstream are not written.
+ * @param cgra_cmem_stream Token stream of the context memory.
+ * @param cgra_cmem_dict Dictionary of the repeated instruction words.
+ * @param cgra_kmem_bitstream Kernel memory content (CGRA_KMEM_DEPTH words).
+ */
+void cgra_cmem_init_compressed(const uint8_t cgra_cmem_stream[], const uint32_t cgra_cmem_dict[], uint32_t cgra_kmem_bitstream[]);
+
+/**
+ * Write the CGRA bitstream to its memory with the DMA and wait for the end of the transfer.
+ * Every instance receives the bitstream.
+ * The DMA must have been initialized with dma_sdk_init().
+ * @param cgra_cmem_bitstream Context memory content (CGRA_CMEM_TOT_DEPTH words).
+ * @param cgra_kmem_bitstream Kernel memory content (CGRA_KMEM_DEPTH words).
+ * @param channel DMA channel to use.
+ * @param use_irq Sleep on the DMA completion interrupt instead of polling.
+ */
+void cgra_cmem_init_dma(uint32_t cgra_cmem_bitstream[], uint32_t cgra_kmem_bitstream[], uint8_t channel, bool use_irq);
+
+/**
+ * Start loading the CGRA bitstream with the DMA and return immediately.
+ * The CMEM is sent in one transaction when its banks are contiguous (one per bank
+ * otherwise), followed by the KMEM. Progress with cgra_cmem_init_dma_done() or
+ * cgra_cmem_init_dma_wait(); the bitstream arrays must stay valid until then.
+ * @param cgra_cmem_bitstream Context memory content (CGRA_CMEM_TOT_DEPTH words).
+ * @param cgra_kmem_bitstream Kernel memory content (CGRA_KMEM_DEPTH words).
+ * @param channel DMA channel to use.
+ * @param use_irq Enable the DMA completion interrupt of each transaction.
+ */
+void cgra_cmem_init_dma_start(uint32_t cgra_cmem_bitstream[], uint32_t cgra_kmem_bitstream[], uint8_t channel, bool use_irq);
+
+/**
+ * Check the DMA bitstream load, starting its next transaction if the previous one is over.
+ * @return true once the whole bitstream has been written.
+ */
+bool cgra_cmem_init_dma_done(void);
+
+/**
+ * Wait for the end of a load started with cgra_cmem_init_dma_start().
+ */
+void cgra_cmem_init_dma_wait(void);
+
 /**
  * Initialization parameters for CGRA peripheral control registers..
  *
@@ -54,6 +115,87 @@ typedef struct cgra {
   mmio_region_t base_addr;
 } cgra_t;
 
+/**
+ * Point a cgra_t to the peripheral registers of a CGRA instance.
+ * @param cgra Handle to initialize.
+ * @param instance Instance index (0 to CGRA_N_INSTANCES-1).
+ */
+void cgra_init_instance(cgra_t *cgra, uint8_t instance);
+
+/**
+ * Column pointers of a kernel launch.
+ */
+typedef struct cgra_ptr_cfg {
+  /**
+   * Read pointer (LWD) of each column.
+   */
+  uint32_t read_ptr[CGRA_N_COLS];
+  /**
+   * Write pointer (SWD) of each column.
+   */
+  uint32_t write_ptr[CGRA_N_COLS];
+  /**
+   * Number of columns (starting from 0) whose pointers are programmed.
+   */
+  uint8_t n_cols;
+} cgra_ptr_cfg_t;
+
+/**
+ * 2-D addressing of the column streams of a kernel launch. After inner_cnt
+ * LWD (SWD) accesses, the read (write) pointer moves to the first address of
+ * the row plus outer_stride bytes; inside a row it is incremented by the
+ * LWD/SWD immediate. An inner_cnt of 0 keeps the linear stream.
+ */
+typedef struct cgra_agen_cfg {
+  uint16_t read_cnt[CGRA_N_COLS];
+  int16_t  read_stride[CGRA_N_COLS];
+  uint16_t write_cnt[CGRA_N_COLS];
+  int16_t  write_stride[CGRA_N_COLS];
+} cgra_agen_cfg_t;
+
+/**
+ * Life cycle of a queued kernel launch.
+ */
+typedef enum cgra_job_status {
+  CGRA_JOB_FREE    = 0,
+  CGRA_JOB_QUEUED  = 1,
+  CGRA_JOB_RUNNING = 2,
+  CGRA_JOB_DONE    = 3,
+} cgra_job_status_t;
+
+typedef struct cgra_job cgra_job_t;
+
+/**
+ * Completion callback, called from the CGRA interrupt handler after the
+ * next queued job has already been launched.
+ */
+typedef void (*cgra_job_cb_t)(cgra_job_t *job);
+
+/**
+ * A kernel launch handled by the driver queue.
+ */
+struct cgra_job {
+  uint32_t          kernel_id;
+  cgra_ptr_cfg_t    ptrs;
+  cgra_agen_cfg_t   agen;
+  bool              has_agen;
+  cgra_job_cb_t     callback;
+  /**
+   * User data for the callback.
+   */
+  void             *arg;
+  volatile cgra_job_status_t status;
+  /**
+   * Instance the job was launched on.
+   */
+  uint8_t           instance;
+  /**
+   * Performance counters of the job, read when it completes.
+   */
+  uint32_t          active_cycles[CGRA_N_COLS];
+  uint32_t          stall_cycles[CGRA_N_COLS];
+};
+
 /**
  * Write to read_ptr register of the CGRA control registers.
  * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
@@ -70,6 +212,26 @@ void cgra_set_read_ptr(const cgra_t *cgra, uint32_t read_ptr, uint8_t column_idx
  */
 void cgra_set_write_ptr(const cgra_t *cgra, uint32_t write_ptr, uint8_t column_idx);
 
+/**
+ * Write to the 2-D addressing register of the input stream (LWD) of a column.
+ * The register applies to the next kernel launch only (cleared when it starts).
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ * @param inner_cnt Reads per row (0: linear stream).
+ * @param outer_stride Byte offset between the first reads of two rows.
+ * @param column_idx Column number to which write the configuration.
+ */
+void cgra_set_read_agen(const cgra_t *cgra, uint16_t inner_cnt, int16_t outer_stride, uint8_t column_idx);
+
+/**
+ * Write to the 2-D addressing register of the output stream (SWD) of a column.
+ * The register applies to the next kernel launch only (cleared when it starts).
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ * @param inner_cnt Writes per row (0: linear stream).
+ * @param outer_stride Byte offset between the first writes of two rows.
+ * @param column_idx Column number to which write the configuration.
+ */
+void cgra_set_write_agen(const cgra_t *cgra, uint16_t inner_cnt, int16_t outer_stride, uint8_t column_idx);
+
 /**
  * Wait until the CGRA is ready to accept a new request.
  * @param cgra Pointer to cgra_t representing the target CGRA peripheral.
@@ -119,6 +281,45 @@ uint32_t cgra_perf_cnt_get_col_active(const cgra_t *cgra, uint8_t column_idx);
  */
 uint32_t cgra_perf_cnt_get_col_stall(const cgra_t *cgra, uint8_t column_idx);
 
+#if CGRA_RC_PERF_CNT
+/**
+ * Get the number of non-NOP instructions executed by an RC from performance counter.
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ * @param row_idx Row index of the RC.
+ * @param column_idx Column index of the RC.
+ * @return Performance counter measuring the number of executed instructions.
+ */
+uint32_t cgra_perf_cnt_get_rc_issue(const cgra_t *cgra, uint8_t row_idx, uint8_t column_idx);
+
+/**
+ * Get the number of memory operations (LWD, SWD, LWI, SWI) executed by an RC from performance counter.
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ * @param row_idx Row index of the RC.
+ * @param column_idx Column index of the RC.
+ * @return Performance counter measuring the number of memory operations.
+ */
+uint32_t cgra_perf_cnt_get_rc_mem(const cgra_t *cgra, uint8_t row_idx, uint8_t column_idx);
+
+/**
+ * Get the number of cycles an RC waits with a non-NOP instruction (memory
+ * accesses, multiplications) from performance counter.
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ * @param row_idx Row index of the RC.
+ * @param column_idx Column index of the RC.
+ * @return Performance counter measuring the number of stall cycles.
+ */
+uint32_t cgra_perf_cnt_get_rc_stall(const cgra_t *cgra, uint8_t row_idx, uint8_t column_idx);
+
+/**
+ * Get the number of branches taken by an RC from performance counter.
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ * @param row_idx Row index of the RC.
+ * @param column_idx Column index of the RC.
+ * @return Performance counter measuring the number of taken branches.
+ */
+uint32_t cgra_perf_cnt_get_rc_branch(const cgra_t *cgra, uint8_t row_idx, uint8_t column_idx);
+#endif
+
 /**
  * Get CGRA columns' status (1 bit per column: 0=free, 1=used).
  * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
@@ -127,6 +328,86 @@ uint32_t cgra_perf_cnt_get_col_stall(const cgra_t *cgra, uint8_t column_idx);
  */
 uint32_t cgra_get_status(const cgra_t *cgra);
 
+/**
+ * Check whether a kernel configuration is being read from the context memory.
+ * The context memory can be written while kernels execute: only the writes to
+ * the words or the KMEM entry of the kernel being configured are delayed by the
+ * CGRA until its configuration ends. A column that cached the configuration of
+ * a kernel reloads it on the next launch if its words were written.
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ */
+bool cgra_cmem_conf_busy(const cgra_t *cgra);
+
+/**
+ * Check whether a context memory write was delayed because it targeted the
+ * kernel being configured, and clear the flag.
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ */
+bool cgra_cmem_wr_stalled(const cgra_t *cgra);
+
+/**
+ * Initialize the launch queue and route the CGRA interrupt to it.
+ * Configures the PLIC and enables machine-level external interrupts, so the
+ * application must not register its own handler for CGRA_INTR. Performance
+ * counters are enabled so they can be recorded per job.
+ * @param cgra Pointer to cgra_t represting the target CGRA peripheral.
+ */
+void cgra_queue_init(const cgra_t *cgra);
+
+/**
+ * Initialize the launch queue over several CGRA instances. Queued jobs are
+ * still launched in submission order, each on the first idle instance, so
+ * independent launches (e.g. the tiles of a kernel) run concurrently and may
+ * complete out of order. Every instance must hold the kernels of the queued
+ * jobs (cgra_cmem_init() writes all of them).
+ * @param cgras Handles of the instances, indexed by instance (must stay valid).
+ * @param n_instances Number of handles (1 to CGRA_N_INSTANCES).
+ */
+void cgra_queue_init_multi(const cgra_t *cgras, uint8_t n_instances);
+
+/**
+ * Enqueue a kernel launch. The kernel starts immediately if an instance is idle,
+ * otherwise the interrupt handler launches it when a previous job completes.
+ * The job record stays valid until CGRA_QUEUE_DEPTH further submissions.
+ * @param kernel_id Kernel ID to execute.
+ * @param ptrs Column pointers of the launch (copied, may be reused by the caller).
+ * @param callback Function called on completion (NULL for none).
+ * @param arg User data stored in the job for the callback.
+ * @return The job, or NULL if the queue is full.
+ */
+cgra_job_t *cgra_submit(uint32_t kernel_id, const cgra_ptr_cfg_t *ptrs, cgra_job_cb_t callback, void *arg);
+
+/**
+ * Enqueue a kernel launch whose column streams use the 2-D addressing.
+ * Same as cgra_submit() otherwise.
+ * @param agen 2-D addressing of the ptrs->n_cols first columns (copied, NULL for linear streams).
+ */
+cgra_job_t *cgra_submit_agen(uint32_t kernel_id, const cgra_ptr_cfg_t *ptrs, const cgra_agen_cfg_t *agen, cgra_job_cb_t callback, void *arg);
+
+/**
+ * Sleep until a job completes.
+ * @param job Job returned by cgra_submit().
+ */
+void cgra_job_wait(const cgra_job_t *job);
+
+/**
+ * Sleep until every submitted job has completed.
+ */
+void cgra_queue_wait_idle(void);
+
+/**
+ * Get the number of jobs waiting or running.
+ * @return Number of jobs not completed yet.
+ */
+uint32_t cgra_queue_pending(void);
+
+/**
+ * CGRA interrupt handler used by the launch queue (registered by cgra_queue_init()
+ * for the interrupt of each instance).
+ * @param id Interrupt ID.
+ */
+void cgra_queue_irq_handler(uint32_t id);
+
 #ifdef __cplusplus
 }
 #endif
@@ -0,0 +1,209 @@
+// Copyright EPFL contributors.
+// Licensed under the Apache License, Version 2.0, see LICENSE for details.
+// SPDX-License-Identifier: Apache-2.0
+
+#include <stddef.h>
+#include <stdint.h>
+
+#include "heepsilon.h"
+#include "core_v_mini_mcu.h"
+#include "cgra.h"
+#include "cgra_overlay.h"
+#include "dma_sdk.h"
+#include "w25q128jw.h"
+
+// The columns keep the configuration of the last kernel ID they ran, so an ID
+// can only be given to another kernel when no column has it cached
+#if CGRA_KMEM_DEPTH - 1 <= CGRA_N_COLS
+  #error CGRA overlay: not enough kernel IDs to rotate around the cached ones
+#endif
+
+#define CGRA_OVL_NONE 0xffffffff
+
+// Every instance holds the resident kernels, so the queue can launch them anywhere
+#define CGRA_KMEM_BASE(n) ((uint32_t*) (CGRA_INSTANCE_START_ADDRESS(n)) + CGRA_N_ROWS*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2))
+
+// Resident kernel of each kernel ID (ID 0 is reserved)
+typedef struct {
+  uint32_t index;
+  uint32_t start;
+  uint32_t size;
+  uint32_t last_use;
+} cgra_ovl_slot_t;
+
+static cgra_ovl_slot_t              cgra_ovl_slots[CGRA_KMEM_DEPTH];
+static uint32_t                     cgra_ovl_col_id[CGRA_N_COLS];
+static const cgra_overlay_kernel_t *cgra_ovl_table;
+static uint32_t                     cgra_ovl_n_kernels;
+static const uint32_t              *cgra_ovl_words;
+static bool                         cgra_ovl_from_flash;
+static uint8_t                      cgra_ovl_channel;
+static uint32_t                     cgra_ovl_clock;
+static cgra_overlay_stats_t         cgra_ovl_stats;
+
+static bool cgra_ovl_id_cached(uint32_t id) {
+  for (int c = 0; c < CGRA_N_COLS; c++) {
+    if (cgra_ovl_col_id[c] == id) {
+      return true;
+    }
+  }
+  return false;
+}
+
+static uint32_t cgra_ovl_find_id(void) {
+  for (uint32_t id = 1; id < CGRA_KMEM_DEPTH; id++) {
+    if (cgra_ovl_slots[id].index == CGRA_OVL_NONE && !cgra_ovl_id_cached(id)) {
+      return id;
+    }
+  }
+  return 0;
+}
+
+static uint32_t cgra_ovl_find_space(uint32_t size) {
+  // First fit: the candidates are the bank start and the end of each resident kernel
+  for (uint32_t id = 0; id < CGRA_KMEM_DEPTH; id++) {
+    uint32_t start = 0;
+    if (id > 0) {
+      if (cgra_ovl_slots[id].index == CGRA_OVL_NONE) {
+        continue;
+      }
+      start = cgra_ovl_slots[id].start + cgra_ovl_slots[id].size;
+    }
+    if (start + size > CGRA_CMEM_BK_DEPTH) {
+      continue;
+    }
+    bool fits = true;
+    for (uint32_t other = 1; other < CGRA_KMEM_DEPTH && fits; other++) {
+      const cgra_ovl_slot_t *s = &cgra_ovl_slots[other];
+      if (s->index != CGRA_OVL_NONE && start < s->start + s->size && s->start < start + size) {
+        fits = false;
+      }
+    }
+    if (fits) {
+      return start;
+    }
+  }
+  return CGRA_OVL_NONE;
+}
+
+static bool cgra_ovl_evict_lru(void) {
+  uint32_t victim = 0;
+  for (uint32_t id = 1; id < CGRA_KMEM_DEPTH; id++) {
+    if (cgra_ovl_slots[id].index != CGRA_OVL_NONE &&
+        (victim == 0 || cgra_ovl_slots[id].last_use < cgra_ovl_slots[victim].last_use)) {
+      victim = id;
+    }
+  }
+  if (victim == 0) {
+    return false;
+  }
+  for (int n = 0; n < CGRA_N_INSTANCES; n++) {
+    CGRA_KMEM_BASE(n)[victim] = 0;
+  }
+  cgra_ovl_slots[victim].index = CGRA_OVL_NONE;
+  cgra_ovl_stats.evictions++;
+  return true;
+}
+
+static bool cgra_ovl_load(const cgra_overlay_kernel_t *k, uint32_t start, uint32_t size) {
+  for (int n = 0; n < CGRA_N_INSTANCES; n++) {
+    for (int r = 0; r < CGRA_N_ROWS; r++) {
+      uint32_t *dst = (uint32_t*) (CGRA_INSTANCE_START_ADDRESS(n)) + r*((uint32_t)1<<CGRA_CMEM_BK_DEPTH_LOG2) + start;
+      const uint32_t *src = &cgra_ovl_words[k->offset + r*size];
+      if (cgra_ovl_from_flash) {
+        uint32_t *src_flash = heep_get_flash_address_offset((uint32_t*) src);
+        if (w25q128jw_read_standard_dma((uint32_t) src_flash, dst, size*sizeof(uint32_t), 0, 0) != FLASH_OK) {
+          return false;
+        }
+      } else {
+        dma_copy((uint32_t) dst, (uint32_t) src, size, cgra_ovl_channel, DMA_DATA_TYPE_WORD, DMA_DATA_TYPE_WORD, 0);
+      }
+    }
+  }
+  cgra_ovl_stats.words_loaded += CGRA_N_INSTANCES*CGRA_N_ROWS*size;
+  return true;
+}
+
+void cgra_overlay_init(const cgra_overlay_kernel_t *table, uint32_t n_kernels, const uint32_t *words, bool from_flash, uint8_t channel) {
+  cgra_ovl_table      = table;
+  cgra_ovl_n_kernels  = n_kernels;
+  cgra_ovl_words      = words;
+  cgra_ovl_from_flash = from_flash;
+  cgra_ovl_channel    = channel;
+  cgra_ovl_clock      = 0;
+
+  cgra_ovl_stats.hits         = 0;
+  cgra_ovl_stats.misses       = 0;
+  cgra_ovl_stats.evictions    = 0;
+  cgra_ovl_stats.words_loaded = 0;
+
+  for (uint32_t id = 0; id < CGRA_KMEM_DEPTH; id++) {
+    cgra_ovl_slots[id].index = CGRA_OVL_NONE;
+    for (int n = 0; n < CGRA_N_INSTANCES; n++) {
+      CGRA_KMEM_BASE(n)[id] = 0;
+    }
+  }
+  for (int c = 0; c < CGRA_N_COLS; c++) {
+    cgra_ovl_col_id[c] = 0;
+  }
+}
+
+uint32_t cgra_overlay_get(uint32_t index) {
+  uint32_t id, start;
+
+  if (index >= cgra_ovl_n_kernels) {
+    return 0;
+  }
+  const cgra_overlay_kernel_t *k = &cgra_ovl_table[index];
+  uint32_t size = (uint32_t) k->n_cols * k->n_instr;
+  cgra_ovl_clock++;
+
+  for (id = 1; id < CGRA_KMEM_DEPTH; id++) {
+    if (cgra_ovl_slots[id].index == index) {
+      break;
+    }
+  }
+
+  if (id < CGRA_KMEM_DEPTH) {
+    cgra_ovl_stats.hits++;
+  } else {
+    cgra_ovl_stats.misses++;
+    // Do not modify the memories under the queued kernels
+    cgra_queue_wait_idle();
+    while ((id = cgra_ovl_find_id()) == 0 || (start = cgra_ovl_find_space(size)) == CGRA_OVL_NONE) {
+      if (!cgra_ovl_evict_lru()) {
+        return 0;
+      }
+    }
+    if (!cgra_ovl_load(k, start, size)) {
+      return 0;
+    }
+    cgra_ovl_slots[id].index = index;
+    cgra_ovl_slots[id].start = start;
+    cgra_ovl_slots[id].size  = size;
+    uint32_t kmem_word = ((((uint32_t)1 << k->n_cols) - 1) << (CGRA_CMEM_BK_DEPTH_LOG2 + CGRA_RCS_NUM_CREG_LOG2)) |
+                         (start << CGRA_RCS_NUM_CREG_LOG2) | (uint32_t)(k->n_instr - 1);
+    for (int n = 0; n < CGRA_N_INSTANCES; n++) {
+      CGRA_KMEM_BASE(n)[id] = kmem_word;
+    }
+  }
+
+  cgra_ovl_slots[id].last_use = cgra_ovl_clock;
+  for (int c = 0; c < k->n_cols; c++) {
+    cgra_ovl_col_id[c] = id;
+  }
+  return id;
+}
+
+bool cgra_overlay_resident(uint32_t index) {
+  for (uint32_t id = 1; id < CGRA_KMEM_DEPTH; id++) {
+    if (cgra_ovl_slots[id].index == index) {
+      return true;
+    }
+  }
+  return false;
+}
+
+const cgra_overlay_stats_t *cgra_overlay_get_stats(void) {
+  return &cgra_ovl_stats;
+}
@@ -0,0 +1,81 @@
+// Copyright EPFL contributors.
+// Licensed under the Apache License, Version 2.0, see LICENSE for details.
+// SPDX-License-Identifier: Apache-2.0
+
+#ifndef _CGRA_OVERLAY_H_
+#define _CGRA_OVERLAY_H_
+
+#include <stdint.h>
+#include <stdbool.h>
+
+#include "cgra.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/**
+ * Kernel of a table generated by sw/utils/cgra_kernel_table.py.
+ */
+typedef struct cgra_overlay_kernel {
+  uint8_t  n_cols;
+  uint8_t  n_instr;
+  /**
+   * First word of the kernel in the table words. The kernel takes
+   * n_cols * n_instr words for each of the CGRA_N_ROWS rows.
+   */
+  uint32_t offset;
+} cgra_overlay_kernel_t;
+
+/**
+ * Overlay manager counters.
+ */
+typedef struct cgra_overlay_stats {
+  uint32_t hits;
+  uint32_t misses;
+  uint32_t evictions;
+  /**
+   * Context words copied into the CMEM.
+   */
+  uint32_t words_loaded;
+} cgra_overlay_stats_t;
+
+/**
+ * Initialize the overlay manager. The KMEM is cleared, so no kernel is resident.
+ * The DMA must have been initialized with dma_sdk_init() and, for a table in
+ * flash, the SPI flash with w25q128jw_init().
+ * @param table Kernel descriptors.
+ * @param n_kernels Number of kernels in the table.
+ * @param words Table words (cgra_kernel_table_words).
+ * @param from_flash The words are in the flash-only section (FLASH_LOAD linker script).
+ * @param channel DMA channel for the copies from memory.
+ */
+void cgra_overlay_init(const cgra_overlay_kernel_t *table, uint32_t n_kernels, const uint32_t *words, bool from_flash, uint8_t channel);
+
+/**
+ * Make a kernel of the table resident and return its kernel ID. On a miss the
+ * least recently used kernels are evicted until the kernel fits in the CMEM,
+ * after the kernels queued in the driver have completed. The returned ID is
+ * assumed to be the next one launched.
+ * @param index Kernel index in the table (CGRA_KT_<NAME>).
+ * @return Kernel ID for cgra_set_kernel()/cgra_submit(), 0 if the kernel does
+ * not exist or the flash read failed.
+ */
+uint32_t cgra_overlay_get(uint32_t index);
+
+/**
+ * Check whether a kernel of the table is resident in the CMEM.
+ * @param index Kernel index in the table.
+ */
+bool cgra_overlay_resident(uint32_t index);
+
+/**
+ * Get the overlay manager counters.
+ */
+const cgra_overlay_stats_t *cgra_overlay_get_stats(void);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif // _CGRA_OVERLAY_H_
@@ -0,0 +1,126 @@
+// Copyright EPFL contributors.
+// Licensed under the Apache License, Version 2.0, see LICENSE for details.
+// SPDX-License-Identifier: Apache-2.0
+
+#include <stddef.h>
+#include <stdint.h>
+
+#include "cgra.h"
+#include "cgra_stream.h"
+#include "csr.h"
+#include "hart.h"
+#include "dma_sdk.h"
+
+static bool cgra_stream_busy(const cgra_stream_port_t *port) {
+  return dma_is_ready(port->channel) == 0;
+}
+
+static void cgra_stream_wait(const cgra_stream_port_t *port) {
+  while (cgra_stream_busy(port)) {
+    // Transfers started by the driver raise the DMA interrupt, the ones
+    // started by a user function may not: poll those
+    if (port->kind != CGRA_STREAM_FN) {
+      CSR_CLEAR_BITS(CSR_REG_MSTATUS, 0x8);
+      if (cgra_stream_busy(port)) {
+        wait_for_interrupt();
+      }
+      CSR_SET_BITS(CSR_REG_MSTATUS, 0x8);
+    }
+  }
+}
+
+static void cgra_stream_xfer(const cgra_stream_port_t *port, uint32_t tile, uint32_t *buf, uint32_t words, bool to_buf) {
+  // Ports sharing a channel are serialized here
+  cgra_stream_wait(port);
+
+  if (port->kind == CGRA_STREAM_FN) {
+    port->fn(port->arg, tile, buf, words);
+    return;
+  }
+
+  volatile dma *the_dma = dma_peri(port->channel);
+  uint32_t ext = port->kind == CGRA_STREAM_MEM ? port->addr + tile*port->stride : port->addr;
+  uint32_t src = to_buf ? ext : (uint32_t) buf;
+  uint32_t dst = to_buf ? (uint32_t) buf : ext;
+
+  DMA_COPY(dst, src, words, DMA_DATA_TYPE_WORD, DMA_DATA_TYPE_WORD, 0, the_dma);
+  if (port->kind == CGRA_STREAM_PERIPH) {
+    // The peripheral side keeps its address and paces the transfer
+    if (to_buf) {
+      the_dma->SRC_PTR_INC_D1 = 0;
+      the_dma->SLOT = ((uint32_t) port->slot & DMA_SLOT_RX_TRIGGER_SLOT_MASK) << DMA_SLOT_RX_TRIGGER_SLOT_OFFSET;
+    } else {
+      the_dma->DST_PTR_INC_D1 = 0;
+      the_dma->SLOT = ((uint32_t) port->slot & DMA_SLOT_TX_TRIGGER_SLOT_MASK) << DMA_SLOT_TX_TRIGGER_SLOT_OFFSET;
+    }
+  } else {
+    the_dma->SLOT = 0;
+  }
+  // Writing the size starts the transaction
+  the_dma->SIZE_D1 = (uint32_t)(words & DMA_SIZE_D1_SIZE_MASK);
+}
+
+static void cgra_stream_drain(const cgra_stream_t *s, uint32_t tile) {
+  uint32_t *buf = s->out_buf[tile & 1];
+
+  if (s->tile_fn != NULL) {
+    s->tile_fn(s->tile_arg, tile, buf);
+  }
+  cgra_stream_xfer(&s->out, tile, buf, s->out_words, false);
+}
+
+uint32_t cgra_stream_run(const cgra_stream_t *s) {
+  cgra_ptr_cfg_t ptrs;
+  cgra_job_t *job;
+  uint32_t dma_bound = 0;
+
+  if (s->n_tiles == 0) {
+    return 0;
+  }
+
+  ptrs.n_cols = s->n_cols;
+  if (s->in_words) {
+    cgra_stream_xfer(&s->in, 0, s->in_buf[0], s->in_words, true);
+  }
+
+  for (uint32_t i = 0; i < s->n_tiles; i++) {
+    uint32_t b = i & 1;
+
+    // Tile i must be in and out_buf[b] (tile i-2) sent out
+    if (s->in_words) {
+      cgra_stream_wait(&s->in);
+    }
+    if (s->out_words) {
+      cgra_stream_wait(&s->out);
+    }
+
+    for (int c = 0; c < s->n_cols; c++) {
+      ptrs.read_ptr[c]  = (uint32_t) s->in_buf[b] + s->in_offset[c];
+      ptrs.write_ptr[c] = (uint32_t) s->out_buf[b] + s->out_offset[c];
+    }
+    // The queue may hold jobs submitted by the application
+    while ((job = cgra_submit(s->kernel_id, &ptrs, NULL, NULL)) == NULL) {
+      cgra_queue_wait_idle();
+    }
+
+    // Overlap the transfers of the neighbouring tiles with the kernel
+    if (s->in_words && i + 1 < s->n_tiles) {
+      cgra_stream_xfer(&s->in, i + 1, s->in_buf[b ^ 1], s->in_words, true);
+    }
+    if (s->out_words && i > 0) {
+      cgra_stream_drain(s, i - 1);
+    }
+
+    cgra_job_wait(job);
+    if ((s->in_words && cgra_stream_busy(&s->in)) || (s->out_words && cgra_stream_busy(&s->out))) {
+      dma_bound++;
+    }
+  }
+
+  if (s->out_words) {
+    cgra_stream_drain(s, s->n_tiles - 1);
+    cgra_stream_wait(&s->out);
+  }
+
+  return dma_bound;
+}
@@ -0,0 +1,132 @@
+// Copyright EPFL contributors.
+// Licensed under the Apache License, Version 2.0, see LICENSE for details.
+// SPDX-License-Identifier: Apache-2.0
+
+#ifndef _CGRA_STREAM_H_
+#define _CGRA_STREAM_H_
+
+#include <stdint.h>
+#include <stdbool.h>
+
+#include "cgra.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/**
+ * Where the tiles of a stream come from (input) or go to (output).
+ */
+typedef enum cgra_stream_kind {
+  /**
+   * Tiles are in memory, tile t at addr + t*stride.
+   */
+  CGRA_STREAM_MEM    = 0,
+  /**
+   * Tiles are read from/written to a fixed peripheral address, the transfer
+   * being paced by a DMA trigger slot (e.g. DMA_TRIG_SLOT_SPI_RX).
+   */
+  CGRA_STREAM_PERIPH = 1,
+  /**
+   * Each transfer is started by a user function, for sources the DMA cannot
+   * read directly (e.g. the SPI flash with w25q128jw_read_standard_dma_async()).
+   * The function must use the DMA channel of the port.
+   */
+  CGRA_STREAM_FN     = 2,
+} cgra_stream_kind_t;
+
+/**
+ * Start the transfer of a tile between the port and an on-chip buffer.
+ * @param arg User data of the port.
+ * @param tile Tile index.
+ * @param buf On-chip ping-pong buffer of the tile.
+ * @param words Tile size in 32-bit words.
+ */
+typedef void (*cgra_stream_xfer_fn_t)(void *arg, uint32_t tile, uint32_t *buf, uint32_t words);
+
+/**
+ * Called on each output tile once the CGRA is done with it, before it is sent
+ * out. It runs while the CGRA processes the next tile.
+ */
+typedef void (*cgra_stream_tile_fn_t)(void *arg, uint32_t tile, uint32_t *buf);
+
+/**
+ * One end of a stream.
+ */
+typedef struct cgra_stream_port {
+  cgra_stream_kind_t    kind;
+  /**
+   * CGRA_STREAM_MEM: address of tile 0. CGRA_STREAM_PERIPH: peripheral FIFO address.
+   */
+  uint32_t              addr;
+  /**
+   * CGRA_STREAM_MEM: bytes between consecutive tiles. It can be smaller than
+   * the tile size to make input tiles overlap (e.g. stencil halos).
+   */
+  uint32_t              stride;
+  /**
+   * CGRA_STREAM_PERIPH: DMA trigger slot mask of the peripheral.
+   */
+  uint16_t              slot;
+  /**
+   * DMA channel of the port. Input and output ports on different channels
+   * transfer in parallel, on the same channel they are serialized.
+   */
+  uint8_t               channel;
+  /**
+   * CGRA_STREAM_FN: transfer function and its user data.
+   */
+  cgra_stream_xfer_fn_t fn;
+  void                 *arg;
+} cgra_stream_port_t;
+
+/**
+ * A tiled loop: the same kernel runs on every tile. While the CGRA processes
+ * tile i from in_buf[i%2] into out_buf[i%2], the DMA brings tile i+1 into the
+ * other input buffer and sends tile i-1 out of the other output buffer.
+ */
+typedef struct cgra_stream {
+  uint32_t              kernel_id;
+  uint32_t              n_tiles;
+  /**
+   * Input and output tile sizes in 32-bit words. 0 disables that direction
+   * (e.g. a kernel that generates data or only reduces it in place).
+   */
+  uint32_t              in_words;
+  uint32_t              out_words;
+  /**
+   * Ping-pong buffers in on-chip memory, in_words and out_words each.
+   */
+  uint32_t             *in_buf[2];
+  uint32_t             *out_buf[2];
+  /**
+   * Number of columns used by the kernel and the byte offset of their read
+   * (LWD) and write (SWD) pointers within the input and output tile.
+   */
+  uint8_t               n_cols;
+  uint32_t              in_offset[CGRA_N_COLS];
+  uint32_t              out_offset[CGRA_N_COLS];
+  cgra_stream_port_t    in;
+  cgra_stream_port_t    out;
+  /**
+   * Optional output tile hook and its user data.
+   */
+  cgra_stream_tile_fn_t tile_fn;
+  void                 *tile_arg;
+} cgra_stream_t;
+
+/**
+ * Run a tiled loop to completion. The kernels are launched through the driver
+ * queue, so cgra_queue_init() and dma_sdk_init() must have been called and the
+ * bitstream loaded.
+ * @param s Stream description.
+ * @return Number of tiles for which the CGRA finished before the DMA, i.e.
+ * the loop was limited by the data transfers.
+ */
+uint32_t cgra_stream_run(const cgra_stream_t *s);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif // _CGRA_STREAM_H_
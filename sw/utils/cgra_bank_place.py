@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+CGRA Buffer Placement on the Memory Banks
+
+Each CGRA column is a bus master. When the LWD/SWD streams of several
+columns hit the same SRAM bank in a step, the bank grants them one per
+cycle and the columns stall. By default the buffers go wherever the linker
+puts .data/.bss, usually one contiguous bank. This script traces the
+accesses of a kernel on the behavioural model (cgra_sim.py), then assigns
+each buffer to a linker section of the memory map (an interleaved bank group
+or a distinct contiguous bank) so that the columns spread over the banks.
+
+The memory map is read from the files generated by mcu-gen (X-HEEP):
+    core_v_mini_mcu.h   RAM<n>_START_ADDRESS / RAM<n>_END_ADDRESS of every
+                        bank; the banks of an interleaved group share the
+                        same range, consecutive words go to consecutive banks
+    link.ld             the ram<i> regions and the .xheep_<name> sections
+                        (ram_banks with auto_section, linker_sections)
+Only the banks behind an .xheep_<name> section can be chosen, add the
+sections to the X-HEEP configuration first. The other buffers stay in the
+data section (ram1), where they are assumed to be packed in declaration
+order from its start.
+
+Kernels are given as:
+    csv     an instructions.csv with its buffers (--buffer NAME:WORDS) and
+            the column pointers into them (--ptr-in NAME+BYTES ...), as set
+            up by cgra_create_app.py
+    kernel  a cgra_kernel_gen.py template, as a JSON object (inline or file)
+            with the template ("kind"), its problem parameters and optionally
+            "cols"; its buffers are those of the template's simulate()
+
+Conflict model: in a step, a column issues its accesses one per cycle and a
+bank serves one access per cycle, so the memory phase of the step takes the
+largest of the two counts. The extra cycles over the per-column count are
+the predicted conflicts. This assumes the NtoM bus, the onetoM bus
+serialises all masters whatever the banks.
+
+The placement is greedy: buffers with the most accesses first, each one
+moved to the section that minimises the conflicts of the whole trace, if it
+fits. The output header defines one attribute macro per buffer:
+
+    int32_t FIR_X_PLACEMENT fir_x[256] = { ... };
+
+Usage:
+    python cgra_bank_place.py csv instructions.csv --buffer in:256 --buffer out:256 --ptr-in in in+512 --ptr-out out out+512
+    python cgra_bank_place.py kernel '{"kind": "fir", "taps": [1, 2, 1], "length": 256}' -o cgra_placement.h -v
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import generate_bitstream as gb
+import cgra_sim
+
+REPO_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+XHEEP_DIR = os.path.join(REPO_DIR, 'hw', 'vendor', 'esl_epfl_x_heep')
+DEFAULT_HEADER = os.path.join(XHEEP_DIR, 'sw', 'device', 'lib', 'runtime', 'core_v_mini_mcu.h')
+DEFAULT_LINKER = os.path.join(XHEEP_DIR, 'sw', 'linker', 'link.ld')
+
+DATA_REGION = 'ram1'                # .data/.bss, see link.ld.tpl
+
+BANK_RE = re.compile(r'#define\s+RAM(\w+)_(START|END)_ADDRESS\s+(0x[0-9a-fA-F]+)')
+REGION_RE = re.compile(r'^\s*(ram\d+)\s*\([^)]*\)\s*:\s*ORIGIN\s*=\s*(0x[0-9a-fA-F]+)\s*,'
+                       r'\s*LENGTH\s*=\s*(0x[0-9a-fA-F]+)', re.M)
+SECTION_RE = re.compile(r'^\s*\.(\w+)\s*:\s*\{[^}]*\*\(\.xheep_\1\)[^}]*\}\s*>\s*(ram\d+)', re.M)
+
+# (column, buffer, byte offset, is_write) of each access of a step
+Access = Tuple[int, str, int, bool]
+
+
+# =============================================================================
+# Memory map
+# =============================================================================
+
+class MemoryMap:
+    """RAM banks and the address ranges buffers can be linked in."""
+
+    def __init__(self, banks: List[Tuple[str, int, int]], regions: List[dict]):
+        # Banks with the same range form an interleaved group
+        self.groups: List[Tuple[int, int, List[str]]] = []
+        for name, start, end in banks:
+            for g_start, g_end, names in self.groups:
+                if (g_start, g_end) == (start, end):
+                    names.append(name)
+                    break
+            else:
+                self.groups.append((start, end, [name]))
+        self.regions = regions
+        for reg in regions:
+            reg['banks'] = self.banks_in(reg['start'], reg['end'])
+            reg['il'] = max((len(names) for start, end, names in self.groups
+                             if start <= reg['start'] < end), default=1)
+
+    def bank_of(self, addr: int) -> Optional[str]:
+        for start, end, names in self.groups:
+            if start <= addr < end:
+                return names[((addr - start) >> 2) % len(names)]
+        return None
+
+    def banks_in(self, start: int, end: int) -> List[str]:
+        return [n for g_start, g_end, names in self.groups
+                if g_start < end and start < g_end for n in names]
+
+    def region(self, name: str) -> dict:
+        return next(r for r in self.regions if r['name'] == name)
+
+
+def parse_memory_map(header_path: str, linker_path: str) -> MemoryMap:
+    """Read the banks from core_v_mini_mcu.h and the sections from link.ld."""
+    with open(header_path) as f:
+        header = f.read()
+    with open(linker_path) as f:
+        linker = f.read()
+
+    ranges: Dict[str, Dict[str, int]] = {}
+    for name, which, addr in BANK_RE.findall(header):
+        ranges.setdefault(name, {})[which] = int(addr, 16)
+    banks = [(name, r['START'], r['END']) for name, r in ranges.items() if len(r) == 2]
+    if not banks:
+        raise ValueError(f"{header_path}: no RAM<n>_START_ADDRESS / RAM<n>_END_ADDRESS defines")
+
+    mem_regions = {name: (int(org, 16), int(org, 16) + int(length, 16))
+                   for name, org, length in REGION_RE.findall(linker)}
+    if DATA_REGION not in mem_regions:
+        raise ValueError(f"{linker_path}: no {DATA_REGION} memory region")
+    regions = [{'name': 'data', 'section': None, 'start': mem_regions[DATA_REGION][0],
+                'end': mem_regions[DATA_REGION][1]}]
+    for name, ram in SECTION_RE.findall(linker):
+        if ram in mem_regions:
+            regions.append({'name': name, 'section': f'.xheep_{name}',
+                            'start': mem_regions[ram][0], 'end': mem_regions[ram][1]})
+    return MemoryMap(banks, regions)
+
+
+def describe_region(reg: dict) -> str:
+    banks = reg['banks']
+    span = banks[0] if len(banks) == 1 else f"{banks[0]}-{banks[-1]}"
+    kind = f"{reg['il']} interleaved banks" if reg['il'] > 1 else ('bank' if len(banks) == 1 else 'banks')
+    return f"{reg['name']} ({kind} {span})"
+
+
+# =============================================================================
+# Access traces
+# =============================================================================
+
+def _buffer_trace(trace: List[list], allocs: Sequence[Tuple[int, int]],
+                  names: Sequence[str]) -> List[List[Access]]:
+    """Turn the (column, address, is_write) trace into buffer offsets."""
+    spans = [(addr, addr + 4 * max(words, 1), name) for (addr, words), name in zip(allocs, names)]
+    out = []
+    for step in trace:
+        acc = []
+        for col, addr, is_write in step:
+            for start, end, name in spans:
+                if start <= addr < end:
+                    acc.append((col, name, addr - start, is_write))
+                    break
+        out.append(acc)
+    return out
+
+
+def trace_csv(csv_path: str, buffers: Sequence[Tuple[str, int]],
+              ptr_in: Sequence[Tuple[str, int]], ptr_out: Sequence[Tuple[str, int]],
+              agen_in: Sequence[Tuple[int, int]] = (),
+              agen_out: Sequence[Tuple[int, int]] = ()) -> Tuple[Dict[str, int], List[List[Access]]]:
+    """Run a kernel CSV with its column pointers in the given buffers."""
+    num_instr, instructions = gb.parse_csv(csv_path)
+    mem = cgra_sim.Memory()
+    base = {name: mem.alloc(size=words) for name, words in buffers}
+    for name, _ in list(ptr_in) + list(ptr_out):
+        if name not in base:
+            raise ValueError(f"Column pointer into unknown buffer '{name}'")
+    kmem, cmem = gb.build_memories(num_instr, instructions)
+    sim = cgra_sim.CgraSim(kmem, cmem, mem, trace=[])
+    sim.run(1, [base[n] + off for n, off in ptr_in], [base[n] + off for n, off in ptr_out],
+            agen_in, agen_out)
+    return dict(buffers), _buffer_trace(sim.trace, mem.allocs, [n for n, _ in buffers])
+
+
+def trace_kernel(spec: dict) -> Tuple[Dict[str, int], List[List[Access]]]:
+    """Autotune a cgra_kernel_gen.py template and run it on random stimuli."""
+    import cgra_kernel_gen as kg
+
+    spec = dict(spec)
+    kind = spec.pop('kind', None)
+    if kind not in kg.TEMPLATES:
+        raise ValueError(f"Unknown template '{kind}', expected one of {', '.join(kg.TEMPLATES)}")
+    fixed = {'n_cols': spec.pop('cols')} if 'cols' in spec else None
+    kernel, _ = kg.autotune(kind, fixed, **spec)
+    kernel.trace = []
+    kernel.simulate(kernel.make_inputs(np.random.default_rng(0)))
+    names = [f"{kernel.name}_{b}" for b in kernel.buffers]
+    allocs = kernel.sim.mem.allocs
+    return ({n: words for n, (_, words) in zip(names, allocs)},
+            _buffer_trace(kernel.trace, allocs, names))
+
+
+# =============================================================================
+# Placement
+# =============================================================================
+
+def addresses(placement: Dict[str, str], buffers: Dict[str, int], mmap: MemoryMap) -> Dict[str, int]:
+    """Base address of each buffer, packed in declaration order in its region."""
+    base = {}
+    used = {}
+    for name, words in buffers.items():
+        reg = mmap.region(placement[name])
+        align = 4 * reg['il']
+        addr = reg['start'] + used.get(reg['name'], 0)
+        addr = (addr + align - 1) // align * align
+        if addr + 4 * words > reg['end']:
+            raise ValueError(f"{name} does not fit in {reg['name']}")
+        base[name] = addr
+        used[reg['name']] = addr + 4 * words - reg['start']
+    return base
+
+
+def conflicts(trace: List[List[Access]], base: Dict[str, int],
+              mmap: MemoryMap) -> List[Tuple[int, int, Dict[str, List[int]]]]:
+    """Steps with bank conflicts: (step, extra cycles, {bank: columns})."""
+    out = []
+    for step, acc in enumerate(trace):
+        if len(acc) < 2:
+            continue
+        per_col: Dict[int, int] = {}
+        per_bank: Dict[str, List[int]] = {}
+        for col, name, off, _ in acc:
+            per_col[col] = per_col.get(col, 0) + 1
+            per_bank.setdefault(mmap.bank_of(base[name] + off), []).append(col)
+        extra = max(len(cols) for cols in per_bank.values()) - max(per_col.values())
+        if extra > 0:
+            out.append((step, extra, {b: cols for b, cols in per_bank.items() if len(cols) > 1}))
+    return out
+
+
+def cost(trace, placement, buffers, mmap) -> Optional[int]:
+    try:
+        base = addresses(placement, buffers, mmap)
+    except ValueError:
+        return None
+    return sum(extra for _, extra, _ in conflicts(trace, base, mmap))
+
+
+def place(trace: List[List[Access]], buffers: Dict[str, int], mmap: MemoryMap) -> Dict[str, str]:
+    """Greedy assignment of the buffers to the regions of the memory map."""
+    placement = {name: 'data' for name in buffers}
+    count = {name: 0 for name in buffers}
+    for acc in trace:
+        for _, name, _, _ in acc:
+            count[name] += 1
+    best = cost(trace, placement, buffers, mmap)
+    for name in sorted(buffers, key=lambda n: -count[n]):
+        if not count[name]:
+            continue
+        for reg in mmap.regions[1:]:
+            trial = dict(placement, **{name: reg['name']})
+            c = cost(trace, trial, buffers, mmap)
+            if c is not None and (best is None or c < best):
+                placement, best = trial, c
+    return placement
+
+
+def _columns(trace: List[List[Access]], name: str) -> str:
+    cols = sorted({col for acc in trace for col, n, _, _ in acc if n == name})
+    if not cols:
+        return 'not accessed'
+    rw = {w for acc in trace for _, n, _, w in acc if n == name}
+    kind = 'read/written' if len(rw) == 2 else ('written' if True in rw else 'read')
+    span = str(cols[0]) if len(cols) == 1 else f"{cols[0]}-{cols[-1]}"
+    return f"{kind} by column{'s' if len(cols) > 1 else ''} {span}"
+
+
+def placement_header(placement: Dict[str, str], buffers: Dict[str, int],
+                     trace: List[List[Access]], mmap: MemoryMap) -> str:
+    lines = ["#ifndef _CGRA_PLACEMENT_H_",
+             "#define _CGRA_PLACEMENT_H_",
+             "",
+             "// Placement of the CGRA buffers on the memory banks",
+             "// Generated by cgra_bank_place.py",
+             ""]
+    for name, words in buffers.items():
+        reg = mmap.region(placement[name])
+        macro = f"{name.upper()}_PLACEMENT"
+        lines.append(f"// {name}: {words} words, {_columns(trace, name)} -> {describe_region(reg)}")
+        lines.append(f"//   int32_t {macro} {name}[{words}];")
+        if reg['section']:
+            lines.append(f"#define {macro} __attribute__((section(\"{reg['section']}\"))) "
+                         f"__attribute__ ((aligned ({4 * reg['il']})))")
+        else:
+            lines.append(f"#define {macro}")
+        lines.append("")
+    lines.append("#endif // _CGRA_PLACEMENT_H_")
+    return "\n".join(lines) + "\n"
+
+
+def format_conflicts(confl) -> str:
+    steps = len(confl)
+    extra = sum(e for _, e, _ in confl)
+    return f"{extra} extra cycles in {steps} step{'s' if steps != 1 else ''}"
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _buffer_arg(text: str) -> Tuple[str, int]:
+    name, _, words = text.partition(':')
+    if not name.isidentifier() or not words:
+        raise argparse.ArgumentTypeError(f"expected NAME:WORDS, got '{text}'")
+    return name, int(words, 0)
+
+
+def _ptr_arg(text: str) -> Tuple[str, int]:
+    name, _, off = text.partition('+')
+    return name, int(off or '0', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Place the CGRA buffers on the memory banks')
+    sub = parser.add_subparsers(dest='source', required=True)
+
+    def common(p):
+        p.add_argument('--header', default=DEFAULT_HEADER, help='Generated core_v_mini_mcu.h (default: %(default)s)')
+        p.add_argument('--linker', default=DEFAULT_LINKER, help='Generated link.ld (default: %(default)s)')
+        p.add_argument('-o', '--output', default=None, help='Write the placement macros to this header')
+        p.add_argument('-v', '--verbose', action='store_true', help='List the conflicts of every step')
+
+    p = sub.add_parser('csv', help='Kernel CSV with its buffers and column pointers')
+    p.add_argument('input', help='Kernel CSV (instructions.csv)')
+    p.add_argument('--buffer', type=_buffer_arg, action='append', required=True,
+                   help='Buffer as NAME:WORDS, in declaration order (repeat)')
+    p.add_argument('--ptr-in', type=_ptr_arg, nargs='*', default=[], help='Read pointer per column, NAME[+BYTES]')
+    p.add_argument('--ptr-out', type=_ptr_arg, nargs='*', default=[], help='Write pointer per column, NAME[+BYTES]')
+    p.add_argument('--agen-in', nargs='*', default=[], type=cgra_sim.parse_agen,
+                   help='2-D read addressing per column, as INNER_CNT:OUTER_STRIDE (bytes)')
+    p.add_argument('--agen-out', nargs='*', default=[], type=cgra_sim.parse_agen,
+                   help='2-D write addressing per column, as INNER_CNT:OUTER_STRIDE (bytes)')
+    common(p)
+
+    p = sub.add_parser('kernel', help='cgra_kernel_gen.py template')
+    p.add_argument('spec', help='JSON object or file, e.g. {"kind": "fir", "taps": [1, 2, 1], "length": 256}')
+    common(p)
+
+    args = parser.parse_args()
+    for path in (args.header, args.linker):
+        if not os.path.exists(path):
+            sys.exit(f"ERROR: {path} not found, run 'make mcu-gen' first or give --header/--linker")
+    try:
+        mmap = parse_memory_map(args.header, args.linker)
+        if args.source == 'csv':
+            buffers, trace = trace_csv(args.input, args.buffer, args.ptr_in, args.ptr_out,
+                                       args.agen_in, args.agen_out)
+        else:
+            if os.path.exists(args.spec):
+                with open(args.spec) as f:
+                    spec = json.load(f)
+            else:
+                spec = json.loads(args.spec)
+            buffers, trace = trace_kernel(spec)
+        default = {name: 'data' for name in buffers}
+        base0 = addresses(default, buffers, mmap)
+    except (OSError, ValueError, RuntimeError) as e:
+        sys.exit(f"ERROR: {e}")
+
+    placement = place(trace, buffers, mmap)
+    base = addresses(placement, buffers, mmap)
+    before = conflicts(trace, base0, mmap)
+    after = conflicts(trace, base, mmap)
+
+    print("Sections: " + ", ".join(describe_region(r) for r in mmap.regions))
+    if len(mmap.regions) == 1:
+        print("  no .xheep_<name> section: add ram_banks with auto_section to the X-HEEP configuration")
+    print(f"{'buffer':20s} {'words':>6s}  {'address':>10s}  section")
+    for name, words in buffers.items():
+        print(f"{name:20s} {words:6d}  0x{base[name]:08x}  {describe_region(mmap.region(placement[name]))}"
+              f"  ({_columns(trace, name)})")
+    print(f"Steps with memory accesses: {sum(1 for acc in trace if acc)} of {len(trace)}")
+    print(f"Bank conflicts, all in data: {format_conflicts(before)}")
+    print(f"Bank conflicts, placed:      {format_conflicts(after)}")
+    if args.verbose:
+        for step, extra, banks in after:
+            print(f"  step {step:6d}  +{extra}  " +
+                  ", ".join(f"bank {b}: cols {','.join(map(str, cols))}" for b, cols in banks.items()))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(placement_header(placement, buffers, trace, mmap))
+        print(f"Written {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+CGRA Design-Space Exploration
+
+Enumerates geometries of the cgra block of heepsilon_cfg.hjson (num_columns,
+num_rows, rcs_num_instr, cmem_bk_depth, kmem_depth), maps a kernel set on
+each of them with the templates of cgra_kernel_gen.py and runs it on the
+behavioural model (cgra_sim.py), in parallel worker processes. The output is
+the cycles of the kernel set against an area proxy of every point, and the
+Pareto front of the two. Only the points of the front need an RTL build.
+
+For each point and kernel the best variant of the template is kept
+(autotune), or the CPU version when no variant fits the geometry or the CPU
+is faster. The kernels stay in the context memory when they all fit in it
+(sum of num_instr x columns <= cmem_bk_depth and one kmem entry each), else
+every launch reloads its words, CMEM_LOAD_CYCLES_PER_WORD each.
+
+Points whose kernel configuration word is wider than 32 bits (the check of
+cgra_bitstream_gen.py) are left out, as well as the ones beyond --max-rcs /
+--max-cmem-kbit.
+
+Area proxy, in gate equivalents (see DEFAULT_AREA):
+    rc        per RC (ALU, multiplier, register file)
+    ctx_bit   per bit of the instruction registers of the RCs
+              (rcs_num_instr words of 32 bits each)
+    col       per column (controller, bus master port)
+    cmem_bit  per bit of the context memory banks (one per row)
+    kmem_bit  per bit of the kernel memory
+The defaults are placeholders sized relative to each other, calibrate them
+with synthesis results and pass them with --area (JSON object).
+
+Kernel set (--kernels, JSON list, default DEFAULT_KERNELS): one object per
+kernel with the template ("kind"), its problem parameters as in
+cgra_kernel_gen.py and optionally "launches" (per pass of the set, default 1).
+
+Results are cached per point in --cache, keyed by the geometry, the kernel
+set and the source of the model, so a wider sweep only runs the new points.
+
+Usage:
+    python cgra_dse.py --cols 1,2,4 --rows 2,4 --instr 16,32,64
+    python cgra_dse.py --cols 2,4,8 --rows 4,8 --kmem 8,16 --kernels set.json --csv dse.csv -j 8
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil, log2
+from typing import Dict, List, Optional, Sequence
+
+import generate_bitstream as gb
+import cgra_kernel_gen as kg
+
+CMEM_LOAD_CYCLES_PER_WORD = 4  # CPU copy loop, one 32-bit store per word
+
+DEFAULT_AREA = {
+    'rc': 4000.0,
+    'ctx_bit': 6.0,
+    'col': 1500.0,
+    'cmem_bit': 1.0,
+    'kmem_bit': 6.0,
+}
+
+DEFAULT_KERNELS = [
+    {'kind': 'gemm', 'm': 16, 'n': 16, 'k': 16},
+    {'kind': 'fir', 'taps': [1, -2, 3, 4, 3, -2, 1], 'length': 256},
+    {'kind': 'conv2d', 'weights': [[1, 2, 1], [2, 4, 2], [1, 2, 1]], 'height': 16, 'width': 16},
+    {'kind': 'reduce', 'op': 'sum', 'length': 1024},
+    {'kind': 'reduce', 'op': 'max', 'length': 1024},
+]
+
+GEOMETRY_KEYS = ('num_columns', 'num_rows', 'rcs_num_instr', 'cmem_bk_depth', 'kmem_depth')
+
+# The cache is invalidated when the model changes
+_MODEL_SOURCES = ('cgra_dse.py', 'cgra_kernel_gen.py', 'cgra_sim.py', 'generate_bitstream.py')
+
+
+def kmem_width(point: dict) -> int:
+    return (point['num_columns'] + int(ceil(log2(point['cmem_bk_depth']))) +
+            int(ceil(log2(point['rcs_num_instr']))))
+
+
+def area_proxies(point: dict) -> Dict[str, int]:
+    """Resources of a geometry, in the units of DEFAULT_AREA."""
+    rcs = point['num_columns'] * point['num_rows']
+    return {
+        'rc': rcs,
+        'ctx_bit': rcs * point['rcs_num_instr'] * gb.CGRA_CMEM_WIDTH,
+        'col': point['num_columns'],
+        'cmem_bit': point['num_rows'] * point['cmem_bk_depth'] * gb.CGRA_CMEM_WIDTH,
+        'kmem_bit': point['kmem_depth'] * kmem_width(point),
+    }
+
+
+def area(point: dict, weights: Dict[str, float]) -> float:
+    return sum(n * weights[k] for k, n in area_proxies(point).items())
+
+
+def load_area(path: Optional[str]) -> Dict[str, float]:
+    """Default area weights updated with the ones of a JSON file."""
+    weights = dict(DEFAULT_AREA)
+    if path:
+        with open(path) as f:
+            user = json.load(f)
+        unknown = set(user) - set(weights)
+        if unknown:
+            raise ValueError(f"{path}: unknown area weight(s) {', '.join(sorted(unknown))}")
+        weights.update({k: float(v) for k, v in user.items()})
+    return weights
+
+
+def enumerate_points(cols: Sequence[int], rows: Sequence[int], instr: Sequence[int],
+                     cmem: Sequence, kmem: Sequence[int], max_rcs: Optional[int] = None,
+                     max_cmem_bits: Optional[int] = None) -> List[dict]:
+    """
+    Every combination of the parameters that passes the constraints.
+
+    cmem entries are depths or 'default' (num_columns x rcs_num_instr, as in
+    heepsilon_gen.py); depths smaller than that are skipped since a kernel
+    using every column and instruction would not fit.
+    """
+    points = []
+    for c, r, i, d, k in itertools.product(cols, rows, instr, cmem, kmem):
+        depth = c * i if d == 'default' else int(d)
+        point = dict(num_columns=c, num_rows=r, rcs_num_instr=i, cmem_bk_depth=depth, kmem_depth=k)
+        if depth < c * i or depth & (depth - 1) or i & (i - 1):
+            continue
+        if kmem_width(point) > 32:
+            continue
+        if max_rcs and c * r > max_rcs:
+            continue
+        if max_cmem_bits and r * depth * gb.CGRA_CMEM_WIDTH > max_cmem_bits:
+            continue
+        if point not in points:
+            points.append(point)
+    return points
+
+
+def _problem(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k not in ('kind', 'launches', 'cpu_cycles')}
+
+
+def cpu_reference(kernel_set: List[dict]) -> List[dict]:
+    """Add the CPU-only cycles of every kernel (independent of the geometry)."""
+    gb.configure()
+    out = []
+    for entry in kernel_set:
+        cls = kg.TEMPLATES[entry['kind']]
+        cycles = None
+        for params in cls.variants(**_problem(entry)):
+            try:
+                cycles = cls(**params).cpu_cycles()
+                break
+            except ValueError:
+                continue
+        if cycles is None:
+            raise ValueError(f"No {entry['kind']} variant fits the default CGRA for {_problem(entry)}")
+        out.append(dict(entry, cpu_cycles=cycles))
+    return out
+
+
+def evaluate_point(point: dict, kernel_set: List[dict]) -> dict:
+    """
+    Map and run the kernel set on one geometry.
+
+    kernel_set entries must carry their CPU cycles (cpu_reference()).
+    """
+    gb.configure(**point)
+    kernels, total, footprint = [], 0, 0
+    for entry in kernel_set:
+        launches = entry.get('launches', 1)
+        res = {'kind': entry['kind'], 'cycles': entry['cpu_cycles'], 'on_cgra': False,
+               'variant': 'CPU', 'num_instr': 0, 'n_cols': 0}
+        try:
+            best, results = kg.autotune(entry['kind'], **_problem(entry))
+            cycles = min(c for _, c, _ in results)
+            if cycles < entry['cpu_cycles']:
+                res.update(cycles=cycles, on_cgra=True, variant=best.describe(),
+                           num_instr=best.num_instr, n_cols=best.n_cols)
+                footprint += best.num_instr * best.n_cols
+        except ValueError:
+            pass
+        res['launches'] = launches
+        kernels.append(res)
+
+    on_cgra = [k for k in kernels if k['on_cgra']]
+    resident = (footprint <= point['cmem_bk_depth'] and len(on_cgra) + 1 <= point['kmem_depth'])
+    for k in kernels:
+        reload = 0
+        if k['on_cgra'] and not resident:
+            reload = k['num_instr'] * k['n_cols'] * point['num_rows'] * CMEM_LOAD_CYCLES_PER_WORD
+        total += (k['cycles'] + reload) * k['launches']
+    return {'point': point, 'cycles': total, 'resident': resident,
+            'on_cgra': len(on_cgra), 'kernels': kernels}
+
+
+def _model_hash() -> str:
+    h = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in _MODEL_SOURCES:
+        with open(os.path.join(here, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def cache_key(point: dict, kernel_set: List[dict], model: str) -> str:
+    text = json.dumps({'point': point, 'kernels': kernel_set, 'model': model}, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:24]
+
+
+def explore(points: List[dict], kernel_set: List[dict], cache_dir: Optional[str] = None,
+            jobs: Optional[int] = None, verbose: bool = True) -> List[dict]:
+    """Evaluate every point, in a process pool, reusing the cached results."""
+    kernel_set = cpu_reference(kernel_set)
+    model = _model_hash()
+    results, todo = {}, []
+    for i, point in enumerate(points):
+        path = os.path.join(cache_dir, cache_key(point, kernel_set, model) + '.json') if cache_dir else None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                results[i] = json.load(f)
+        else:
+            todo.append((i, path))
+    if verbose:
+        print(f"{len(points)} point(s), {len(points) - len(todo)} cached, "
+              f"{len(kernel_set)} kernel(s) per point")
+
+    if cache_dir and todo:
+        os.makedirs(cache_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [(i, path, pool.submit(evaluate_point, points[i], kernel_set)) for i, path in todo]
+        for n, (i, path, future) in enumerate(futures):
+            results[i] = future.result()
+            if path:
+                with open(path, 'w') as f:
+                    json.dump(results[i], f, indent=1)
+            if verbose:
+                print(f"  [{n + 1}/{len(todo)}] {format_point(points[i])}: {results[i]['cycles']} cycles")
+    return [results[i] for i in range(len(points))]
+
+
+def pareto(results: List[dict]) -> List[dict]:
+    """Points not beaten on both area and cycles, by increasing area."""
+    front, best = [], None
+    for res in sorted(results, key=lambda r: (r['area'], r['cycles'])):
+        if best is None or res['cycles'] < best:
+            front.append(res)
+            best = res['cycles']
+    return front
+
+
+def format_point(point: dict) -> str:
+    return (f"{point['num_columns']}x{point['num_rows']} instr={point['rcs_num_instr']} "
+            f"cmem={point['cmem_bk_depth']} kmem={point['kmem_depth']}")
+
+
+def hjson_snippet(point: dict) -> str:
+    """The point as the cgra block of heepsilon_cfg.hjson."""
+    return ("cgra: { " + ", ".join(f"{k}: {point[k]}" for k in GEOMETRY_KEYS) + " }")
+
+
+def write_csv(path: str, results: List[dict], front: List[dict]):
+    with open(path, 'w') as f:
+        f.write(",".join(GEOMETRY_KEYS) + ",rcs,cmem_bits,kmem_width,area,cycles,on_cgra,resident,pareto\n")
+        for res in results:
+            p = res['point']
+            prox = area_proxies(p)
+            f.write(",".join(str(p[k]) for k in GEOMETRY_KEYS) +
+                    f",{prox['rc']},{prox['cmem_bit']},{kmem_width(p)},{res['area']:.0f},{res['cycles']},"
+                    f"{res['on_cgra']},{int(res['resident'])},{int(res in front)}\n")
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(v, 0) for v in text.replace(' ', '').split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Explore CGRA geometries on a kernel set with the behavioural model')
+    parser.add_argument('--cols', type=_int_list, default=[1, 2, 4], help='num_columns values (default: 1,2,4)')
+    parser.add_argument('--rows', type=_int_list, default=[2, 4], help='num_rows values (default: 2,4)')
+    parser.add_argument('--instr', type=_int_list, default=[16, 32, 64], help='rcs_num_instr values (default: 16,32,64)')
+    parser.add_argument('--cmem', default='default',
+                        help='cmem_bk_depth values, "default" for num_columns x rcs_num_instr (default: default)')
+    parser.add_argument('--kmem', type=_int_list, default=[16], help='kmem_depth values (default: 16)')
+    parser.add_argument('--max-rcs', type=int, default=None, help='Skip points with more RCs')
+    parser.add_argument('--max-cmem-kbit', type=int, default=None, help='Skip points with a larger context memory')
+    parser.add_argument('--kernels', metavar='FILE', help='Kernel set (JSON list), see the module help')
+    parser.add_argument('--area', metavar='FILE', help='JSON object overriding the default area weights')
+    parser.add_argument('--cache', default='cgra_dse_cache', help='Result cache directory (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help='Neither read nor write the cache')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--csv', metavar='FILE', help='Write every point to a CSV file')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print the variant of every kernel on the front')
+    args = parser.parse_args()
+
+    try:
+        weights = load_area(args.area)
+        kernel_set = DEFAULT_KERNELS
+        if args.kernels:
+            with open(args.kernels) as f:
+                kernel_set = json.load(f)
+        unknown = {e.get('kind') for e in kernel_set} - set(kg.TEMPLATES)
+        if unknown:
+            raise ValueError(f"unknown template(s) {', '.join(map(str, unknown))}")
+        cmem = [v if v == 'default' else int(v, 0) for v in args.cmem.replace(' ', '').split(',') if v]
+        points = enumerate_points(args.cols, args.rows, args.instr, cmem, args.kmem, args.max_rcs,
+                                  args.max_cmem_kbit * 1024 if args.max_cmem_kbit else None)
+    except (OSError, ValueError) as e:
+        sys.exit(f"ERROR: {e}")
+    if not points:
+        sys.exit("ERROR: no geometry satisfies the constraints")
+
+    results = explore(points, kernel_set, None if args.no_cache else args.cache, args.jobs)
+    for res in results:
+        res['area'] = area(res['point'], weights)
+    front = pareto(results)
+
+    print(f"\n{'geometry':40s} {'area [kGE]':>10s} {'cycles':>10s}  on CGRA  resident")
+    for res in sorted(results, key=lambda r: (r['area'], r['cycles'])):
+        mark = '*' if res in front else ' '
+        print(f"{mark} {format_point(res['point']):38s} {res['area'] / 1000:10.1f} {res['cycles']:10d}"
+              f"  {res['on_cgra']:3d}/{len(res['kernels']):<3d}  {'yes' if res['resident'] else 'no'}")
+
+    print(f"\nPareto front ({len(front)} point(s), * above):")
+    for res in front:
+        print(f"  {hjson_snippet(res['point'])}")
+        if args.verbose:
+            for k in res['kernels']:
+                print(f"      {k['variant']:55s} {k['cycles']:8d} cycles x {k['launches']}")
+
+    if args.csv:
+        write_csv(args.csv, results, front)
+        print(f"Written {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
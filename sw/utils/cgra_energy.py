@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+CGRA Activity-Based Energy Estimation
+
+Combines energy weights per event class with the activity of a kernel and
+reports the energy per launch and per element, next to the CPU-only version
+of the same computation.
+
+Activity comes from one of:
+    csv   the behavioural model (cgra_sim.py) running a kernel CSV
+    log   the per-RC performance counters (rc_perf_cnt in heepsilon_cfg.hjson)
+          of a UART dump, in the format read by cgra_rc_heatmap.py
+
+cgra_kernel_gen.py uses the same model to rank the variants of a template
+(--objective energy, weights with --energy-weights).
+
+Event classes (one weight each, see DEFAULT_WEIGHTS):
+    alu      ALU instruction issued by an RC
+    mul      multiplication (SMUL, FXPMUL, MAC, SMUL2, SMUL4)
+    mem      LWD/SWD/LWI/SWI: RC, bus and SRAM access
+    ctrl     branch, LOOP and EXIT
+    nop      cycle of an RC of an active column without an instruction (NOP
+             or stall): the RC is clocked but idle
+    col      cycle of an active column (controller, PC, clock tree)
+    gated    cycle of an RC of a column left out of the kernel: its clock is
+             gated by cgra_clock_gate, leakage only
+    conf     configuration cycle (one context word read per row bank)
+    cpu      cycle of the CPU running code
+    cpu_wfi  cycle of the CPU sleeping in wfi while the CGRA runs
+
+The default weights are placeholders in pJ, sized relative to each other to
+rank mappings. Calibrate them with the power analysis of the target
+technology and pass them with --weights (JSON object, missing keys keep
+their default).
+
+Usage:
+    python cgra_energy.py csv kernel.csv --ptr-in 0x1000 --ptr-out 0x2000 --elements 64 --cpu-cycles 300
+    python cgra_energy.py log uart0.log --elements 64 --cpu-cycles 300 --host-cycles 150
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Optional, Tuple
+
+import generate_bitstream as gb
+import cgra_sim
+import cgra_rc_heatmap
+
+DEFAULT_WEIGHTS = {
+    'alu': 1.0,
+    'mul': 3.0,
+    'mem': 4.0,
+    'ctrl': 0.8,
+    'nop': 0.3,
+    'col': 0.5,
+    'gated': 0.02,
+    'conf': 2.0,
+    'cpu': 8.0,
+    'cpu_wfi': 0.5,
+}
+
+_MEM_OPS = ('LWD', 'SWD', 'LWI', 'SWI')
+_CTRL_OPS = cgra_sim._BRANCH_OPS + ('LOOP', 'EXIT')
+
+
+def op_class(op: str) -> str:
+    """Event class of an issued instruction."""
+    if op in _MEM_OPS:
+        return 'mem'
+    if op in cgra_sim._MUL_OPS:
+        return 'mul'
+    if op in _CTRL_OPS:
+        return 'ctrl'
+    return 'alu'
+
+
+def load_weights(path: Optional[str]) -> Dict[str, float]:
+    """Default weights updated with the ones of a JSON file."""
+    weights = dict(DEFAULT_WEIGHTS)
+    if path:
+        with open(path) as f:
+            user = json.load(f)
+        unknown = set(user) - set(weights)
+        if unknown:
+            raise ValueError(f"{path}: unknown weight(s) {', '.join(sorted(unknown))}")
+        weights.update({k: float(v) for k, v in user.items()})
+    return weights
+
+
+def empty_activity() -> Dict[str, int]:
+    return {k: 0 for k in DEFAULT_WEIGHTS}
+
+
+def add_activity(total: Dict[str, int], act: Dict[str, int]) -> Dict[str, int]:
+    for k, v in act.items():
+        total[k] += v
+    return total
+
+
+def sim_activity(stats: dict, n_cols: Optional[int] = None, n_rows: Optional[int] = None,
+                 clock_gate: bool = True) -> Dict[str, int]:
+    """Activity of one launch from the statistics of cgra_sim.CgraSim.run()."""
+    n_cols = n_cols or gb.CGRA_N_COL
+    n_rows = n_rows or gb.CGRA_N_ROW
+    act = empty_activity()
+    for op, n in stats['ops'].items():
+        act[op_class(op)] += n
+    issued = sum(stats['ops'].values())
+    cols = {c for _, c in stats['rc_active']}
+    act['nop'] = len(cols) * n_rows * stats['cycles'] - issued
+    act['col'] = len(cols) * stats['cycles']
+    act['conf'] = stats['conf_cycles']
+    idle_rcs = (n_cols - len(cols)) * n_rows * stats['total_cycles']
+    if clock_gate:
+        act['gated'] = idle_rcs
+    else:
+        act['nop'] += idle_rcs
+        act['col'] += (n_cols - len(cols)) * stats['total_cycles']
+    act['cpu_wfi'] = stats['total_cycles']
+    return act
+
+
+def rc_active_cycles(rcs: Dict[Tuple[int, int], Dict[str, int]]) -> Dict[int, int]:
+    """
+    Lower bound of the active cycles of each column from its RC counters: every
+    RC of the column issues or stalls at most once per active cycle. NOPs and
+    the configuration cycles are not counted, so the idle energy is
+    underestimated.
+    """
+    active = {}
+    for (_, col), cnt in rcs.items():
+        active[col] = max(active.get(col, 0), cnt['issue'] + cnt['stall'])
+    return active
+
+
+def counter_activity(rcs: Dict[Tuple[int, int], Dict[str, int]], active: Dict[int, int],
+                     n_cols: Optional[int] = None, clock_gate: bool = True) -> Dict[str, int]:
+    """
+    Activity from the per-RC counters and the column active cycles.
+
+    The counters do not tell multiplications from other ALU instructions, so
+    they are counted as 'alu'; the configuration cycles are part of the active
+    cycles and counted as 'nop'. The launch lasts as long as the busiest column.
+    """
+    n_rows = max(r for r, _ in rcs) + 1
+    n_cols = n_cols or max(max(c for _, c in rcs), max(active, default=0)) + 1
+    duration = max(active.values(), default=0)
+    act = empty_activity()
+    for (_, col), cnt in rcs.items():
+        act['mem'] += cnt['mem']
+        act['ctrl'] += cnt['branch']
+        act['alu'] += cnt['issue'] - cnt['mem'] - cnt['branch']
+        act['nop'] += active.get(col, 0) - cnt['issue']
+    for col in range(n_cols):
+        busy = active.get(col, 0)
+        act['col'] += busy
+        if clock_gate:
+            act['gated'] += (duration - busy) * n_rows
+        else:
+            act['nop'] += (duration - busy) * n_rows
+            act['col'] += duration - busy
+    act['cpu_wfi'] = duration
+    return act
+
+
+def energy(act: Dict[str, int], weights: Dict[str, float]) -> Dict[str, float]:
+    """Energy of each event class."""
+    return {k: n * weights[k] for k, n in act.items()}
+
+
+def format_report(name: str, cgra: Dict[str, float], elements: int = 0,
+                  cpu_only: Optional[float] = None) -> str:
+    """Breakdown of the CGRA energy, per element and against the CPU-only version."""
+    total = sum(cgra.values())
+    out = [f"{name}: {total:.1f} pJ"]
+    for k, e in sorted(cgra.items(), key=lambda kv: -kv[1]):
+        if e:
+            out.append(f"  {k:8s} {e:12.1f} pJ  {e / total if total else 0:6.1%}")
+    if elements:
+        out.append(f"  per element: {total / elements:.2f} pJ")
+    if cpu_only is not None:
+        out.append(f"CPU only: {cpu_only:.1f} pJ" +
+                   (f", {cpu_only / elements:.2f} pJ per element" if elements else ''))
+        if cpu_only:
+            out.append(f"CGRA / CPU energy: {total / cpu_only:.2f}")
+    return '\n'.join(out)
+
+
+def _run_csv(args) -> Dict[str, int]:
+    num_instr, instructions = gb.parse_csv(args.input)
+    mem = cgra_sim.Memory()
+    if args.memory:
+        base, entries = gb.parse_memory_csv(args.memory)
+        for off, val in entries:
+            mem.write(base + off, val)
+    stats, _ = cgra_sim.simulate_instructions(num_instr, instructions, mem,
+                                              [int(p, 0) for p in args.ptr_in],
+                                              [int(p, 0) for p in args.ptr_out])
+    print(f"Kernel: {stats['total_cycles']} cycles ({stats['conf_cycles']} configuration)")
+    return sim_activity(stats, args.cols or gb.CGRA_N_COL, clock_gate=not args.no_clock_gate)
+
+
+def _run_log(args) -> Dict[str, int]:
+    if args.input == '-':
+        rcs, active = cgra_rc_heatmap.parse_log(sys.stdin)
+    else:
+        with open(args.input) as f:
+            rcs, active = cgra_rc_heatmap.parse_log(f)
+    if not rcs:
+        sys.exit(f"{args.input}: no 'CGRA RC <row> <col>: issue <n> mem <n> stall <n> branch <n>' lines, "
+                 "build with rc_perf_cnt: true in heepsilon_cfg.hjson and print the counters (see cgra_func_test)")
+    if not active:
+        active = rc_active_cycles(rcs)
+        print(f"{args.input}: no 'CGRA column <col> active cycles: <n>' lines, "
+              "estimating the active cycles of each column from its RC counters", file=sys.stderr)
+    print(f"Kernel: {max(active.values())} cycles (busiest column)")
+    return counter_activity(rcs, active, args.cols, clock_gate=not args.no_clock_gate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimate the energy of a CGRA kernel from its activity')
+    sub = parser.add_subparsers(dest='source', required=True)
+
+    def common(p):
+        p.add_argument('--weights', metavar='FILE', help='JSON object overriding the default weights')
+        p.add_argument('--elements', type=int, default=0, help='Elements processed by the launch, for the per-element figures')
+        p.add_argument('--cpu-cycles', type=int, default=None, help='Cycles of the CPU-only version')
+        p.add_argument('--host-cycles', type=int, default=0,
+                       help='CPU cycles of the CGRA version outside the kernel (launch, tail)')
+        p.add_argument('--cols', type=int, default=None, help='Columns of the array (default: from the source)')
+        p.add_argument('--no-clock-gate', action='store_true', help='Idle columns stay clocked')
+
+    p = sub.add_parser('csv', help='Run a kernel CSV on the behavioural model')
+    p.add_argument('input', help='Input CSV file (instructions.csv)')
+    p.add_argument('-m', '--memory', default=None, help='Optional memory.csv preloaded at its base address')
+    p.add_argument('--ptr-in', nargs='*', default=[], help='Read pointer per column')
+    p.add_argument('--ptr-out', nargs='*', default=[], help='Write pointer per column')
+    common(p)
+
+    p = sub.add_parser('log', help='Read the per-RC performance counters of a UART dump')
+    p.add_argument('input', help='UART dump (e.g. uart0.log), - for stdin')
+    common(p)
+
+    args = parser.parse_args()
+    try:
+        weights = load_weights(args.weights)
+    except (OSError, ValueError) as e:
+        sys.exit(f"ERROR: {e}")
+
+    act = _run_csv(args) if args.source == 'csv' else _run_log(args)
+    act['cpu'] = args.host_cycles
+    cpu_only = None
+    if args.cpu_cycles is not None:
+        cpu_only = args.cpu_cycles * weights['cpu']
+    print(format_report('CGRA', energy(act, weights), args.elements, cpu_only))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1005 @@
+#!/usr/bin/env python3
+"""
+CGRA Kernel Template Library
+
+Parameterised generators for common CGRA kernels. Every template produces:
+- the rcs instruction grid (instructions.csv, block format),
+- the encoded bitstream (cgra_bitstream.h, via generate_bitstream.py),
+- the host-side pointer setup and CPU tail code (<name>_host.h),
+- a NumPy golden model and a stimuli header with expected outputs.
+
+Templates:
+    gemm    C[M][N] = A[M][K] * B[K][N]   (tiled over M, rows split across columns)
+    fir     y = convolve(x, taps, 'valid')
+    conv2d  out = valid 2-D cross-correlation of img with a small weight matrix
+    reduce  sum / min / max of a vector
+
+When the number of columns (and the tile / unroll factor) is not given, all
+variants that fit the CGRA are run on the behavioural model (cgra_sim.py)
+and the fastest one for the problem size is kept, or the one using the least
+energy with --objective energy (activity model of cgra_energy.py).
+
+Usage:
+    python cgra_kernel_gen.py gemm --m 16 --n 16 --k 16 -o out/
+    python cgra_kernel_gen.py fir --taps 1,-2,3,4 --length 256 -o out/
+    python cgra_kernel_gen.py conv2d --weights "1,2,1;2,4,2;1,2,1" --height 16 --width 16 -o out/
+    python cgra_kernel_gen.py reduce --op max --length 1024 --cols 2 -o out/
+"""
+
+import argparse
+import os
+import sys
+from math import ceil
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import generate_bitstream as gb
+import cgra_sim
+import cgra_energy
+
+# =============================================================================
+# Cost model parameters (CPU side, in cycles)
+# =============================================================================
+
+LAUNCH_OVERHEAD_CYCLES = 150   # set kernel id, interrupt entry/exit
+PTR_SETUP_CYCLES = 12          # one cgra_set_read/write_ptr() call
+HOST_CYCLES_PER_MAC = 6        # CPU multiply-accumulate in the tail loops
+HOST_CYCLES_PER_ELEM = 4       # CPU add/compare in the tail loops
+
+IMM_MIN = -(1 << (gb.RCS_IMM_BITS - 1))
+IMM_MAX = (1 << (gb.RCS_IMM_BITS - 1)) - 1
+
+
+def fits_imm(value: int) -> bool:
+    return IMM_MIN <= value <= IMM_MAX
+
+
+def const_ops(reg: str, value: int) -> List[str]:
+    """Instructions loading a 32-bit constant into a register."""
+    value = cgra_sim.to_s32(value)
+    if fits_imm(value):
+        return [f"SADD {reg}, ZERO, {value}"]
+    lo = value & 0xFFF
+    if -(1 << 24) <= value < (1 << 24):
+        ops = [f"SADD {reg}, ZERO, {value >> 12}", f"SLL {reg}, {reg}, 12"]
+    else:
+        mid = (value >> 12) & 0xFFF
+        ops = [f"SADD {reg}, ZERO, {value >> 24}", f"SLL {reg}, {reg}, 12"]
+        if mid:
+            ops.append(f"LOR {reg}, {reg}, {mid}")
+        ops.append(f"SLL {reg}, {reg}, 12")
+    if lo:
+        ops.append(f"LOR {reg}, {reg}, {lo}")
+    return ops
+
+
+def wrap_i32(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.int64).astype(np.int32)
+
+
+# =============================================================================
+# Column program builder
+# =============================================================================
+
+class ColumnProgram:
+    """
+    Step schedule shared by every column of a kernel.
+
+    Each step maps rows to instruction strings. Control instructions (loop
+    counters and branches) are kept apart: the controller only takes a branch
+    when a single RC of the kernel requests it, so they are emitted in
+    column 0 only. Branch targets are written as '{label}' and resolved once
+    the schedule is complete.
+    """
+
+    def __init__(self, n_rows: int):
+        self.n_rows = n_rows
+        self.steps: List[Tuple[Dict[int, str], Dict[int, str]]] = []
+        self.labels: Dict[str, int] = {}
+
+    def label(self, name: str):
+        self.labels[name] = len(self.steps)
+
+    def emit(self, ops: Optional[Dict[int, str]] = None, ctrl: Optional[Dict[int, str]] = None):
+        ops = dict(ops or {})
+        ctrl = dict(ctrl or {})
+        clash = set(ops) & set(ctrl)
+        if clash:
+            raise ValueError(f"Rows {sorted(clash)} scheduled twice in step {len(self.steps)}")
+        self.steps.append((ops, ctrl))
+
+    def emit_parallel(self, seqs: Optional[Dict[int, List[str]]] = None,
+                      ctrl_seqs: Optional[Dict[int, List[str]]] = None):
+        """Emit per-row instruction sequences side by side."""
+        seqs = seqs or {}
+        ctrl_seqs = ctrl_seqs or {}
+        depth = max([len(s) for s in list(seqs.values()) + list(ctrl_seqs.values())] + [0])
+        for i in range(depth):
+            self.emit({r: s[i] for r, s in seqs.items() if i < len(s)},
+                      {r: s[i] for r, s in ctrl_seqs.items() if i < len(s)})
+
+    def grid(self, n_cols: int) -> List[List[List[str]]]:
+        """Return instructions[row][col][step] as strings."""
+        grid = [[[] for _ in range(n_cols)] for _ in range(self.n_rows)]
+        for ops, ctrl in self.steps:
+            for r in range(self.n_rows):
+                for c in range(n_cols):
+                    instr = ops.get(r) or (ctrl.get(r) if c == 0 else None) or 'NOP'
+                    grid[r][c].append(instr.format(**self.labels))
+        return grid
+
+
+# =============================================================================
+# Template base class
+# =============================================================================
+
+class KernelTemplate:
+    """Common plumbing: program layout, CSV/bitstream output and simulation."""
+
+    kind = 'kernel'
+    # Names of the buffers simulate() allocates, in allocation order
+    buffers: Tuple[str, ...] = ()
+    # Set to a list to collect the memory accesses of simulate() (see CgraSim.trace)
+    trace: Optional[list] = None
+
+    def __init__(self, name: str, n_cols: int):
+        if not 1 <= n_cols <= gb.CGRA_N_COL:
+            raise ValueError(f"n_cols must be in 1..{gb.CGRA_N_COL}, got {n_cols}")
+        self.name = name
+        self.n_cols = n_cols
+        self.n_rows = gb.CGRA_N_ROW
+        self.program = ColumnProgram(self.n_rows)
+        self._build(self.program)
+        self.num_instr = len(self.program.steps)
+        if self.num_instr > gb.RCS_NUM_CREG:
+            raise ValueError(f"{self.describe()} needs {self.num_instr} instructions per RC "
+                             f"(max {gb.RCS_NUM_CREG})")
+        if self.num_instr * n_cols > gb.CGRA_CMEM_BK_DEPTH:
+            raise ValueError(f"{self.describe()} does not fit in a context memory bank")
+
+    # --- to be provided by each template -----------------------------------
+
+    def _build(self, prog: ColumnProgram):
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return f"{self.kind} ({self.n_cols} cols)"
+
+    def make_inputs(self, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def golden(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        raise NotImplementedError
+
+    def simulate(self, inputs: Dict[str, np.ndarray]) -> Tuple[np.ndarray, int]:
+        """Return (output, estimated total cycles) for one call of the kernel."""
+        raise NotImplementedError
+
+    def host_code(self) -> str:
+        raise NotImplementedError
+
+    def elements(self) -> int:
+        """Elements computed by the kernel, for the per-element figures."""
+        raise NotImplementedError
+
+    def cpu_cycles(self) -> int:
+        """Estimated cycles of the whole computation on the CPU alone."""
+        raise NotImplementedError
+
+    # --- shared helpers ----------------------------------------------------
+
+    def instructions(self) -> List[List[List[str]]]:
+        return self.program.grid(self.n_cols)
+
+    def encoded(self) -> Tuple[int, List[List[List[str]]]]:
+        grid = self.instructions()
+        nop = [gb.rcs_nop_instr.copy() for _ in range(self.num_instr)]
+        return self.num_instr, [[[gb.parse_instruction_string(i) for i in col] for col in row] +
+                                [list(nop) for _ in range(gb.CGRA_N_COL - self.n_cols)]
+                                for row in grid]
+
+    def memories(self) -> Tuple[List[int], List[int]]:
+        return gb.build_memories(*self.encoded())
+
+    def write_csv(self, path: str):
+        grid = self.instructions()
+        with open(path, 'w') as f:
+            for step in range(self.num_instr):
+                f.write(f"{step}\n")
+                for r in range(self.n_rows):
+                    cells = [grid[r][c][step] if c < self.n_cols else 'NOP'
+                             for c in range(gb.CGRA_N_COL)]
+                    f.write(",".join(f'"{x}"' if ' ' in x else x for x in cells) + "\n")
+
+    def bitstream_header(self) -> str:
+        num_instr, instructions = self.encoded()
+        return gb.generate_bitstream(num_instr, instructions, self.name.upper())
+
+    def _sim(self, mem: cgra_sim.Memory) -> cgra_sim.CgraSim:
+        kmem, cmem = self.memories()
+        self.launch_stats = []
+        self.sim = cgra_sim.CgraSim(kmem, cmem, mem, trace=self.trace)
+        return self.sim
+
+    def _launch_cost(self, stats: dict, n_ptrs: int) -> int:
+        # Keep the activity of every launch of the last simulate() call
+        self.launch_stats.append(stats)
+        return stats['total_cycles'] + LAUNCH_OVERHEAD_CYCLES + n_ptrs * PTR_SETUP_CYCLES
+
+    def data_header(self, inputs: Dict[str, np.ndarray]) -> str:
+        expected = self.golden(inputs)
+        guard = f"_{self.name.upper()}_DATA_H_"
+        text = [f"#ifndef {guard}", f"#define {guard}", "", "#include <stdint.h>", "",
+                f"// Stimuli and golden output for {self.describe()}", ""]
+        for key, arr in list(inputs.items()) + [('expected', expected)]:
+            flat = np.asarray(arr).reshape(-1)
+            text.append(f"int32_t {self.name}_{key}[{flat.size}] = {{")
+            for i in range(0, flat.size, 16):
+                text.append("  " + ", ".join(str(int(v)) for v in flat[i:i + 16]) + ",")
+            text[-1] = text[-1].rstrip(',')
+            text.append("};")
+            text.append("")
+        text.append(f"#endif // {guard}")
+        return "\n".join(text) + "\n"
+
+
+# =============================================================================
+# GEMM
+# =============================================================================
+
+class GemmKernel(KernelTemplate):
+    """
+    C[M][N] = A[M][K] * B[K][N], row-major int32.
+
+    Each launch computes tile_m rows of C; every column takes tile_m / n_cols
+    consecutive rows. Rows are the pipeline stages of one column:
+        row 0  A loader (LWI, address walks along the A row)
+        row 1  multiply-accumulate, stores C with SWD
+        row 2  B loader (LWI, address walks down a B column)
+        row 3  loop counters and branches (column 0 only)
+    The column read pointer points at a two-word parameter block
+    {A row base, B base} which the host fills before each launch.
+    """
+
+    kind = 'gemm'
+    buffers = ('a', 'b', 'c', 'params')
+
+    def __init__(self, m: int, n: int, k: int, tile_m: int, n_cols: int, name: str = 'gemm'):
+        if gb.CGRA_N_ROW < 4:
+            raise ValueError("The GEMM template needs at least 4 rows")
+        if tile_m % n_cols or tile_m > m:
+            raise ValueError(f"tile_m ({tile_m}) must be a multiple of n_cols and <= M")
+        if not fits_imm(4 * n):
+            raise ValueError(f"N={n} too large for the B stride immediate")
+        self.m, self.n, self.k, self.tile_m = m, n, k, tile_m
+        self.rows_per_col = tile_m // n_cols
+        self.launches = m // tile_m
+        super().__init__(name, n_cols)
+
+    def describe(self) -> str:
+        return (f"gemm M={self.m} N={self.n} K={self.k} tile_m={self.tile_m} "
+                f"({self.n_cols} cols)")
+
+    def _build(self, p: ColumnProgram):
+        p.emit({0: "LWD R2", 2: "LWD R3"})
+        p.emit_parallel({0: const_ops('R3', 4 * self.k)},
+                        {3: const_ops('R0', self.k) + const_ops('R3', self.rows_per_col)})
+        p.label('row')
+        p.emit_parallel({2: ["SADD R2, R3, ZERO"]},
+                        {3: const_ops('R2', self.n) + ["SSUB R3, R3, 1"]})
+        p.label('out')
+        p.emit({0: "SADD R0, R2, ZERO", 1: "SSUB R1, ZERO, R2", 2: "SADD R0, R2, ZERO"},
+               {3: "SADD R1, R0, ZERO"})
+        p.label('k')
+        p.emit({0: "LWI R1, R0", 1: "SADD R1, R1, R2", 2: "LWI R1, R0"},
+               {3: "SSUB R1, R1, 1"})
+        p.emit({0: "SADD R0, R0, 4", 1: "SMUL R2, RCT, RCB", 2: f"SADD R0, R0, {4 * self.n}"},
+               {3: "BNE R1, ZERO, {k}"})
+        p.emit({1: "SADD R1, R1, R2", 2: "SADD R2, R2, 4"}, {3: "SSUB R2, R2, 1"})
+        p.emit({1: "SWD R1"}, {3: "BNE R2, ZERO, {out}"})
+        p.emit({0: "SADD R2, R2, R3"}, {3: "BNE R3, ZERO, {row}"})
+        p.emit({0: "EXIT"})
+
+    def make_inputs(self, rng):
+        return {'a': rng.integers(-100, 100, (self.m, self.k), dtype=np.int32),
+                'b': rng.integers(-100, 100, (self.k, self.n), dtype=np.int32)}
+
+    def golden(self, inputs):
+        return wrap_i32(inputs['a'].astype(np.int64) @ inputs['b'].astype(np.int64))
+
+    def simulate(self, inputs):
+        mem = cgra_sim.Memory()
+        a = mem.alloc(inputs['a'].reshape(-1))
+        b = mem.alloc(inputs['b'].reshape(-1))
+        c = mem.alloc(size=self.m * self.n)
+        params = mem.alloc(size=2 * self.n_cols)
+        sim = self._sim(mem)
+        cycles = 0
+        for launch in range(self.launches):
+            rd, wr = [], []
+            for col in range(self.n_cols):
+                row0 = launch * self.tile_m + col * self.rows_per_col
+                mem.write(params + 8 * col, a + 4 * row0 * self.k)
+                mem.write(params + 8 * col + 4, b)
+                rd.append(params + 8 * col)
+                wr.append(c + 4 * row0 * self.n)
+            cycles += self._launch_cost(sim.run(1, rd, wr), 2 * self.n_cols)
+        out = np.array(mem.read_array(c, self.m * self.n), dtype=np.int32).reshape(self.m, self.n)
+        tail = self.m - self.launches * self.tile_m
+        out[self.m - tail:] = self.golden(inputs)[self.m - tail:]
+        cycles += tail * self.n * self.k * HOST_CYCLES_PER_MAC
+        return out, cycles
+
+    def elements(self):
+        return self.m * self.n
+
+    def cpu_cycles(self):
+        return self.m * self.n * self.k * HOST_CYCLES_PER_MAC
+
+    def host_code(self) -> str:
+        n = self.name
+        N = n.upper()
+        return f"""// Host-side setup for {self.describe()}
+// Generated by cgra_kernel_gen.py
+
+#define {N}_M           {self.m}
+#define {N}_N           {self.n}
+#define {N}_K           {self.k}
+#define {N}_TILE_M      {self.tile_m}
+#define {N}_N_COLS      {self.n_cols}
+#define {N}_LAUNCHES    {self.launches}
+
+// Parameter block read by each column: {{A row base, B base}}
+static int32_t {n}_params[{N}_N_COLS][2];
+
+/**
+ * Set the column pointers for one launch (0 <= launch < {N}_LAUNCHES).
+ * Call cgra_set_kernel() afterwards and wait for completion before the next launch.
+ */
+static inline void {n}_setup(const cgra_t *cgra, const int32_t *a, const int32_t *b, int32_t *c, uint32_t launch)
+{{
+  for (uint32_t col = 0; col < {N}_N_COLS; col++) {{
+    uint32_t row = launch * {N}_TILE_M + col * ({N}_TILE_M / {N}_N_COLS);
+    {n}_params[col][0] = (int32_t) &a[row * {N}_K];
+    {n}_params[col][1] = (int32_t) b;
+    cgra_set_read_ptr(cgra, (uint32_t) {n}_params[col], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &c[row * {N}_N], col);
+  }}
+}}
+
+/**
+ * Compute on the CPU the rows left over by the last full tile.
+ */
+static inline void {n}_finalize(const int32_t *a, const int32_t *b, int32_t *c)
+{{
+  for (uint32_t i = {N}_LAUNCHES * {N}_TILE_M; i < {N}_M; i++) {{
+    for (uint32_t j = 0; j < {N}_N; j++) {{
+      int32_t acc = 0;
+      for (uint32_t k = 0; k < {N}_K; k++) {{
+        acc += a[i * {N}_K + k] * b[k * {N}_N + j];
+      }}
+      c[i * {N}_N + j] = acc;
+    }}
+  }}
+}}
+"""
+
+    @classmethod
+    def variants(cls, m: int, n: int, k: int, name: str = 'gemm'):
+        for n_cols in range(1, gb.CGRA_N_COL + 1):
+            for tile_m in range(n_cols, m + 1, n_cols):
+                if m % tile_m and tile_m != n_cols * (m // n_cols):
+                    continue
+                yield dict(m=m, n=n, k=k, tile_m=tile_m, n_cols=n_cols, name=name)
+
+
+# =============================================================================
+# Stencils (FIR and 2-D convolution)
+# =============================================================================
+
+class _StencilKernel(KernelTemplate):
+    """
+    Dot product of a fixed set of taps around a sliding window.
+
+    Tap t (ordered by memory offset) is handled by row t % n_rows in round
+    t // n_rows: LWD streams the window in tap order, the per-tap LWD
+    increment walks to the next tap and the last one rewinds to the next
+    output. Weights are immediates, so weights of 1 and -1 skip the
+    multiplier and zero weights are dropped (the read pointer then starts
+    at first_offset words into the window). Row partials are summed up
+    through RCB and row 0 stores the output with SWD.
+    """
+
+    first_offset = 0
+
+    def _taps(self) -> List[Tuple[int, int]]:
+        """Return (word offset, weight) pairs sorted by offset."""
+        raise NotImplementedError
+
+    def _loop_counts(self) -> Tuple[int, int, int]:
+        """Return (outputs per row, rows per column, pointer bump after a row in words)."""
+        raise NotImplementedError
+
+    def _build(self, p: ColumnProgram):
+        taps = [(o, w) for o, w in self._taps() if w != 0] or [(0, 0)]
+        self.first_offset = taps[0][0]
+        for _, w in taps:
+            if not fits_imm(w):
+                raise ValueError(f"Weight {w} does not fit the {gb.RCS_IMM_BITS}-bit immediate")
+        n_inner, n_outer, bump = self._loop_counts()
+        R = self.n_rows
+        if R < 2:
+            raise ValueError("Stencil templates need at least 2 rows")
+        n_taps = len(taps)
+        rows_used = min(R, n_taps)
+        rounds = ceil(n_taps / R)
+
+        incs = [4 * (taps[t + 1][0] - taps[t][0]) for t in range(n_taps - 1)]
+        incs.append(4 * (taps[0][0] + 1 - taps[-1][0]))
+        if not all(fits_imm(i) for i in incs + [4 * bump]):
+            raise ValueError("Window too wide for the LWD increment immediate")
+
+        # Loop counters: a spare row if there is one, otherwise R3 of data rows
+        if rows_used < R:
+            inner, outer = (R - 1, 'R3'), (R - 1, 'R2')
+        else:
+            inner, outer = (rows_used - 1, 'R3'), (0, 'R3')
+
+        p.emit_parallel(ctrl_seqs={outer[0]: const_ops(outer[1], n_outer)} if n_outer > 1 else {})
+        p.label('outer')
+        p.emit_parallel(ctrl_seqs={inner[0]: const_ops(inner[1], n_inner)})
+        p.label('inner')
+        dec_inner = f"SSUB {inner[1]}, {inner[1]}, 1"
+        dec_placed = False
+        for j in range(rounds):
+            rnd = [(r, j * R + r) for r in range(R) if j * R + r < n_taps]
+            ctrl = {}
+            if not dec_placed and inner[0] >= rows_used:
+                ctrl = {inner[0]: dec_inner}
+                dec_placed = True
+            p.emit({r: f"LWD R0, {incs[t]}" for r, t in rnd}, ctrl)
+            if any(taps[t][1] not in (1, -1) for _, t in rnd):
+                p.emit({r: f"SMUL R2, R0, {taps[t][1]}" for r, t in rnd if taps[t][1] not in (1, -1)})
+            acc = {}
+            for r, t in rnd:
+                w = taps[t][1]
+                src = 'R0' if w in (1, -1) else 'R2'
+                if w == -1:
+                    acc[r] = f"SSUB R1, {'R1' if j else 'ZERO'}, R0"
+                else:
+                    acc[r] = f"SADD R1, R1, {src}" if j else f"SADD R1, {src}, ZERO"
+            p.emit(acc)
+        for r in range(rows_used - 2, -1, -1):
+            ctrl = {}
+            if not dec_placed:
+                ctrl = {inner[0]: dec_inner}
+                dec_placed = True
+            p.emit({r: "SADD R1, R1, RCB"}, ctrl)
+        p.emit({0: "SWD R1"}, {inner[0]: f"BNE {inner[1]}, ZERO, {{inner}}"})
+        if n_outer > 1:
+            bump_row = 1 if outer[0] == 0 else 0
+            p.emit({bump_row: f"LWD R0, {4 * bump}"} if bump else {},
+                   {outer[0]: f"SSUB {outer[1]}, {outer[1]}, 1"})
+            p.emit(ctrl={outer[0]: f"BNE {outer[1]}, ZERO, {{outer}}"})
+        p.emit({0: "EXIT"})
+
+
+class FirKernel(_StencilKernel):
+    """y[i] = sum_k taps[k] * x[i + T - 1 - k] for 0 <= i <= len(x) - T (np.convolve 'valid')."""
+
+    kind = 'fir'
+    buffers = ('x', 'y')
+
+    def __init__(self, taps: Sequence[int], length: int, n_cols: int, name: str = 'fir'):
+        self.taps = [int(t) for t in taps]
+        self.length = length
+        self.n_out = length - len(self.taps) + 1
+        self.chunk = self.n_out // n_cols
+        if self.chunk < 1:
+            raise ValueError(f"Not enough outputs ({self.n_out}) for {n_cols} columns")
+        super().__init__(name, n_cols)
+
+    def describe(self) -> str:
+        return f"fir T={len(self.taps)} len={self.length} ({self.n_cols} cols)"
+
+    def _taps(self):
+        T = len(self.taps)
+        return [(o, self.taps[T - 1 - o]) for o in range(T)]
+
+    def _loop_counts(self):
+        return self.chunk, 1, 0
+
+    def make_inputs(self, rng):
+        return {'x': rng.integers(-1000, 1000, self.length, dtype=np.int32)}
+
+    def golden(self, inputs):
+        return wrap_i32(np.convolve(inputs['x'].astype(np.int64),
+                                    np.array(self.taps, dtype=np.int64), 'valid'))
+
+    def simulate(self, inputs):
+        mem = cgra_sim.Memory()
+        x = mem.alloc(inputs['x']) + 4 * self.first_offset
+        y = mem.alloc(size=self.n_out)
+        stats = self._sim(mem).run(1, [x + 4 * c * self.chunk for c in range(self.n_cols)],
+                                   [y + 4 * c * self.chunk for c in range(self.n_cols)])
+        out = np.array(mem.read_array(y, self.n_out), dtype=np.int32)
+        done = self.n_cols * self.chunk
+        out[done:] = self.golden(inputs)[done:]
+        cycles = self._launch_cost(stats, 2 * self.n_cols)
+        cycles += (self.n_out - done) * len(self.taps) * HOST_CYCLES_PER_MAC
+        return out, cycles
+
+    def elements(self):
+        return self.n_out
+
+    def cpu_cycles(self):
+        return self.n_out * len(self.taps) * HOST_CYCLES_PER_MAC
+
+    def host_code(self) -> str:
+        n = self.name
+        N = n.upper()
+        taps = ", ".join(str(t) for t in self.taps)
+        return f"""// Host-side setup for {self.describe()}
+// Generated by cgra_kernel_gen.py
+
+#define {N}_LEN         {self.length}
+#define {N}_TAPS        {len(self.taps)}
+#define {N}_N_OUT       {self.n_out}
+#define {N}_N_COLS      {self.n_cols}
+#define {N}_CHUNK       {self.chunk}
+
+static const int32_t {n}_taps[{N}_TAPS] = {{ {taps} }};
+
+/**
+ * Set the column pointers. Column c produces y[c*CHUNK .. (c+1)*CHUNK-1].
+ */
+static inline void {n}_setup(const cgra_t *cgra, const int32_t *x, int32_t *y)
+{{
+  for (uint32_t col = 0; col < {N}_N_COLS; col++) {{
+    cgra_set_read_ptr(cgra, (uint32_t) &x[col * {N}_CHUNK + {self.first_offset}], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &y[col * {N}_CHUNK], col);
+  }}
+}}
+
+/**
+ * Compute on the CPU the outputs not covered by the columns.
+ */
+static inline void {n}_finalize(const int32_t *x, int32_t *y)
+{{
+  for (uint32_t i = {N}_N_COLS * {N}_CHUNK; i < {N}_N_OUT; i++) {{
+    int32_t acc = 0;
+    for (uint32_t k = 0; k < {N}_TAPS; k++) {{
+      acc += {n}_taps[k] * x[i + {N}_TAPS - 1 - k];
+    }}
+    y[i] = acc;
+  }}
+}}
+"""
+
+    @classmethod
+    def variants(cls, taps, length, name='fir'):
+        for n_cols in range(1, gb.CGRA_N_COL + 1):
+            yield dict(taps=taps, length=length, n_cols=n_cols, name=name)
+
+
+class Conv2dKernel(_StencilKernel):
+    """out[i][j] = sum_{r,c} w[r][c] * img[i + r][j + c] (valid cross-correlation)."""
+
+    kind = 'conv2d'
+    buffers = ('img', 'out')
+
+    def __init__(self, weights, height: int, width: int, n_cols: int, name: str = 'conv2d'):
+        self.weights = np.asarray(weights, dtype=np.int64)
+        if self.weights.ndim != 2:
+            raise ValueError("conv2d weights must be a 2-D matrix")
+        self.height, self.width = height, width
+        kh, kw = self.weights.shape
+        self.out_h, self.out_w = height - kh + 1, width - kw + 1
+        self.rows_per_col = self.out_h // n_cols
+        if self.rows_per_col < 1 or self.out_w < 1:
+            raise ValueError(f"Image too small for the weights and {n_cols} columns")
+        super().__init__(name, n_cols)
+
+    def describe(self) -> str:
+        kh, kw = self.weights.shape
+        return f"conv2d {kh}x{kw} on {self.height}x{self.width} ({self.n_cols} cols)"
+
+    def _taps(self):
+        kh, kw = self.weights.shape
+        return [(r * self.width + c, int(self.weights[r, c])) for r in range(kh) for c in range(kw)]
+
+    def _loop_counts(self):
+        return self.out_w, self.rows_per_col, self.width - self.out_w
+
+    def make_inputs(self, rng):
+        return {'img': rng.integers(-1000, 1000, (self.height, self.width), dtype=np.int32)}
+
+    def golden(self, inputs):
+        win = np.lib.stride_tricks.sliding_window_view(inputs['img'].astype(np.int64),
+                                                       self.weights.shape)
+        return wrap_i32(np.einsum('ijrc,rc->ij', win, self.weights))
+
+    def simulate(self, inputs):
+        mem = cgra_sim.Memory()
+        img = mem.alloc(inputs['img'].reshape(-1)) + 4 * self.first_offset
+        out = mem.alloc(size=self.out_h * self.out_w)
+        rows = self.rows_per_col
+        stats = self._sim(mem).run(1, [img + 4 * c * rows * self.width for c in range(self.n_cols)],
+                                   [out + 4 * c * rows * self.out_w for c in range(self.n_cols)])
+        res = np.array(mem.read_array(out, self.out_h * self.out_w),
+                       dtype=np.int32).reshape(self.out_h, self.out_w)
+        done = self.n_cols * rows
+        res[done:] = self.golden(inputs)[done:]
+        cycles = self._launch_cost(stats, 2 * self.n_cols)
+        cycles += (self.out_h - done) * self.out_w * self.weights.size * HOST_CYCLES_PER_MAC
+        return res, cycles
+
+    def elements(self):
+        return self.out_h * self.out_w
+
+    def cpu_cycles(self):
+        return self.out_h * self.out_w * self.weights.size * HOST_CYCLES_PER_MAC
+
+    def host_code(self) -> str:
+        n = self.name
+        N = n.upper()
+        kh, kw = self.weights.shape
+        w = ", ".join(str(int(v)) for v in self.weights.reshape(-1))
+        return f"""// Host-side setup for {self.describe()}
+// Generated by cgra_kernel_gen.py
+
+#define {N}_H           {self.height}
+#define {N}_W           {self.width}
+#define {N}_KH          {kh}
+#define {N}_KW          {kw}
+#define {N}_OUT_H       {self.out_h}
+#define {N}_OUT_W       {self.out_w}
+#define {N}_N_COLS      {self.n_cols}
+#define {N}_ROWS_PER_COL {self.rows_per_col}
+
+static const int32_t {n}_weights[{N}_KH * {N}_KW] = {{ {w} }};
+
+/**
+ * Set the column pointers. Column c produces output rows
+ * c*ROWS_PER_COL .. (c+1)*ROWS_PER_COL-1.
+ */
+static inline void {n}_setup(const cgra_t *cgra, const int32_t *img, int32_t *out)
+{{
+  for (uint32_t col = 0; col < {N}_N_COLS; col++) {{
+    cgra_set_read_ptr(cgra, (uint32_t) &img[col * {N}_ROWS_PER_COL * {N}_W + {self.first_offset}], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &out[col * {N}_ROWS_PER_COL * {N}_OUT_W], col);
+  }}
+}}
+
+/**
+ * Compute on the CPU the output rows not covered by the columns.
+ */
+static inline void {n}_finalize(const int32_t *img, int32_t *out)
+{{
+  for (uint32_t i = {N}_N_COLS * {N}_ROWS_PER_COL; i < {N}_OUT_H; i++) {{
+    for (uint32_t j = 0; j < {N}_OUT_W; j++) {{
+      int32_t acc = 0;
+      for (uint32_t r = 0; r < {N}_KH; r++) {{
+        for (uint32_t c = 0; c < {N}_KW; c++) {{
+          acc += {n}_weights[r * {N}_KW + c] * img[(i + r) * {N}_W + j + c];
+        }}
+      }}
+      out[i * {N}_OUT_W + j] = acc;
+    }}
+  }}
+}}
+"""
+
+    @classmethod
+    def variants(cls, weights, height, width, name='conv2d'):
+        for n_cols in range(1, gb.CGRA_N_COL + 1):
+            yield dict(weights=weights, height=height, width=width, n_cols=n_cols, name=name)
+
+
+# =============================================================================
+# Reductions
+# =============================================================================
+
+class ReduceKernel(KernelTemplate):
+    """
+    sum / min / max of an int32 vector.
+
+    Each column reduces a contiguous chunk with `unroll` rows loading in
+    parallel (LWD), folds the row partials through RCB and stores one
+    partial per column. The host combines the partials with the elements
+    left over. min/max compare with SSUB + BSFA, so inputs must not span
+    more than the int32 range.
+    """
+
+    kind = 'reduce'
+    buffers = ('x', 'partials')
+    OPS = ('sum', 'min', 'max')
+
+    def __init__(self, op: str, length: int, n_cols: int, unroll: int, name: str = 'reduce'):
+        if op not in self.OPS:
+            raise ValueError(f"Unknown reduction '{op}', expected one of {self.OPS}")
+        if not 1 <= unroll <= gb.CGRA_N_ROW - 1:
+            raise ValueError(f"unroll must be in 1..{gb.CGRA_N_ROW - 1}")
+        self.op, self.length, self.unroll = op, length, unroll
+        self.chunk = length // n_cols // unroll * unroll
+        self.iters = self.chunk // unroll - (op != 'sum')
+        if self.iters < 1:
+            raise ValueError(f"Vector too short ({length}) for {n_cols} cols x {unroll} rows")
+        super().__init__(name, n_cols)
+
+    def describe(self) -> str:
+        return f"reduce {self.op} len={self.length} unroll={self.unroll} ({self.n_cols} cols)"
+
+    def _build(self, p: ColumnProgram):
+        U, ctrl_row = self.unroll, self.n_rows - 1
+        init = "SADD R1, ZERO, ZERO" if self.op == 'sum' else "LWD R1"
+        p.emit_parallel({r: [init] for r in range(U)}, {ctrl_row: const_ops('R3', self.iters)})
+        p.label('loop')
+        p.emit({r: "LWD R0" for r in range(U)}, {ctrl_row: "SSUB R3, R3, 1"})
+        if self.op == 'sum':
+            p.emit({r: "SADD R1, R1, R0" for r in range(U)}, {ctrl_row: "BNE R3, ZERO, {loop}"})
+        else:
+            pick = "BSFA R1, R0, R1" if self.op == 'min' else "BSFA R1, R1, R0"
+            p.emit({r: "SSUB R2, R0, R1" for r in range(U)})
+            p.emit({r: pick for r in range(U)}, {ctrl_row: "BNE R3, ZERO, {loop}"})
+        for r in range(U - 2, -1, -1):
+            if self.op == 'sum':
+                p.emit({r: "SADD R1, R1, RCB"})
+            else:
+                p.emit({r: "SSUB R2, R1, RCB"})
+                p.emit({r: "BSFA R1, R1, RCB" if self.op == 'min' else "BSFA R1, RCB, R1"})
+        p.emit({0: "SWD R1"})
+        p.emit({0: "EXIT"})
+
+    def _combine(self, values) -> int:
+        values = np.asarray(values, dtype=np.int64)
+        if self.op == 'sum':
+            return int(wrap_i32(values.sum()))
+        return int(values.min() if self.op == 'min' else values.max())
+
+    def make_inputs(self, rng):
+        return {'x': rng.integers(-(1 << 20), 1 << 20, self.length, dtype=np.int32)}
+
+    def golden(self, inputs):
+        return np.array([self._combine(inputs['x'])], dtype=np.int32)
+
+    def simulate(self, inputs):
+        mem = cgra_sim.Memory()
+        x = mem.alloc(inputs['x'])
+        part = mem.alloc(size=self.n_cols)
+        stats = self._sim(mem).run(1, [x + 4 * c * self.chunk for c in range(self.n_cols)],
+                                   [part + 4 * c for c in range(self.n_cols)])
+        done = self.n_cols * self.chunk
+        res = self._combine(mem.read_array(part, self.n_cols) + list(inputs['x'][done:]))
+        cycles = self._launch_cost(stats, 2 * self.n_cols)
+        cycles += (self.n_cols + self.length - done) * HOST_CYCLES_PER_ELEM
+        return np.array([res], dtype=np.int32), cycles
+
+    def elements(self):
+        return self.length
+
+    def cpu_cycles(self):
+        return self.length * HOST_CYCLES_PER_ELEM
+
+    def host_code(self) -> str:
+        n = self.name
+        N = n.upper()
+        combine = {'sum': "acc += v;",
+                   'min': "if (v < acc) acc = v;",
+                   'max': "if (v > acc) acc = v;"}[self.op]
+        return f"""// Host-side setup for {self.describe()}
+// Generated by cgra_kernel_gen.py
+
+#define {N}_LEN         {self.length}
+#define {N}_N_COLS      {self.n_cols}
+#define {N}_CHUNK       {self.chunk}
+
+// One partial result per column
+static int32_t {n}_partials[{N}_N_COLS];
+
+/**
+ * Set the column pointers. Column c reduces x[c*CHUNK .. (c+1)*CHUNK-1].
+ */
+static inline void {n}_setup(const cgra_t *cgra, const int32_t *x)
+{{
+  for (uint32_t col = 0; col < {N}_N_COLS; col++) {{
+    cgra_set_read_ptr(cgra, (uint32_t) &x[col * {N}_CHUNK], col);
+    cgra_set_write_ptr(cgra, (uint32_t) &{n}_partials[col], col);
+  }}
+}}
+
+/**
+ * Combine the column partials and the elements not covered by the columns.
+ */
+static inline int32_t {n}_finalize(const int32_t *x)
+{{
+  int32_t acc = {n}_partials[0];
+  for (uint32_t i = 1; i < {N}_N_COLS + {N}_LEN - {N}_N_COLS * {N}_CHUNK; i++) {{
+    int32_t v = i < {N}_N_COLS ? {n}_partials[i] : x[{N}_N_COLS * {N}_CHUNK + i - {N}_N_COLS];
+    {combine}
+  }}
+  return acc;
+}}
+"""
+
+    @classmethod
+    def variants(cls, op, length, name='reduce'):
+        for n_cols in range(1, gb.CGRA_N_COL + 1):
+            for unroll in range(1, gb.CGRA_N_ROW):
+                yield dict(op=op, length=length, n_cols=n_cols, unroll=unroll, name=name)
+
+
+TEMPLATES = {
+    'gemm': GemmKernel,
+    'fir': FirKernel,
+    'conv2d': Conv2dKernel,
+    'reduce': ReduceKernel,
+}
+
+
+# =============================================================================
+# Variant selection
+# =============================================================================
+
+def evaluate(kernel: KernelTemplate, seed: int = 0) -> Tuple[int, bool]:
+    """Run a kernel on random stimuli and return (cycles, matches golden)."""
+    inputs = kernel.make_inputs(np.random.default_rng(seed))
+    out, cycles = kernel.simulate(inputs)
+    return cycles, bool(np.array_equal(out, kernel.golden(inputs)))
+
+
+def energy_estimate(kernel: KernelTemplate, cycles: int, weights: Dict[str, float]) -> float:
+    """Energy (pJ) of the last simulate() call of a kernel taking cycles in total."""
+    act = cgra_energy.empty_activity()
+    for stats in kernel.launch_stats:
+        cgra_energy.add_activity(act, cgra_energy.sim_activity(stats))
+    act['cpu'] = cycles - act['cpu_wfi']
+    return sum(cgra_energy.energy(act, weights).values())
+
+
+def autotune(kind: str, fixed: Optional[dict] = None, verbose: bool = False,
+             objective: str = 'cycles', energy_weights: Optional[Dict[str, float]] = None,
+             **problem) -> Tuple[KernelTemplate, List[Tuple[dict, int, float]]]:
+    """
+    Pick the fastest (or least energy) variant of a template for a problem size.
+
+    fixed pins some variant parameters (e.g. n_cols). Returns the best kernel
+    and the (parameters, cycles, energy) list of every variant that was evaluated.
+    """
+    cls = TEMPLATES[kind]
+    fixed = fixed or {}
+    energy_weights = energy_weights or cgra_energy.DEFAULT_WEIGHTS
+    best, best_cost, results = None, None, []
+    for params in cls.variants(**problem):
+        if any(params.get(k) != v for k, v in fixed.items()):
+            continue
+        try:
+            kernel = cls(**params)
+        except ValueError as e:
+            if verbose:
+                print(f"  skip {params}: {e}")
+            continue
+        cycles, ok = evaluate(kernel)
+        if not ok:
+            raise RuntimeError(f"{kernel.describe()} does not match its golden model")
+        nrg = energy_estimate(kernel, cycles, energy_weights)
+        results.append((params, cycles, nrg))
+        if verbose:
+            print(f"  {kernel.describe():60s} {kernel.num_instr:3d} instr {cycles:10d} cycles "
+                  f"{nrg:12.1f} pJ")
+        cost = nrg if objective == 'energy' else cycles
+        if best_cost is None or cost < best_cost:
+            best, best_cost = kernel, cost
+    if best is None:
+        raise ValueError(f"No {kind} variant fits the CGRA for {problem}")
+    return best, results
+
+
+def write_outputs(kernel: KernelTemplate, out_dir: str, seed: int = 0):
+    os.makedirs(out_dir, exist_ok=True)
+    kernel.write_csv(os.path.join(out_dir, 'instructions.csv'))
+    with open(os.path.join(out_dir, 'cgra_bitstream.h'), 'w') as f:
+        f.write(kernel.bitstream_header())
+    with open(os.path.join(out_dir, f'{kernel.name}_host.h'), 'w') as f:
+        guard = f"_{kernel.name.upper()}_HOST_H_"
+        f.write(f"#ifndef {guard}\n#define {guard}\n\n#include <stdint.h>\n\n#include \"cgra.h\"\n\n")
+        f.write(kernel.host_code())
+        f.write(f"\n#endif // {guard}\n")
+    inputs = kernel.make_inputs(np.random.default_rng(seed))
+    with open(os.path.join(out_dir, f'{kernel.name}_data.h'), 'w') as f:
+        f.write(kernel.data_header(inputs))
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(v, 0) for v in text.replace(' ', '').split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate CGRA kernels from parameterised templates')
+    sub = parser.add_subparsers(dest='kind', required=True)
+
+    def common(p):
+        p.add_argument('-o', '--output', default='.', help='Output directory')
+        p.add_argument('--name', default=None, help='C identifier prefix (default: template name)')
+        p.add_argument('--cols', type=int, default=None, help='Number of columns (default: autotune)')
+        p.add_argument('--seed', type=int, default=0, help='Seed for the generated stimuli')
+        p.add_argument('-v', '--verbose', action='store_true', help='Print every evaluated variant')
+        p.add_argument('--objective', choices=('cycles', 'energy'), default='cycles',
+                       help='Variant selection criterion (default: cycles)')
+        p.add_argument('--energy-weights', metavar='FILE', help='Energy weights (JSON), see cgra_energy.py')
+
+    p = sub.add_parser('gemm', help='Tiled matrix multiplication')
+    p.add_argument('--m', type=int, required=True)
+    p.add_argument('--n', type=int, required=True)
+    p.add_argument('--k', type=int, required=True)
+    p.add_argument('--tile-m', type=int, default=None, help='Rows of C per launch (default: autotune)')
+    common(p)
+
+    p = sub.add_parser('fir', help='FIR filter with constant taps')
+    p.add_argument('--taps', type=_int_list, required=True, help='Comma-separated taps')
+    p.add_argument('--length', type=int, required=True, help='Input length')
+    common(p)
+
+    p = sub.add_parser('conv2d', help='2-D convolution with constant weights')
+    p.add_argument('--weights', required=True, help='Rows separated by ";", e.g. "1,2,1;2,4,2;1,2,1"')
+    p.add_argument('--height', type=int, required=True)
+    p.add_argument('--width', type=int, required=True)
+    common(p)
+
+    p = sub.add_parser('reduce', help='sum/min/max reduction')
+    p.add_argument('--op', choices=ReduceKernel.OPS, default='sum')
+    p.add_argument('--length', type=int, required=True)
+    p.add_argument('--unroll', type=int, default=None, help='Rows loading in parallel (default: autotune)')
+    common(p)
+
+    args = parser.parse_args()
+    name = args.name or args.kind
+    fixed = {}
+    if args.cols is not None:
+        fixed['n_cols'] = args.cols
+
+    if args.kind == 'gemm':
+        problem = dict(m=args.m, n=args.n, k=args.k)
+        if args.tile_m is not None:
+            fixed['tile_m'] = args.tile_m
+    elif args.kind == 'fir':
+        problem = dict(taps=args.taps, length=args.length)
+    elif args.kind == 'conv2d':
+        problem = dict(weights=[_int_list(r) for r in args.weights.split(';')],
+                       height=args.height, width=args.width)
+    else:
+        problem = dict(op=args.op, length=args.length)
+        if args.unroll is not None:
+            fixed['unroll'] = args.unroll
+
+    try:
+        weights = cgra_energy.load_weights(args.energy_weights)
+        kernel, results = autotune(args.kind, fixed, args.verbose, args.objective, weights,
+                                   name=name, **problem)
+    except (OSError, ValueError) as e:
+        sys.exit(f"ERROR: {e}")
+
+    write_outputs(kernel, args.output, args.seed)
+    _, cycles, nrg = min(results, key=lambda r: r[2] if args.objective == 'energy' else r[1])
+    cpu_cycles = kernel.cpu_cycles()
+    cpu_nrg = cpu_cycles * weights['cpu']
+    n = kernel.elements()
+    print(f"Selected {kernel.describe()} out of {len(results)} variant(s)")
+    print(f"  {kernel.num_instr} instructions per RC, ~{cycles} cycles (model estimate)")
+    print(f"  CGRA: {nrg:.1f} pJ ({nrg / n:.2f} pJ per element), "
+          f"CPU only: ~{cpu_cycles} cycles, {cpu_nrg:.1f} pJ ({cpu_nrg / n:.2f} pJ per element)")
+    print(f"  Speed-up over the CPU: {cpu_cycles / cycles:.2f}x, energy ratio: {cpu_nrg / nrg:.2f}x")
+    print(f"Written instructions.csv, cgra_bitstream.h, {name}_host.h and {name}_data.h to {args.output}")
+    # Like cgra_dse.py, a kernel the CGRA does not win is better left on the CPU
+    if args.objective == 'energy':
+        cgra_loses, what = nrg >= cpu_nrg, f"{nrg:.1f} pJ against {cpu_nrg:.1f} pJ"
+    else:
+        cgra_loses, what = cycles >= cpu_cycles, f"~{cycles} cycles against ~{cpu_cycles}"
+    if cgra_loses:
+        print(f"WARNING: the best CGRA variant loses to the CPU-only version ({what}), "
+              f"run this {args.kind} on the CPU", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+CGRA Kernel Table Generator
+
+Packs several kernels (instructions.csv files) into a kernel table for the
+overlay manager of the CGRA driver (cgra_overlay.h). Instead of one
+CGRA_CMEM_TOT_DEPTH image linked in RAM, every kernel is stored once in a
+relocatable form: for each row, the n_cols * n_instr context words of its
+columns. The manager copies them into free context memory space when the
+kernel is requested.
+
+With the FLASH_LOAD linker script the words are placed in the flash-only
+section (.xheep_data_flash_only) and fetched through the SPI flash; otherwise
+they stay in memory and are copied with the DMA.
+
+Usage:
+    python cgra_kernel_table.py kernels/fir/instructions.csv kernels/rsum/instructions.csv -o cgra_kernel_table.h
+    python cgra_kernel_table.py FIR=fir.csv SUM=sum.csv -o cgra_kernel_table.h
+
+The table index of each kernel is available as CGRA_KT_<NAME> (by default
+the name of the directory holding the CSV).
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import List, Tuple
+
+import generate_bitstream as gb
+
+
+def kernel_words(csv_path: str) -> Tuple[int, int, List[int]]:
+    """Return (n_cols, n_instr, words) of a kernel, words ordered row by row."""
+    num_instr, instructions = gb.parse_csv(csv_path)
+    kmem, cmem = gb.build_memories(num_instr, instructions)
+    cols_mask = kmem[1] >> (gb.RCS_NUM_CREG_LOG2 + gb.CGRA_CMEM_BK_DEPTH_LOG2)
+    n_cols = cols_mask.bit_length()
+    footprint = n_cols * num_instr
+    if num_instr > gb.RCS_NUM_CREG:
+        raise ValueError(f"{csv_path}: {num_instr} instructions, the RCs hold {gb.RCS_NUM_CREG}")
+    if footprint > gb.CGRA_CMEM_BK_DEPTH:
+        raise ValueError(f"{csv_path}: {footprint} words per bank, a bank holds {gb.CGRA_CMEM_BK_DEPTH}")
+    words = []
+    for row in range(gb.CGRA_N_ROW):
+        base = row * gb.CGRA_CMEM_BK_DEPTH
+        words.extend(cmem[base:base + footprint])
+    return n_cols, num_instr, words
+
+
+def kernel_name(spec: str) -> Tuple[str, str]:
+    """Split a NAME=path argument; the name defaults to the CSV directory."""
+    if '=' in spec:
+        name, path = spec.split('=', 1)
+    else:
+        path = spec
+        name = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    name = re.sub(r'\W', '_', name).upper()
+    return name, path
+
+
+def generate_table(specs: List[str]) -> str:
+    entries = []
+    words = []
+    for spec in specs:
+        name, path = kernel_name(spec)
+        if any(name == e[0] for e in entries):
+            raise ValueError(f"Duplicate kernel name {name}")
+        n_cols, n_instr, kw = kernel_words(path)
+        entries.append((name, n_cols, n_instr, len(words), path))
+        words.extend(kw)
+
+    text = ["#ifndef _CGRA_KERNEL_TABLE_H_",
+            "#define _CGRA_KERNEL_TABLE_H_",
+            "",
+            "#include <stdint.h>",
+            "",
+            "#include \"cgra_overlay.h\"",
+            "",
+            "// Generated by cgra_kernel_table.py",
+            "",
+            f"#define CGRA_KT_N_KERNELS {len(entries)}",
+            f"#define CGRA_KT_N_WORDS   {len(words)}",
+            ""]
+    for idx, (name, _, _, _, path) in enumerate(entries):
+        text.append(f"#define CGRA_KT_{name} {idx} // {path}")
+    text += ["",
+             "const cgra_overlay_kernel_t cgra_kernel_table[CGRA_KT_N_KERNELS] = {"]
+    for name, n_cols, n_instr, offset, _ in entries:
+        text.append(f"  {{ .n_cols = {n_cols}, .n_instr = {n_instr}, .offset = {offset} }}, // {name}")
+    text[-1] = text[-1].replace('},', '} ', 1)
+    text += ["};",
+             "",
+             "// Context words of every kernel: row 0 to CGRA_N_ROWS-1, n_cols * n_instr words each",
+             "#ifdef FLASH_LOAD",
+             "#define CGRA_KT_WORDS_ATTR __attribute__((section(\".xheep_data_flash_only\"))) __attribute__ ((aligned (16)))",
+             "#else",
+             "#define CGRA_KT_WORDS_ATTR",
+             "#endif",
+             "",
+             "uint32_t CGRA_KT_WORDS_ATTR cgra_kernel_table_words[CGRA_KT_N_WORDS] = {"]
+    for i in range(0, len(words), 8):
+        text.append("  " + ", ".join(f"0x{w:x}" for w in words[i:i + 8]) + ",")
+    text[-1] = text[-1].rstrip(',')
+    text += ["};",
+             "",
+             "#endif // _CGRA_KERNEL_TABLE_H_"]
+    return "\n".join(text) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack CGRA kernels into a table for the overlay manager')
+    parser.add_argument('kernels', nargs='+', help='instructions.csv files, optionally as NAME=path')
+    parser.add_argument('-o', '--output', default='cgra_kernel_table.h', help='Output header')
+    args = parser.parse_args()
+
+    try:
+        header = generate_table(args.kernels)
+    except (ValueError, OSError) as e:
+        sys.exit(f"ERROR: {e}")
+
+    with open(args.output, 'w') as f:
+        f.write(header)
+    print(f"Written {len(args.kernels)} kernel(s) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
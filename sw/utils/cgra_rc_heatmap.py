@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+CGRA RC Utilisation Heatmap
+
+Renders the per-RC performance counters (rc_perf_cnt in heepsilon_cfg.hjson)
+of a UART dump as a rows x cols heatmap. The application prints one line per
+RC, as cgra_func_test does:
+
+    CGRA RC <row> <col>: issue <n> mem <n> stall <n> branch <n>
+
+and, for the utilisation metric, the active cycles of the columns:
+
+    CGRA column <col> active cycles: <n>
+
+When the log holds several dumps, the last value of each counter is used.
+
+Usage:
+    python cgra_rc_heatmap.py uart0.log
+    python cgra_rc_heatmap.py uart0.log --metric stall --png stall.png
+
+Metrics: issue, mem, stall, branch (raw counters) and util (non-NOP
+instructions per active cycle of the column).
+"""
+
+import argparse
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+EVENTS = ('issue', 'mem', 'stall', 'branch')
+METRICS = EVENTS + ('util',)
+
+RC_LINE = re.compile(r'CGRA RC (\d+) (\d+): issue (\d+) mem (\d+) stall (\d+) branch (\d+)')
+COL_LINE = re.compile(r'CGRA column (\d+) active cycles: (\d+)')
+
+# From empty to full cell
+SHADES = ' .:-=+*#%@'
+
+
+def parse_log(lines) -> Tuple[Dict[Tuple[int, int], Dict[str, int]], Dict[int, int]]:
+    """Return the RC counters {(row, col): {event: n}} and the column active cycles."""
+    rcs = {}
+    active = {}
+    for line in lines:
+        m = RC_LINE.search(line)
+        if m:
+            row, col, *counts = (int(v) for v in m.groups())
+            rcs[(row, col)] = dict(zip(EVENTS, counts))
+            continue
+        m = COL_LINE.search(line)
+        if m:
+            active[int(m.group(1))] = int(m.group(2))
+    return rcs, active
+
+
+def build_grid(rcs: Dict[Tuple[int, int], Dict[str, int]], active: Dict[int, int],
+               metric: str) -> List[List[Optional[float]]]:
+    """Return the metric of each RC, None for the RCs missing from the dump."""
+    n_rows = max(r for r, _ in rcs) + 1
+    n_cols = max(c for _, c in rcs) + 1
+    grid = [[None] * n_cols for _ in range(n_rows)]
+    for (row, col), counts in rcs.items():
+        if metric == 'util':
+            if not active.get(col):
+                raise ValueError(f"no active cycles for column {col} in the log")
+            grid[row][col] = counts['issue'] / active[col]
+        else:
+            grid[row][col] = float(counts[metric])
+    return grid
+
+
+def render_text(grid: List[List[Optional[float]]], metric: str) -> str:
+    """Shaded rows x cols map followed by the values."""
+    peak = max((v for row in grid for v in row if v is not None), default=0.0)
+    scale = 1.0 if metric == 'util' else peak
+    n_cols = len(grid[0])
+    out = [f"{metric} (full cell = {'100%' if metric == 'util' else int(peak)})",
+           '      ' + ''.join(f'col{c:<4}' for c in range(n_cols))]
+    for r, row in enumerate(grid):
+        cells = []
+        for v in row:
+            if v is None:
+                cells.append('  ?    ')
+                continue
+            level = 0 if scale == 0 else min(len(SHADES) - 1, int(v / scale * (len(SHADES) - 1) + 0.5))
+            cells.append(' ' + SHADES[level] * 4 + '  ')
+        out.append(f'row{r:<3}' + ''.join(cells))
+    out.append('')
+    for r, row in enumerate(grid):
+        vals = ['?' if v is None else (f'{v:.1%}' if metric == 'util' else str(int(v))) for v in row]
+        out.append(f'row{r:<3}' + ''.join(f'{v:>7}' for v in vals))
+    return '\n'.join(out)
+
+
+def render_png(grid: List[List[Optional[float]]], metric: str, path: str) -> None:
+    """Save the heatmap as an image (requires matplotlib)."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise SystemExit("--png requires matplotlib")
+
+    data = [[float('nan') if v is None else v for v in row] for row in grid]
+    fig, ax = plt.subplots()
+    im = ax.imshow(data, cmap='viridis', vmin=0, vmax=1 if metric == 'util' else None)
+    ax.set_xticks(range(len(grid[0])))
+    ax.set_yticks(range(len(grid)))
+    ax.set_xlabel('column')
+    ax.set_ylabel('row')
+    ax.set_title(f'CGRA RC {metric}')
+    for r, row in enumerate(grid):
+        for c, v in enumerate(row):
+            if v is not None:
+                ax.text(c, r, f'{v:.0%}' if metric == 'util' else int(v), ha='center', va='center', color='w')
+    fig.colorbar(im, ax=ax)
+    fig.savefig(path, bbox_inches='tight')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render the per-RC performance counters of a UART dump')
+    parser.add_argument('log', help='UART dump (e.g. uart0.log), - for stdin')
+    parser.add_argument('--metric', choices=METRICS, default='util', help='Value shown per RC (default: util)')
+    parser.add_argument('--png', metavar='FILE', help='Also save the heatmap as an image (requires matplotlib)')
+    args = parser.parse_args()
+
+    if args.log == '-':
+        rcs, active = parse_log(sys.stdin)
+    else:
+        with open(args.log) as f:
+            rcs, active = parse_log(f)
+    if not rcs:
+        sys.exit(f"{args.log}: no 'CGRA RC' lines, is rc_perf_cnt enabled in heepsilon_cfg.hjson?")
+
+    metric = args.metric
+    if metric == 'util' and not active:
+        print("No column active cycles in the log, showing the issue counters", file=sys.stderr)
+        metric = 'issue'
+    try:
+        grid = build_grid(rcs, active, metric)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    print(render_text(grid, metric))
+    if args.png:
+        render_png(grid, metric, args.png)
+        print(f"Saved {args.png}")
+
+
+if __name__ == '__main__':
+    main()
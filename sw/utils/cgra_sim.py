@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Behavioural CGRA Model
+
+Executes encoded CGRA kernels (the kmem/cmem words produced by
+generate_bitstream.py) on a step-by-step model of the OpenEdgeCGRA array
+so kernels can be checked against golden models and compared without an
+RTL simulation.
+
+Usage:
+    python cgra_sim.py instructions.csv [--mem memory.csv] [--ptr-in 0x100 ...]
+
+Modelled behaviour (see hw/vendor/esl_epfl_cgra/hw/rtl):
+- One step executes one instruction in every RC of the active columns.
+  Operands from neighbours are the registered outputs of the previous step
+  (torus mesh). NOPs keep the output register.
+- LWD/SWD use the per-column read/write pointers, post-incremented by the
+  sign-extended immediate. With the 2-D addressing (AGEN registers) the
+  pointer moves to the start of the row plus the row stride after every
+  inner_cnt accesses. LWI/SWI take the address from operand B.
+- Columns of a kernel run in lockstep. A branch is taken only when exactly
+  one RC of the kernel requests it, as in the controller's one-hot merge.
+- LOOP shares the branch request path. It repeats the instructions from the
+  next one up to the immediate address, operand A times, without a branch.
+  A branch taken on the last body instruction wins over the wrap and does
+  not consume an iteration, as in program_counter.sv.
+
+MAC adds the product to the destination register. SADD2/SMUL2 and
+SADD4/SMUL4 work on 2x16-bit and 4x8-bit lanes that wrap around.
+
+Cycle accounting is approximate: a step costs one cycle, SMUL/FXPMUL/MAC
+and the packed products stretch it to three, and memory operations of a column are serialised on
+its bus port (one grant per access plus one cycle of read latency).
+"""
+
+import argparse
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import generate_bitstream as gb
+
+# =============================================================================
+# Model parameters
+# =============================================================================
+
+MUL_STEP_CYCLES = 3            # multiplications stall the array (alu_stall_o)
+MEM_READ_LATENCY = 1           # rvalid one cycle after the grant
+CONF_OVERHEAD_CYCLES = 2       # per column, on top of one cycle per word
+START_OVERHEAD_CYCLES = 3      # kernel id decode and column start
+MAX_STEPS = 10_000_000
+
+NBIT_DEC = 15                  # FXPMUL fractional bits (cgra_pkg)
+LOOP_CNT_BITS = 16             # RCS_LOOP_CNT_WIDTH (cgra_pkg)
+
+MASK32 = 0xFFFFFFFF
+
+# Decoded opcode / mux names, indexed by their encoding
+_OPS = gb.ALU_op_list
+_MUX = gb.muxA_list
+_MUXF = gb.muxF_list
+
+_BRANCH_OPS = ('BEQ', 'BNE', 'BLT', 'BGE', 'JUMP')
+_MUL_OPS = ('SMUL', 'FXPMUL', 'MAC', 'SMUL2', 'SMUL4')
+
+
+def to_s32(x: int) -> int:
+    x &= MASK32
+    return x - (1 << 32) if x & 0x80000000 else x
+
+
+def sign_ext(x: int, bits: int) -> int:
+    x &= (1 << bits) - 1
+    return x - (1 << bits) if x & (1 << (bits - 1)) else x
+
+
+def packed(a: int, b: int, lane_bits: int, fn) -> int:
+    """Apply fn lane by lane, keeping the low bits of each lane result."""
+    lane_mask = (1 << lane_bits) - 1
+    res = 0
+    for sh in range(0, 32, lane_bits):
+        res |= (fn((a >> sh) & lane_mask, (b >> sh) & lane_mask) & lane_mask) << sh
+    return res
+
+
+def decode_instruction(word: int) -> Tuple[str, str, str, int, bool, str, int]:
+    """Split a 32-bit configuration word into its fields."""
+    mux_a = (word >> 28) & 0xF
+    mux_b = (word >> 24) & 0xF
+    op = (word >> 19) & 0x1F
+    reg = (word >> 17) & 0x3
+    we = bool((word >> 16) & 0x1)
+    mux_f = (word >> 13) & 0x7
+    imm = sign_ext(word, gb.RCS_IMM_BITS)
+    name = _OPS[op] if op < len(_OPS) else 'NOP'
+    return (_MUX[mux_a] if mux_a < len(_MUX) else 'ZERO',
+            _MUX[mux_b] if mux_b < len(_MUX) else 'ZERO',
+            name, reg, we,
+            _MUXF[mux_f] if mux_f < len(_MUXF) else None,
+            imm)
+
+
+# =============================================================================
+# Memory
+# =============================================================================
+
+class ColumnStream:
+    """LWD/SWD pointer of a column with its 2-D addressing (AGEN_IN/OUT_COL_n)."""
+
+    def __init__(self, ptr: int, inner_cnt: int = 0, outer_stride: int = 0):
+        self.ptr = self.row_base = ptr & MASK32
+        self.inner_cnt = inner_cnt
+        self.outer_stride = outer_stride
+        self.idx = 0
+
+    def advance(self, inc: int):
+        if self.inner_cnt and self.idx == self.inner_cnt - 1:
+            self.row_base = (self.row_base + self.outer_stride) & MASK32
+            self.ptr = self.row_base
+            self.idx = 0
+        else:
+            self.ptr = (self.ptr + inc) & MASK32
+            self.idx += 1
+
+
+class Memory:
+    """Sparse word-addressed data memory with a bump allocator."""
+
+    def __init__(self, base: int = 0x1000):
+        self.words: Dict[int, int] = {}
+        self.next_free = base
+        self.allocs: List[Tuple[int, int]] = []    # (byte address, words) of each alloc()
+
+    def alloc(self, values: Sequence[int] = (), size: Optional[int] = None) -> int:
+        """Place values (or size zeroed words) and return the byte address."""
+        n = len(values) if size is None else size
+        addr = self.next_free
+        for i in range(n):
+            self.words[addr + 4 * i] = to_s32(int(values[i])) if i < len(values) else 0
+        self.next_free += 4 * max(n, 1)
+        self.allocs.append((addr, n))
+        return addr
+
+    def read(self, addr: int) -> int:
+        if addr & 0x3:
+            raise ValueError(f"Unaligned CGRA access at 0x{addr:x}")
+        return self.words.get(addr & MASK32, 0)
+
+    def write(self, addr: int, value: int):
+        if addr & 0x3:
+            raise ValueError(f"Unaligned CGRA access at 0x{addr:x}")
+        self.words[addr & MASK32] = to_s32(value)
+
+    def read_array(self, addr: int, n: int) -> List[int]:
+        return [self.read(addr + 4 * i) for i in range(n)]
+
+
+# =============================================================================
+# Simulator
+# =============================================================================
+
+class CgraSim:
+    """Step-level model of the CGRA array executing one kernel at a time."""
+
+    def __init__(self, kmem: Sequence[int], cmem: Sequence[int],
+                 mem: Optional[Memory] = None,
+                 n_rows: Optional[int] = None, n_cols: Optional[int] = None,
+                 trace: Optional[list] = None):
+        self.kmem = list(kmem)
+        self.cmem = list(cmem)
+        self.mem = mem if mem is not None else Memory()
+        # Default: the geometry of generate_bitstream (see gb.configure())
+        self.n_rows = n_rows or gb.CGRA_N_ROW
+        self.n_cols = n_cols or gb.CGRA_N_COL
+        self.configured = None
+        self.stats = {}
+        # When a list, run() appends the memory accesses of every step:
+        # [(column, byte address, is_write), ...]
+        self.trace = trace
+
+    def kernel_info(self, kernel_id: int) -> Tuple[int, int, int]:
+        """Return (columns bitmask, cmem start address, number of instructions)."""
+        word = self.kmem[kernel_id]
+        n_instr = (word & (gb.RCS_NUM_CREG - 1)) + 1
+        start = (word >> gb.RCS_NUM_CREG_LOG2) & (gb.CGRA_CMEM_BK_DEPTH - 1)
+        cols = word >> (gb.RCS_NUM_CREG_LOG2 + gb.CGRA_CMEM_BK_DEPTH_LOG2)
+        return cols, start, n_instr
+
+    def run(self, kernel_id: int, read_ptrs: Sequence[int] = (),
+            write_ptrs: Sequence[int] = (),
+            read_agen: Sequence[Tuple[int, int]] = (),
+            write_agen: Sequence[Tuple[int, int]] = ()) -> dict:
+        """Execute a kernel to its EXIT and return the collected statistics.
+
+        read_agen/write_agen give (inner_cnt, outer_stride) per kernel column.
+        """
+        cols_mask, start, n_instr = self.kernel_info(kernel_id)
+        cols = [c for c in range(self.n_cols) if cols_mask & (1 << c)]
+        if not cols:
+            raise ValueError(f"Kernel {kernel_id} has no columns in kmem")
+        rows = range(self.n_rows)
+        depth = gb.CGRA_CMEM_BK_DEPTH
+
+        # Configuration: each column copies its slice of every row bank
+        prog = {}
+        for k, c in enumerate(cols):
+            for r in rows:
+                prog[r, c] = [decode_instruction(self.cmem[r * depth + start + k * n_instr + i])
+                              for i in range(n_instr)]
+        conf_cycles = 0
+        if self.configured != kernel_id:
+            conf_cycles = len(cols) * (n_instr + CONF_OVERHEAD_CYCLES)
+            self.configured = kernel_id
+
+        rd_ptr = {c: ColumnStream(read_ptrs[k] if k < len(read_ptrs) else 0,
+                                  *(read_agen[k] if k < len(read_agen) else (0, 0)))
+                  for k, c in enumerate(cols)}
+        wr_ptr = {c: ColumnStream(write_ptrs[k] if k < len(write_ptrs) else 0,
+                                  *(write_agen[k] if k < len(write_agen) else (0, 0)))
+                  for k, c in enumerate(cols)}
+        regs = {(r, c): [0, 0, 0, 0] for r in rows for c in cols}
+        out = {(r, c): 0 for r in range(self.n_rows) for c in range(self.n_cols)}
+        flag = {(r, c): (0, 1) for r in range(self.n_rows) for c in range(self.n_cols)}
+
+        st = {'steps': 0, 'cycles': 0, 'conf_cycles': conf_cycles,
+              'ops': {}, 'mem_ops': 0, 'mul_steps': 0, 'stall_cycles': 0,
+              'branches_taken': 0, 'loop_wraps': 0,
+              'rc_active': {(r, c): 0 for r in rows for c in cols}}
+        pc = 0
+        loop_start = loop_end = loop_rem = 0
+        nr, nc = self.n_rows, self.n_cols
+
+        while True:
+            if st['steps'] >= MAX_STEPS:
+                raise RuntimeError("Kernel did not reach EXIT")
+            new_out = dict(out)
+            new_flag = dict(flag)
+            branch_reqs = []
+            loop_reqs = []
+            exit_req = False
+            has_mul = False
+            mem_per_col = {c: [0, 0] for c in cols}
+            accesses = []
+
+            for c in cols:
+                for r in rows:
+                    mux_a, mux_b, op, reg, we, mux_f, imm = prog[r, c][pc]
+                    if op == 'NOP':
+                        continue
+                    st['ops'][op] = st['ops'].get(op, 0) + 1
+                    st['rc_active'][r, c] += 1
+                    rf = regs[r, c]
+                    has_mul |= op in _MUL_OPS
+
+                    def operand(sel):
+                        if sel == 'ZERO':
+                            return 0
+                        if sel == 'SELF':
+                            return out[r, c]
+                        if sel == 'RCL':
+                            return out[r, (c - 1) % nc]
+                        if sel == 'RCR':
+                            return out[r, (c + 1) % nc]
+                        if sel == 'RCT':
+                            return out[(r - 1) % nr, c]
+                        if sel == 'RCB':
+                            return out[(r + 1) % nr, c]
+                        if sel == 'IMM':
+                            return imm
+                        return rf[int(sel[1])]
+
+                    def flag_src(sel):
+                        if sel == 'RCL':
+                            return flag[r, (c - 1) % nc]
+                        if sel == 'RCR':
+                            return flag[r, (c + 1) % nc]
+                        if sel == 'RCT':
+                            return flag[(r - 1) % nr, c]
+                        if sel == 'RCB':
+                            return flag[(r + 1) % nr, c]
+                        if sel == 'SELF':
+                            return flag[r, c]
+                        return (0, 0)
+
+                    a = operand(mux_a)
+                    b = operand(mux_b)
+                    res = 0
+                    if op == 'SADD':
+                        res = a + b
+                    elif op == 'SSUB':
+                        res = a - b
+                    elif op == 'SMUL':
+                        res = a * b
+                    elif op == 'FXPMUL':
+                        res = (a * b) >> NBIT_DEC
+                    elif op == 'MAC':
+                        res = rf[reg] + a * b
+                    elif op in ('SADD2', 'SADD4'):
+                        res = packed(a, b, 16 if op == 'SADD2' else 8, lambda x, y: x + y)
+                    elif op in ('SMUL2', 'SMUL4'):
+                        res = packed(a, b, 16 if op == 'SMUL2' else 8, lambda x, y: x * y)
+                    elif op == 'SLL':
+                        res = (a & MASK32) << (b & 31)
+                    elif op == 'SRL':
+                        res = (a & MASK32) >> (b & 31)
+                    elif op == 'SRA':
+                        res = to_s32(a) >> (b & 31)
+                    elif op == 'LAND':
+                        res = a & b
+                    elif op == 'LOR':
+                        res = a | b
+                    elif op == 'LXOR':
+                        res = a ^ b
+                    elif op == 'LNAND':
+                        res = ~(a & b)
+                    elif op == 'LNOR':
+                        res = ~(a | b)
+                    elif op == 'LNXOR':
+                        res = ~(a ^ b)
+                    elif op in ('BSFA', 'BZFA'):
+                        sign, zero = flag_src(mux_f)
+                        sel = sign if op == 'BSFA' else zero
+                        res = a if sel else b
+                    elif op in _BRANCH_OPS:
+                        diff = to_s32(a - b)
+                        if op == 'BEQ':
+                            taken = diff == 0
+                        elif op == 'BNE':
+                            taken = diff != 0
+                        elif op == 'BLT':
+                            taken = to_s32(a) < to_s32(b)
+                        elif op == 'BGE':
+                            taken = to_s32(a) >= to_s32(b)
+                        else:
+                            taken = True
+                        res = a + b if op == 'JUMP' else int(taken)
+                        if taken:
+                            target = ((a + b) if op == 'JUMP' else imm) & (gb.RCS_NUM_CREG - 1)
+                            branch_reqs.append(target)
+                    elif op == 'LWD':
+                        accesses.append((c, rd_ptr[c].ptr, False))
+                        res = self.mem.read(rd_ptr[c].ptr)
+                        rd_ptr[c].advance(imm)
+                        mem_per_col[c][0] += 1
+                    elif op == 'LWI':
+                        accesses.append((c, b & MASK32, False))
+                        res = self.mem.read(b & MASK32)
+                        mem_per_col[c][0] += 1
+                    elif op == 'SWD':
+                        accesses.append((c, wr_ptr[c].ptr, True))
+                        self.mem.write(wr_ptr[c].ptr, a)
+                        wr_ptr[c].advance(imm)
+                        mem_per_col[c][1] += 1
+                    elif op == 'SWI':
+                        accesses.append((c, b & MASK32, True))
+                        self.mem.write(b & MASK32, a)
+                        mem_per_col[c][1] += 1
+                    elif op == 'LOOP':
+                        loop_reqs.append((imm & (gb.RCS_NUM_CREG - 1), a & ((1 << LOOP_CNT_BITS) - 1)))
+                    elif op == 'EXIT':
+                        exit_req = True
+
+                    res = to_s32(res)
+                    if op in ('SWD', 'SWI'):
+                        new_out[r, c] = to_s32(a)
+                        new_flag[r, c] = (0, 1)
+                    else:
+                        new_out[r, c] = res
+                        new_flag[r, c] = (1 if res < 0 else 0, 1 if res == 0 else 0)
+                    if we and op not in ('SWD', 'SWI'):
+                        rf[reg] = res
+
+            # Cycle accounting for the step
+            step_cycles = MUL_STEP_CYCLES if has_mul else 1
+            for c in cols:
+                n_rd, n_wr = mem_per_col[c]
+                if n_rd or n_wr:
+                    st['mem_ops'] += n_rd + n_wr
+                    step_cycles = max(step_cycles, n_rd + n_wr + (MEM_READ_LATENCY if n_rd else 0))
+            st['mul_steps'] += has_mul
+            st['stall_cycles'] += step_cycles - 1
+            st['cycles'] += step_cycles
+            st['steps'] += 1
+            if self.trace is not None:
+                self.trace.append(accesses)
+            out, flag = new_out, new_flag
+
+            n_reqs = len(branch_reqs) + len(loop_reqs)
+            if n_reqs == 1 and branch_reqs:
+                pc = branch_reqs[0]
+                st['branches_taken'] += 1
+            elif exit_req and n_reqs != 1:
+                break
+            else:
+                if n_reqs > 1:
+                    print(f"WARNING: {n_reqs} simultaneous branch requests at "
+                          f"step {st['steps']} (pc {pc}), none taken", file=sys.stderr)
+                if n_reqs == 1:
+                    next_start = pc + 1
+                if loop_rem and pc == loop_end:
+                    pc = loop_start
+                    loop_rem -= 1
+                    st['loop_wraps'] += 1
+                else:
+                    pc += 1
+                if n_reqs == 1:
+                    loop_start = next_start
+                    loop_end, count = loop_reqs[0]
+                    loop_rem = max(count, 1) - 1
+                if pc >= n_instr:
+                    raise RuntimeError(f"Kernel ran past its last instruction (pc {pc})")
+
+        st['cycles'] += START_OVERHEAD_CYCLES
+        st['total_cycles'] = st['cycles'] + conf_cycles
+        self.stats = st
+        return st
+
+
+def simulate_instructions(num_instr: int, instructions: List[List[List[str]]],
+                          mem: Optional[Memory] = None,
+                          read_ptrs: Sequence[int] = (),
+                          write_ptrs: Sequence[int] = (),
+                          read_agen: Sequence[Tuple[int, int]] = (),
+                          write_agen: Sequence[Tuple[int, int]] = ()) -> Tuple[dict, Memory]:
+    """Encode a parsed kernel and run it as kernel id 1."""
+    kmem, cmem = gb.build_memories(num_instr, instructions)
+    sim = CgraSim(kmem, cmem, mem)
+    stats = sim.run(1, read_ptrs, write_ptrs, read_agen, write_agen)
+    return stats, sim.mem
+
+
+def parse_agen(arg: str) -> Tuple[int, int]:
+    """Parse an 'INNER_CNT:OUTER_STRIDE' 2-D addressing argument."""
+    cnt, _, stride = arg.partition(':')
+    return int(cnt, 0), int(stride or '0', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a CGRA kernel CSV on the behavioural model')
+    parser.add_argument('input', help='Input CSV file (instructions.csv)')
+    parser.add_argument('-m', '--memory', default=None, help='Optional memory.csv preloaded at its base address')
+    parser.add_argument('--ptr-in', nargs='*', default=[], help='Read pointer per column')
+    parser.add_argument('--ptr-out', nargs='*', default=[], help='Write pointer per column')
+    parser.add_argument('--agen-in', nargs='*', default=[], type=parse_agen,
+                        help='2-D read addressing per column, as INNER_CNT:OUTER_STRIDE (bytes)')
+    parser.add_argument('--agen-out', nargs='*', default=[], type=parse_agen,
+                        help='2-D write addressing per column, as INNER_CNT:OUTER_STRIDE (bytes)')
+    parser.add_argument('--dump', nargs=2, metavar=('ADDR', 'WORDS'), default=None,
+                        help='Print WORDS words starting at ADDR after execution')
+    args = parser.parse_args()
+
+    num_instr, instructions = gb.parse_csv(args.input)
+    mem = Memory()
+    if args.memory:
+        base, entries = gb.parse_memory_csv(args.memory)
+        for off, val in entries:
+            mem.write(base + off, val)
+
+    stats, mem = simulate_instructions(num_instr, instructions, mem,
+                                       [int(p, 0) for p in args.ptr_in],
+                                       [int(p, 0) for p in args.ptr_out],
+                                       args.agen_in, args.agen_out)
+    print(f"Steps:          {stats['steps']}")
+    print(f"Kernel cycles:  {stats['cycles']}")
+    print(f"Config cycles:  {stats['conf_cycles']}")
+    print(f"Memory ops:     {stats['mem_ops']}")
+    print(f"Stall cycles:   {stats['stall_cycles']}")
+    if args.dump:
+        addr, n = int(args.dump[0], 0), int(args.dump[1], 0)
+        for i, v in enumerate(mem.read_array(addr, n)):
+            print(f"  0x{addr + 4 * i:08x}: {v}")
+
+
+if __name__ == '__main__':
+    main()
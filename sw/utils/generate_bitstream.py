@@ -64,7 +64,10 @@ ALU_op_list = ['NOP',
                'BSFA', 'BZFA',
                'BEQ', 'BNE', 'BLT', 'BGE', 'JUMP',
                'LWD', 'SWD', 'LWI', 'SWI',
-               'EXIT']
+               'EXIT',
+               'MAC',
+               'SADD2', 'SADD4', 'SMUL2', 'SMUL4',
+               'LOOP']
 
 # Aliases for backward compatibility and RTL matching
 # SLT/SRT are legacy/ISA names for SLL/SRL
@@ -77,6 +80,40 @@ muxF_list = ['SELF', 'RCL', 'RCR', 'RCT', 'RCB']
 
 rcs_nop_instr = ['ZERO', 'ZERO', 'NOP', '-', 'SELF', '0']
 
+
+def configure(num_columns: int = 4, num_rows: int = 4, rcs_num_instr: int = 32,
+              cmem_bk_depth='default', kmem_depth: int = 16, max_columns='default'):
+    """
+    Set the CGRA geometry, with the parameters and defaults of the cgra block
+    of heepsilon_cfg.hjson (mirrors util/heepsilon_gen.py).
+
+    The encoder, cgra_sim.py and the kernel templates read the constants of
+    this module when they run, so a tool can evaluate another geometry than
+    the one above without regenerating the hardware.
+    """
+    global CGRA_N_COL, CGRA_N_ROW, CGRA_MAX_COL, RCS_NUM_CREG, RCS_NUM_CREG_LOG2
+    global CGRA_CMEM_BK_DEPTH, CGRA_CMEM_BK_DEPTH_LOG2, CGRA_KMEM_DEPTH, CGRA_KMEM_WIDTH
+
+    max_columns = num_columns if max_columns == 'default' else int(max_columns)
+    if cmem_bk_depth == 'default':
+        cmem_bk_depth = max_columns * rcs_num_instr
+    kmem_width = max_columns + int(ceil(log2(cmem_bk_depth))) + int(ceil(log2(rcs_num_instr)))
+    # Same limit as cgra_bitstream_gen.py: the kernel configuration word is read over the 32-bit bus
+    if kmem_width > 32:
+        raise ValueError(f"Kernel configuration word width {kmem_width} > 32 bits")
+    if rcs_num_instr & (rcs_num_instr - 1) or cmem_bk_depth & (cmem_bk_depth - 1):
+        raise ValueError("rcs_num_instr and cmem_bk_depth must be powers of 2")
+
+    CGRA_N_COL = int(num_columns)
+    CGRA_N_ROW = int(num_rows)
+    CGRA_MAX_COL = max_columns
+    RCS_NUM_CREG = int(rcs_num_instr)
+    RCS_NUM_CREG_LOG2 = int(ceil(log2(RCS_NUM_CREG)))
+    CGRA_CMEM_BK_DEPTH = int(cmem_bk_depth)
+    CGRA_CMEM_BK_DEPTH_LOG2 = int(ceil(log2(CGRA_CMEM_BK_DEPTH)))
+    CGRA_KMEM_DEPTH = int(kmem_depth)
+    CGRA_KMEM_WIDTH = kmem_width
+
 # =============================================================================
 # Utility functions (from cgra_bitstream_gen.py)
 # =============================================================================
@@ -158,6 +195,15 @@ def parse_instruction_string(instr_str: str) -> List[str]:
             return [mux_a, 'IMM', op, '-', '-', imm]
         return [mux_a, mux_b.upper(), op, '-', '-', imm]
     
+    # Hardware loop: LOOP count, last instruction of the body
+    if op == 'LOOP':
+        src = parts[1].upper() if len(parts) > 1 else '-'
+        end = parts[2] if len(parts) > 2 else '-'
+        if src == 'ROUT': src = 'SELF'
+        if src not in mux_sources or src == 'IMM':
+            print(f"WARNING: LOOP count '{src}' must be a register or a neighbour (the immediate holds the end address)")
+        return [src, '-', 'LOOP', '-', '-', end]
+    
     # JUMP
     if op == 'JUMP':
         imm = parts[1] if len(parts) > 1 else '-'
@@ -300,10 +346,9 @@ def encode_instruction(instruction: List[str]) -> int:
     return int(instr_bits, 2)
 
 
-def generate_bitstream(num_instr: int, instructions: List[List[List[str]]],
-                       kernel_name: str = "CGRA_KERNEL",
-                       memory_data: Optional[Tuple[int, List[Tuple[int, int]]]] = None) -> str:
-    """Generate cgra_bitstream.h using official encoding."""
+def build_memories(num_instr: int,
+                   instructions: List[List[List[str]]]) -> Tuple[List[int], List[int]]:
+    """Encode instructions[row][col][cycle] into (kmem, cmem) word lists."""
     
     # Pad to same length
     for row in range(CGRA_N_ROW):
@@ -351,6 +396,114 @@ def generate_bitstream(num_instr: int, instructions: List[List[List[str]]],
     for row in range(CGRA_N_ROW):
         cmem.extend(rcs_instructions[row])
     
+    return kmem, cmem
+
+
+# =============================================================================
+# Compressed cmem (decoded by cgra_cmem_init_compressed() in cgra.c)
+# =============================================================================
+#
+# One byte per token, tokens never cross a bank:
+#   0x00-0x7f  word of the dictionary
+#   0x80-0xbf  run of (t & 0x3f) + 1 zero (NOP) words
+#   0xc0-0xfe  (t & 0x3f) + 1 words left untouched (not used by any kernel)
+#   0xff       literal word, 4 bytes little endian follow
+
+CMEM_DICT_MAX = 128
+CMEM_TOK_ZERO = 0x80
+CMEM_TOK_SKIP = 0xc0
+CMEM_TOK_LIT = 0xff
+CMEM_RUN_MAX = {CMEM_TOK_ZERO: 64, CMEM_TOK_SKIP: 63}
+
+
+def cmem_used_words(kmem: List[int]) -> List[bool]:
+    """Mark the bank words read by the kernels of kmem (same for every bank)."""
+    used = [False] * CGRA_CMEM_BK_DEPTH
+    for word in kmem[1:]:
+        if word == 0:
+            continue
+        n_instr = (word & (RCS_NUM_CREG - 1)) + 1
+        start = (word >> RCS_NUM_CREG_LOG2) & ((1 << CGRA_CMEM_BK_DEPTH_LOG2) - 1)
+        n_cols = bin(word >> (RCS_NUM_CREG_LOG2 + CGRA_CMEM_BK_DEPTH_LOG2)).count('1')
+        for addr in range(start, min(start + n_cols * n_instr, CGRA_CMEM_BK_DEPTH)):
+            used[addr] = True
+    return used
+
+
+def compress_cmem(kmem: List[int], cmem: List[int]) -> Tuple[List[int], List[int]]:
+    """Encode cmem into (token bytes, dictionary words)."""
+    used = cmem_used_words(kmem)
+    words = [w for i, w in enumerate(cmem) if used[i % CGRA_CMEM_BK_DEPTH] and w != 0]
+    counts = {}
+    for w in words:
+        counts[w] = counts.get(w, 0) + 1
+    # A word seen once costs the same as a literal
+    ranked = sorted((w for w, n in counts.items() if n > 1), key=lambda w: -counts[w])
+    dictionary = ranked[:CMEM_DICT_MAX]
+    index = {w: i for i, w in enumerate(dictionary)}
+
+    stream = []
+    for bank in range(CGRA_N_ROW):
+        addr = 0
+        while addr < CGRA_CMEM_BK_DEPTH:
+            word = cmem[bank * CGRA_CMEM_BK_DEPTH + addr]
+            if not used[addr] or word == 0:
+                tok = CMEM_TOK_SKIP if not used[addr] else CMEM_TOK_ZERO
+                run = 1
+                while (addr + run < CGRA_CMEM_BK_DEPTH and run < CMEM_RUN_MAX[tok] and
+                       (not used[addr + run] if tok == CMEM_TOK_SKIP else
+                        used[addr + run] and cmem[bank * CGRA_CMEM_BK_DEPTH + addr + run] == 0)):
+                    run += 1
+                stream.append(tok | (run - 1))
+                addr += run
+                continue
+            if word in index:
+                stream.append(index[word])
+            else:
+                stream.append(CMEM_TOK_LIT)
+                stream.extend((word >> (8 * b)) & 0xff for b in range(4))
+            addr += 1
+    return stream, dictionary
+
+
+def decompress_cmem(stream: List[int], dictionary: List[int], cmem: List[int]) -> List[int]:
+    """Reference decoder: apply the stream over a previous cmem content."""
+    out = list(cmem)
+    pos = 0
+    for bank in range(CGRA_N_ROW):
+        addr = bank * CGRA_CMEM_BK_DEPTH
+        end = addr + CGRA_CMEM_BK_DEPTH
+        while addr < end:
+            tok = stream[pos]
+            pos += 1
+            if tok < CMEM_TOK_ZERO:
+                out[addr] = dictionary[tok]
+                addr += 1
+            elif tok == CMEM_TOK_LIT:
+                out[addr] = sum(stream[pos + b] << (8 * b) for b in range(4))
+                pos += 4
+                addr += 1
+            elif tok < CMEM_TOK_SKIP:
+                for a in range(addr, addr + (tok & 0x3f) + 1):
+                    out[a] = 0
+                addr += (tok & 0x3f) + 1
+            else:
+                addr += (tok & 0x3f) + 1
+    return out
+
+
+def generate_bitstream(num_instr: int, instructions: List[List[List[str]]],
+                       kernel_name: str = "CGRA_KERNEL",
+                       memory_data: Optional[Tuple[int, List[Tuple[int, int]]]] = None,
+                       fmt: str = 'full') -> str:
+    """Generate cgra_bitstream.h using official encoding.
+
+    fmt selects the cmem arrays: 'full' (cgra_cmem_bitstream), 'compressed'
+    (cgra_cmem_stream/cgra_cmem_dict) or 'both'.
+    """
+    
+    kmem, cmem = build_memories(num_instr, instructions)
+    
     # Generate header
     header = f"""#ifndef _CGRA_BITSTREAM_H_
 #define _CGRA_BITSTREAM_H_
@@ -367,15 +520,39 @@ uint32_t cgra_kmem_bitstream[CGRA_KMEM_DEPTH] = {{
   {', '.join(f'0x{x:x}' for x in kmem)}
 }};
 
-// Instruction memory (cmem)
-uint32_t cgra_cmem_bitstream[CGRA_CMEM_TOT_DEPTH] = {{
 """
     
-    for i in range(0, len(cmem), 8):
-        chunk = cmem[i:i+8]
-        header += "  " + ", ".join(f"0x{x:x}" for x in chunk) + ",\n"
-    
-    header = header.rstrip(",\n") + "\n};\n"
+    if fmt in ('full', 'both'):
+        header += """// Instruction memory (cmem)
+uint32_t cgra_cmem_bitstream[CGRA_CMEM_TOT_DEPTH] = {
+"""
+        for i in range(0, len(cmem), 8):
+            chunk = cmem[i:i+8]
+            header += "  " + ", ".join(f"0x{x:x}" for x in chunk) + ",\n"
+        header = header.rstrip(",\n") + "\n};\n"
+    
+    if fmt in ('compressed', 'both'):
+        stream, dictionary = compress_cmem(kmem, cmem)
+        if fmt == 'both':
+            header += "\n"
+        header += f"""// Compressed instruction memory (cmem), loaded with cgra_cmem_init_compressed()
+// {len(stream)} bytes + {len(dictionary)} dictionary words instead of {len(cmem)} words
+#if CGRA_N_ROWS != {CGRA_N_ROW} || CGRA_CMEM_BK_DEPTH != {CGRA_CMEM_BK_DEPTH}
+  #error Compressed bitstream generated for another CGRA geometry
+#endif
+#define CGRA_CMEM_STREAM_SIZE {len(stream)}
+#define CGRA_CMEM_DICT_SIZE   {max(len(dictionary), 1)}
+
+const uint8_t cgra_cmem_stream[CGRA_CMEM_STREAM_SIZE] = {{
+"""
+        for i in range(0, len(stream), 16):
+            header += "  " + ", ".join(f"0x{x:02x}" for x in stream[i:i+16]) + ",\n"
+        header = header.rstrip(",\n") + "\n};\n"
+        header += "\nconst uint32_t cgra_cmem_dict[CGRA_CMEM_DICT_SIZE] = {\n"
+        dict_words = dictionary or [0]
+        for i in range(0, len(dict_words), 8):
+            header += "  " + ", ".join(f"0x{x:x}" for x in dict_words[i:i+8]) + ",\n"
+        header = header.rstrip(",\n") + "\n};\n"
     
     # Memory init
     if memory_data:
@@ -403,6 +580,8 @@ def main():
     parser.add_argument('-m', '--memory', default=None, help='Optional memory.csv')
     parser.add_argument('-o', '--output', default='cgra_bitstream.h', help='Output header')
     parser.add_argument('-n', '--name', default='CGRA_KERNEL', help='Kernel name')
+    parser.add_argument('--format', choices=['full', 'compressed', 'both'], default='full',
+                        help='cmem arrays to emit: full words, compressed stream or both (default: full)')
     
     args = parser.parse_args()
     
@@ -417,7 +596,7 @@ def main():
         print(f"  {len(memory_data[1])} data entries")
     
     print(f"Generating bitstream using HEEPsilon encoding...")
-    header = generate_bitstream(num_instr, instructions, args.name, memory_data)
+    header = generate_bitstream(num_instr, instructions, args.name, memory_data, args.format)
     
     with open(args.output, 'w') as f:
         f.write(header)
@@ -425,6 +604,12 @@ def main():
     print(f"Written to {args.output}")
     print(f"Kernel depth: {num_instr} instructions")
     print(f"CGRA size: {CGRA_N_ROW}x{CGRA_N_COL}")
+    if args.format != 'full':
+        kmem, cmem = build_memories(num_instr, instructions)
+        stream, dictionary = compress_cmem(kmem, cmem)
+        packed = len(stream) + 4 * len(dictionary)
+        print(f"cmem: {4 * len(cmem)} bytes full, {packed} bytes compressed "
+              f"({len(stream)} stream + {4 * len(dictionary)} dictionary, {packed / (4 * len(cmem)):.1%})")
 
 
 if __name__ == '__main__':
@@ -1,10 +1,54 @@
 #!/usr/bin/env python3
+"""
+CGRA Kernel Visualisation and Schedule Analysis
+
+Writes a Graphviz DOT of a kernel CSV: one node per instruction, grouped by
+cycle, with the neighbour (RCT/RCB/RCL/RCR), register and control flow edges.
+
+With --analyze the kernel is also read as a dependency graph and the script
+reports how much headroom the mapping has:
+- critical path length against the scheduled length, and the slack of each
+  instruction (-v): how many cycles it could move without stretching the
+  schedule. Critical instructions are highlighted in the DOT.
+- occupancy of each RC (heatmap, --png for an image) and of each cycle,
+  idle columns and memory operations per column.
+- for each loop (backward branch, JUMP or LOOP), the initiation interval
+  bounds: RecMII from the loop-carried dependencies and ResMII from the
+  instructions of the busiest RC, against the length of the body.
+
+The graph follows the behavioural model (cgra_sim.py): an operand is the
+value of the last instruction before the current cycle that wrote it (output
+register for SELF and the neighbours, R0-R3 otherwise), and the LWD/SWD of a
+column are ordered by the column pointers. Only true dependencies are
+modelled, every instruction counts as one cycle and the figures are static:
+each instruction of the CSV is counted once, whatever the trip counts.
+
+Usage:
+    python visualize_kernel.py instructions.csv kernel.dot
+    python visualize_kernel.py instructions.csv kernel.dot --analyze -v
+    python visualize_kernel.py instructions.csv --analyze --png util.png
+"""
+
+import argparse
 import csv
-import sys
 import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+import generate_bitstream as gb
+import cgra_rc_heatmap
+
+MEM_OPS = ('LWD', 'SWD', 'LWI', 'SWI')
+COND_BRANCH_OPS = ('BEQ', 'BNE', 'BLT', 'BGE')
 
-def visualize_kernel(csv_path, output_dot):
-    # Load CSV
+# Operand select -> (row, col) offset of the output register read
+NEIGHBOURS = {'SELF': (0, 0), 'RCT': (-1, 0), 'RCB': (1, 0), 'RCL': (0, -1), 'RCR': (0, 1)}
+
+Node = Tuple[int, int, int]                 # (cycle, row, col)
+
+
+def load_csv(csv_path):
+    """Return the instructions of a kernel CSV as [cycle][row][col] strings."""
     instructions = []
     with open(csv_path, 'r') as f:
         reader = csv.reader(f)
@@ -26,6 +70,12 @@ def visualize_kernel(csv_path, output_dot):
         
         if current_row:
             instructions.append(current_row)
+    return instructions
+
+
+def visualize_kernel(csv_path, output_dot, analysis=None):
+    instructions = load_csv(csv_path)
+    critical = analysis['critical'] if analysis else set()
             
     # Parse and Build Graph
     # Nodes: Cycle_Row_Col
@@ -72,8 +122,13 @@ def visualize_kernel(csv_path, output_dot):
                 elif "SWI" in instr: fill = colors["SWI"]
                 
                 label = f"{instr}\\n(R{row_idx}, C{col_idx})"
+                extra = ""
+                if analysis and (cycle_idx, row_idx, col_idx) in analysis['slack']:
+                    label += f"\\nslack {analysis['slack'][cycle_idx, row_idx, col_idx]}"
+                    if (cycle_idx, row_idx, col_idx) in critical:
+                        extra = ", color=red, penwidth=3"
                 # Add group attribute for vertical alignment
-                dot_lines.append(f"    {node_id} [label=\"{label}\", fillcolor=\"{fill}\", group=\"col_{col_idx}\"];")
+                dot_lines.append(f"    {node_id} [label=\"{label}\", fillcolor=\"{fill}\", group=\"col_{col_idx}\"{extra}];")
                 
                 # Logic for connections
                 specs = {
@@ -85,8 +140,8 @@ def visualize_kernel(csv_path, output_dot):
                 
                 for key, ((dr, dc), col_color) in specs.items():
                     if key in instr:
-                        sr = (row_idx + dr) % 4
-                        sc = (col_idx + dc) % 4
+                        sr = (row_idx + dr) % gb.CGRA_N_ROW
+                        sc = (col_idx + dc) % gb.CGRA_N_COL
                         src_id = f"c{cycle_idx}_r{sr}_c{sc}"
                         dot_lines.append(f"    {src_id} -> {node_id} [label=\"{key}\", color=\"{col_color}\", penwidth=2];")
                             
@@ -134,14 +189,305 @@ def visualize_kernel(csv_path, output_dot):
 
         dot_lines.append("  }")
 
+    # Critical path on top of the structural edges
+    if analysis:
+        for src, dst in analysis['critical_edges']:
+            dot_lines.append(f"  c{src[0]}_r{src[1]}_c{src[2]} -> c{dst[0]}_r{dst[1]}_c{dst[2]} "
+                             f"[color=red, penwidth=3, constraint=false];")
+
     dot_lines.append("}")
     
     with open(output_dot, 'w') as f:
         f.write("\n".join(dot_lines))
     print(f"Graph written to {output_dot}")
 
+
+
+# =============================================================================
+# Schedule analysis
+# =============================================================================
+
+def decode_kernel(instructions) -> Tuple[int, Dict[Node, Tuple[str, List[str]]]]:
+    """Return the number of cycles and {(cycle, row, col): (text, fields)} of the non-NOP instructions."""
+    nodes = {}
+    for cycle_idx, cycle_rows in enumerate(instructions):
+        for row_idx, row_cols in enumerate(cycle_rows[:gb.CGRA_N_ROW]):
+            for col_idx, instr in enumerate(row_cols[:gb.CGRA_N_COL]):
+                fields = gb.parse_instruction_string(instr)
+                if fields[2] != 'NOP':
+                    nodes[cycle_idx, row_idx, col_idx] = (instr, fields)
+    return len(instructions), nodes
+
+
+def _operand(sel: str, row: int, col: int) -> Optional[tuple]:
+    """State element read by an operand select, None for ZERO/IMM."""
+    if sel in NEIGHBOURS:
+        dr, dc = NEIGHBOURS[sel]
+        return ('out', (row + dr) % gb.CGRA_N_ROW, (col + dc) % gb.CGRA_N_COL)
+    if sel in gb.reg_dest_list:
+        return ('reg', row, col, sel)
+    return None
+
+
+def reads_writes(node: Node, fields: List[str]) -> Tuple[List[tuple], List[tuple]]:
+    """State elements read and written by an instruction."""
+    _, row, col = node
+    mux_a, mux_b, op, reg, mux_f, _ = fields
+    reads = [_operand(sel, row, col) for sel in (mux_a, mux_b)]
+    if op == 'MAC':
+        reads.append(('reg', row, col, reg))
+    if op in ('BSFA', 'BZFA'):
+        reads.append(_operand('SELF' if mux_f == '-' else mux_f, row, col))
+    # Every instruction updates the output register (and flags) of its RC
+    writes = [('out', row, col)]
+    if reg in gb.reg_dest_list and op not in ('SWD', 'SWI'):
+        writes.append(('reg', row, col, reg))
+    # The column pointers order the LWD (SWD) of a column
+    if op == 'LWD':
+        reads.append(('rd', col))
+        writes.append(('rd', col))
+    elif op == 'SWD':
+        reads.append(('wr', col))
+        writes.append(('wr', col))
+    return [r for r in reads if r is not None], writes
+
+
+def find_loops(nodes: Dict[Node, Tuple[str, List[str]]]) -> List[Tuple[int, int]]:
+    """Return the (first, last) cycles of the loop bodies, innermost first."""
+    loops = set()
+    for (cycle, _, _), (_, (mux_a, mux_b, op, _, _, imm)) in nodes.items():
+        target = None
+        if op in COND_BRANCH_OPS and imm.lstrip('-').isdigit():
+            target = int(imm)
+        elif op == 'JUMP' and mux_a in ('-', 'ZERO', 'IMM') and mux_b in ('-', 'ZERO', 'IMM'):
+            # The target is operand A + operand B, as in cgra_sim.py
+            value = int(imm) if imm.lstrip('-').isdigit() else 0
+            target = value * [mux_a, mux_b].count('IMM')
+        elif op == 'LOOP' and imm.lstrip('-').isdigit() and int(imm) > cycle:
+            loops.add((cycle + 1, int(imm)))
+        if target is not None and target <= cycle:
+            loops.add((target, cycle))
+    return sorted(loops, key=lambda l: (l[1] - l[0], l[0]))
+
+
+def _producers(writers: Dict[tuple, Dict[int, List[Node]]], res: tuple,
+               lo: int, hi: int) -> List[Node]:
+    """Writers of res in the last cycle of [lo, hi) that has one."""
+    cycles = sorted(writers.get(res, ()))
+    i = bisect_left(cycles, hi) - 1
+    if i < 0 or cycles[i] < lo:
+        return []
+    return writers[res][cycles[i]]
+
+
+def _rec_mii(body: List[Node], edges: List[Tuple[Node, Node, int]], length: int) -> int:
+    """Smallest II without a positive cycle for the weights 1 - II * distance."""
+    def feasible(ii):
+        dist = {n: 0 for n in body}
+        for _ in range(len(body)):
+            changed = False
+            for u, v, d in edges:
+                if dist[u] + 1 - ii * d > dist[v]:
+                    dist[v] = dist[u] + 1 - ii * d
+                    changed = True
+            if not changed:
+                return True
+        return False
+
+    lo, hi = 1, length
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if feasible(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def analyze_loop(nodes, rw, writers, first: int, last: int) -> dict:
+    """Initiation interval bounds of the loop body [first, last]."""
+    body = [n for n in nodes if first <= n[0] <= last]
+    edges = []
+    carried = []
+    for v in body:
+        for res in rw[v][0]:
+            prod = _producers(writers, res, first, v[0])
+            if prod:
+                edges.extend((u, v, 0) for u in prod)
+                continue
+            # Value of the previous iteration
+            prod = _producers(writers, res, v[0], last + 1)
+            edges.extend((u, v, 1) for u in prod)
+            carried.extend((u, v, res) for u in prod)
+
+    per_rc = {}
+    for _, row, col in body:
+        per_rc[row, col] = per_rc.get((row, col), 0) + 1
+    length = last - first + 1
+    res_mii = max(per_rc.values(), default=0)
+    rec_mii = _rec_mii(body, edges, length) if carried else 0
+
+    # Longest single recurrence, to name the state that limits the loop
+    recurrence = None
+    if carried:
+        succs = {}
+        for u, v, d in edges:
+            if d == 0:
+                succs.setdefault(u, []).append(v)
+        order = sorted(body)
+        best = 0
+        for u, v, res in carried:
+            depth = {v: 1}
+            for n in order:
+                if n in depth:
+                    for s in succs.get(n, ()):
+                        depth[s] = max(depth.get(s, 0), depth[n] + 1)
+            if depth.get(u, 0) > best:
+                best, recurrence = depth[u], (res, u)
+    return {'first': first, 'last': last, 'length': length, 'rec_mii': rec_mii,
+            'res_mii': res_mii, 'mii': max(rec_mii, res_mii, 1), 'recurrence': recurrence}
+
+
+def analyze(instructions) -> dict:
+    """Dependency graph, slack, occupancy and loop bounds of a kernel ([cycle][row][col] strings)."""
+    length, nodes = decode_kernel(instructions)
+    rw = {n: reads_writes(n, fields) for n, (_, fields) in nodes.items()}
+    writers = {}
+    for n, (_, writes) in rw.items():
+        for res in writes:
+            writers.setdefault(res, {}).setdefault(n[0], []).append(n)
+
+    # Dependencies of a single pass over the schedule, in cycle order
+    preds = {n: set() for n in nodes}
+    succs = {n: set() for n in nodes}
+    for v in nodes:
+        for res in rw[v][0]:
+            for u in _producers(writers, res, 0, v[0]):
+                preds[v].add(u)
+                succs[u].add(v)
+
+    order = sorted(nodes)
+    asap = {}
+    for n in order:
+        asap[n] = max((asap[u] + 1 for u in preds[n]), default=0)
+    tail = {}
+    for n in reversed(order):
+        tail[n] = max((tail[s] + 1 for s in succs[n]), default=0)
+    crit_len = max((asap[n] + tail[n] + 1 for n in nodes), default=0)
+    slack = {n: (length - 1 - tail[n]) - asap[n] for n in nodes}
+    critical = {n for n in nodes if asap[n] + tail[n] + 1 == crit_len}
+    critical_edges = [(u, v) for v in critical for u in preds[v]
+                      if u in critical and asap[v] == asap[u] + 1 and tail[u] == tail[v] + 1]
+
+    # Occupancy
+    n_rows, n_cols = gb.CGRA_N_ROW, gb.CGRA_N_COL
+    rc_util = [[0.0] * n_cols for _ in range(n_rows)]
+    cycle_busy = [0] * length
+    mem = [[0] * length for _ in range(n_cols)]
+    for cycle, row, col in nodes:
+        rc_util[row][col] += 1 / length
+        cycle_busy[cycle] += 1
+        if nodes[cycle, row, col][1][2] in MEM_OPS:
+            mem[col][cycle] += 1
+    used_cols = {col for _, _, col in nodes}
+
+    return {
+        'length': length,
+        'nodes': nodes,
+        'critical_path': crit_len,
+        'asap': asap,
+        'slack': slack,
+        'critical': critical,
+        'critical_edges': critical_edges,
+        'rc_util': rc_util,
+        'cycle_busy': cycle_busy,
+        'idle_columns': [c for c in range(n_cols) if c not in used_cols],
+        'mem_ops': [sum(m) for m in mem],
+        'mem_peak': [max(m, default=0) for m in mem],
+        'loops': [analyze_loop(nodes, rw, writers, first, last) for first, last in find_loops(nodes)],
+    }
+
+
+def _res_name(res: tuple) -> str:
+    if res[0] == 'reg':
+        return f"{res[3]} of RC ({res[1]}, {res[2]})"
+    if res[0] == 'out':
+        return f"output of RC ({res[1]}, {res[2]})"
+    return f"{'read' if res[0] == 'rd' else 'write'} pointer of column {res[1]}"
+
+
+def format_report(an: dict, verbose: bool = False) -> str:
+    """Text report of analyze()."""
+    length, nodes = an['length'], an['nodes']
+    n_rcs = gb.CGRA_N_ROW * gb.CGRA_N_COL
+    out = [f"Scheduled length: {length} cycles, critical path: {an['critical_path']} cycles "
+           f"(headroom {length - an['critical_path']})"]
+
+    path = sorted((n for n in an['critical']), key=lambda n: (an['asap'][n], n))
+    out.append("Critical instructions (cycle, row, col):")
+    for n in path:
+        out.append(f"  {n[0]:3d} ({n[1]}, {n[2]})  {nodes[n][0]}")
+
+    if verbose:
+        out.append("")
+        out.append("Slack per instruction:")
+        out.append("  cycle  rc        asap  slack  instruction")
+        for n in sorted(nodes):
+            mark = '*' if n in an['critical'] else ' '
+            out.append(f"  {n[0]:5d}  ({n[1]}, {n[2]})  {an['asap'][n]:6d}  {an['slack'][n]:5d}{mark} {nodes[n][0]}")
+
+    out.append("")
+    out.append(cgra_rc_heatmap.render_text(an['rc_util'], 'util'))
+    out.append("")
+    out.append("Occupancy per cycle:")
+    for cycle, busy in enumerate(an['cycle_busy']):
+        bar = '#' * busy + '.' * (n_rcs - busy)
+        out.append(f"  {cycle:3d}  {bar}  {busy / n_rcs:6.1%}")
+    total = sum(an['cycle_busy'])
+    out.append(f"  mean {total / (length * n_rcs) if length else 0:.1%} of {n_rcs} RCs")
+    if an['idle_columns']:
+        out.append(f"Idle columns: {', '.join(map(str, an['idle_columns']))}")
+
+    out.append("")
+    out.append("Memory operations per column (total, per cycle, peak in a cycle):")
+    for col, (ops, peak) in enumerate(zip(an['mem_ops'], an['mem_peak'])):
+        out.append(f"  col{col}  {ops:4d}  {ops / length if length else 0:5.2f}  {peak}")
+
+    if an['loops']:
+        out.append("")
+        out.append("Loops (cycles): length, RecMII, ResMII -> headroom")
+    for loop in an['loops']:
+        line = (f"  {loop['first']:3d}-{loop['last']:<3d}  {loop['length']:3d}  {loop['rec_mii']:3d}  "
+                f"{loop['res_mii']:3d} -> {loop['length'] - loop['mii']}")
+        if loop['recurrence']:
+            res, node = loop['recurrence']
+            line += f"  (longest recurrence: {_res_name(res)}, cycle {node[0]})"
+        out.append(line)
+    return '\n'.join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Visualise a CGRA kernel CSV and analyse its schedule')
+    parser.add_argument('csv', help='Kernel CSV (instructions.csv)')
+    parser.add_argument('output_dot', nargs='?', help='Graphviz DOT to write')
+    parser.add_argument('--analyze', action='store_true',
+                        help='Report the critical path, occupancy and loop II bounds')
+    parser.add_argument('--png', metavar='FILE', help='Save the RC occupancy heatmap as an image (requires matplotlib)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List the slack of every instruction')
+    args = parser.parse_args()
+    if not args.output_dot and not args.analyze:
+        parser.error('give an output DOT file and/or --analyze')
+
+    analysis = None
+    if args.analyze or args.png:
+        analysis = analyze(load_csv(args.csv))
+        print(format_report(analysis, args.verbose))
+        if args.png:
+            cgra_rc_heatmap.render_png(analysis['rc_util'], 'util', args.png)
+            print(f"Saved {args.png}")
+    if args.output_dot:
+        visualize_kernel(args.csv, args.output_dot, analysis)
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: visualize_kernel.py <csv> <output.dot>")
-        sys.exit(1)
-    visualize_kernel(sys.argv[1], sys.argv[2])
+    main()
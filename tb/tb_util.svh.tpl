@@ -15,6 +15,7 @@ export "DPI-C" task tb_writetoSram${bank.name()};
 % endfor
 export "DPI-C" task tb_getMemSize;
 export "DPI-C" task tb_set_exit_loop;
+export "DPI-C" task tb_set_frequency;
 
 import core_v_mini_mcu_pkg::*;
 
@@ -117,6 +118,17 @@ task tb_set_exit_loop;
 `endif
 endtask
 
+// Write the system clock frequency (clk_freq_hz of the testharness) to the
+// SYSTEM_FREQUENCY_HZ register of soc_ctrl, read by the firmware at run time
+task tb_set_frequency;
+`ifdef VCS
+  force heepsilon_top_i.x_heep_system_i.core_v_mini_mcu_i.ao_peripheral_subsystem_i.soc_ctrl_i.soc_ctrl_reg_top_i.u_system_frequency_hz.q = clk_freq_hz;
+  release heepsilon_top_i.x_heep_system_i.core_v_mini_mcu_i.ao_peripheral_subsystem_i.soc_ctrl_i.soc_ctrl_reg_top_i.u_system_frequency_hz.q;
+`else
+  heepsilon_top_i.x_heep_system_i.core_v_mini_mcu_i.ao_peripheral_subsystem_i.soc_ctrl_i.soc_ctrl_reg_top_i.u_system_frequency_hz.q = clk_freq_hz;
+`endif
+endtask
+
 export "DPI-C" task load_flash_hex;
 
 task load_flash_hex;
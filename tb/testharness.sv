@@ -36,6 +36,28 @@ module testharness #(
     output wire         jtag_tdo_o
 );
 
+  // System clock and UART baud rate. The build configuration gives the defaults,
+  // +cpu_clk_period_ps=<ps> and +uart_baud=<baud> override them without rebuilding
+  // the model. tb_set_frequency() reports the clock to the firmware through the
+  // SYSTEM_FREQUENCY_HZ register of soc_ctrl.
+  int unsigned clk_freq_hz = CLK_FREQUENCY * 1000;
+  int unsigned uart_baud = 'd256000;
+
+  initial begin : clk_config
+    automatic longint unsigned cpu_period_ps = 64'd1_000_000_000_000 / clk_freq_hz;
+    automatic longint unsigned cgra_period_ps;
+    if ($value$plusargs("cpu_clk_period_ps=%d", cpu_period_ps)) begin
+      if (cpu_period_ps == 0) $fatal(1, "[TESTBENCH]: +cpu_clk_period_ps must be > 0");
+      clk_freq_hz = 64'd1_000_000_000_000 / cpu_period_ps;
+    end
+    // The CGRA is clocked by the system clock
+    if ($value$plusargs("cgra_clk_period_ps=%d", cgra_period_ps) && cgra_period_ps != cpu_period_ps) begin
+      $fatal(1, "[TESTBENCH]: the CGRA runs on the system clock, +cgra_clk_period_ps must match the CPU period");
+    end
+    void'($value$plusargs("uart_baud=%d", uart_baud));
+    $display("[TESTBENCH]: System clock %0d Hz, UART %0d baud", clk_freq_hz, uart_baud);
+  end : clk_config
+
   `include "tb_util.svh"
 
   import obi_pkg::*;
@@ -157,13 +179,12 @@ module testharness #(
   // ---------
   // UART DPI
   // ---------
-  uartdpi #(
-      .BAUD('d256000),
-      .FREQ(CLK_FREQUENCY * 1000),  //Hz
+  heepsilon_uartdpi #(
       .NAME("uart0")
   ) i_uart0 (
       .clk_i,
       .rst_ni,
+      .cycles_per_symbol_i(clk_freq_hz / uart_baud),
       .tx_o(uart_rx),
       .rx_i(uart_tx)
   );
@@ -108,6 +108,8 @@ def main():
     cgra_rcs_num_instr = int(obj['cgra']['rcs_num_instr'])
     cgra_cmem_bk_depth = obj['cgra']['cmem_bk_depth']
     cgra_kmem_depth = obj['cgra']['kmem_depth']
+    cgra_rc_perf_cnt = bool(obj['cgra'].get('rc_perf_cnt', False))
+    cgra_num_instances = int(obj['cgra'].get('num_instances', 1))
 
     # Check if value are the default for the CGRA
     if cgra_max_columns == 'default':
@@ -120,6 +122,10 @@ def main():
     else:
         cgra_cmem_bk_depth = int(cgra_cmem_bk_depth)
 
+    # One 1 MiB context memory window and one 4 KiB register window per instance
+    if cgra_num_instances < 1 or cgra_num_instances > 16:
+        exit("The number of CGRA instances must be between 1 and 16")
+
     # Compute the log2 constant of the cmem bank depth for address generation
     cgra_cmem_bk_depth_log2 = int(ceil(log2(cgra_cmem_bk_depth)))
     # Same for the number of instruction per RC
@@ -137,7 +143,9 @@ def main():
         "cgra_kmem_depth"         : cgra_kmem_depth,
         "cgra_kmem_width"         : cgra_kmem_width,
         "cgra_cmem_bk_depth"      : cgra_cmem_bk_depth,
-        "cgra_cmem_bk_depth_log2" : cgra_cmem_bk_depth_log2
+        "cgra_cmem_bk_depth_log2" : cgra_cmem_bk_depth_log2,
+        "cgra_rc_perf_cnt"        : cgra_rc_perf_cnt,
+        "cgra_num_instances"      : cgra_num_instances
     }
 
     ###########